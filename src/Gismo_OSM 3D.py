@@ -46,6 +46,8 @@ Provided by Gismo 0.0.1
                             If they still contain the "building" key with value "True", then this can be used to extrude the shapes, by using some random extrude domain.
                             So to randomly extrude "buildings" shapes, just supply the "Construct Domain" to the randomHeightRange_ input. For example, input the "Construct Domain" component by using "20" and "30" as its starting and ending domain values. This will randomly extrude all buildings by 20 to 30 meters height. Of course in case the Rhino document units is: meters. It can be any other unit.
                             -
+                            Random values are derived from the "seed_" input and the index of each shape's branch.
+                            -
                             If nothing supplied, no random extrusion of the shapes will be applied.
                             -
                             Domain in Rhino document units (meters, feets...).
@@ -61,6 +63,27 @@ Provided by Gismo 0.0.1
                         Supply it by using "terrain" output of the Ladybug "Terrain Generator" (type_ = 1) or Gismo "Terrain Generator" (type_ = 2 or type_ = 3) components.
                         -
                         If nothing supplied, the "threeDeeShapes" will always be laid flat onto a horizontal plane, with plane origin being the "origin" input of the "OSM shapes" component.
+        buildingsAsMeshes_: Set to "True" to create the 3d buildings as meshes, directly from their footprints and heights, instead of as breps.
+                            If "groundTerrain_" is inputted, the building walls will go down to the lowest terrain point below the building, instead of being split with the terrain.
+                            This is much faster for large areas, and the "threeDeeShapes" can be used by "OSM Render Mesh" component without additional meshing.
+                            -
+                            If not supplied default value "False" will be used.
+        instanceTrees_: Set to "True" to create a single prototype tree geometry for all trees of the same type and similar size (height rounded to 2 meters, crown radius rounded to 1 meter).
+                        Instead of the tree geometry, "threeDeeShapes" and "threeDeeValues" outputs will then contain empty branches for trees, and their prototypes and placements will be outputted through "treePrototypes" and "treeTransforms" outputs. When baked, the trees will be block instances of their prototypes.
+                        Components which use the "threeDeeShapes" and "threeDeeValues" outputs (like "OSM Render Mesh" or "OSM Search") will therefore not see the instanced trees. The "height" output still contains the height of each tree.
+                        This is much faster, and uses much less memory, for areas with large number of trees.
+                        -
+                        If not supplied default value "False" will be used.
+        parallel_: Set to "True" to create the 3d shapes in parallel, on all available processor cores.
+                   The order of the shapes in the outputs is the same as when they are created serially.
+                   -
+                   If not supplied default value "False" will be used.
+        seed_: Seed for the random heights (from "randomHeightRange_" input) and random tree shapes.
+               Each shape's branch gets its own random values, derived from the seed and the branch index. So the same seed_ always results in the same 3d shapes, whether they are created in parallel or not.
+               -
+               If not supplied, a different seed will be used on each run of the component.
+               -
+               Integer.
         bakeIt_: Set to "True" to bake the extruded _shape geometry into the Rhino scene.
                  The geometry will be grouped. To ungroup it, select it and call the "Ungroup" Rhino command.
                  -
@@ -83,6 +106,9 @@ Provided by Gismo 0.0.1
         height: The height of each shape from the "threeDeeShapes" output.
                 -
                 In Rhino document units (meters, feets...).
+        treePrototypes: Prototype tree geometries, in case "instanceTrees_" input is set to "True". Each of them is located at the origin.
+        treeTransforms: Placements of the instances of each of the "treePrototypes", in case "instanceTrees_" input is set to "True".
+                        Each branch corresponds to a single prototype tree. Use Grasshopper "Transform" component and graft the "treePrototypes" to place the trees.
 """
 
 ghenv.Component.Name = "Gismo_OSM 3D"
@@ -98,6 +124,7 @@ except: pass
 import scriptcontext as sc
 import Grasshopper
 import System
+import System.Threading.Tasks
 import random
 import Rhino
 import math
@@ -251,7 +278,143 @@ def isNumber(string):
         return False
 
 
-def createThreeDeeShapes(shapesDataTree, keys, valuesDataTree, heightPerLevel, randomHeightRange, randomHeightRangeStart, randomHeightRangeEnd, treeType, groundTerrain, osm_id_Only, osm_way_id_Only, osm_id_Remove, osm_way_id_Remove, shapeType, unitConversionFactor):
+def createTreeCrown(trunkTop_pt, trunkTop_crv, trunkBrep, crownRadius, crownHeight, deciduousOrConiferous, treeType, randomGenerator):
+    """
+    create the tree crown on top of the trunk, and join it with the trunk brep
+    """
+    numOfTreeHorizontalSegments = 6  # this value is fixed, and should not be changed
+    tol = Rhino.RhinoDoc.ActiveDoc.ModelAbsoluteTolerance
+    
+    # crown curves/polylines
+    crownSection_crvs = []
+    
+    if deciduousOrConiferous == "deciduous":
+        crownRadii = [0.15*crownRadius, crownRadius, crownRadius, crownRadius, 0.15*crownRadius]  # [crownBottom_crv radius, crownMiddle1_crv, crownMiddle2_crv, crownTop_crv]
+        crownPartitionHeights = [0*crownHeight, 0.275*crownHeight, 0.5*crownHeight, 0.725*crownHeight, 1.0*crownHeight]
+    elif deciduousOrConiferous == "coniferous":
+        crownRadii = [0.2*crownRadius, crownRadius, 0.1*crownRadius]  # [crownBottom_crv radius, crownMiddle1_crv, crownMiddle2_crv, crownTop_crv]
+        crownPartitionHeights = [0*crownHeight, 0.05*crownHeight, 1.0*crownHeight]
+    
+    for i in xrange(len(crownRadii)):
+        crown_pt = Rhino.Geometry.Point3d(trunkTop_pt.X, trunkTop_pt.Y, trunkTop_pt.Z + crownPartitionHeights[i])
+        circleCrv = Rhino.Geometry.Circle(crown_pt, crownRadii[i]).ToNurbsCurve()
+        if (treeType == 0):
+            crownSection_crvs.append(circleCrv)
+        elif (treeType == 1):
+            includeEnds = True
+            circleDivision_tL = list(Rhino.Geometry.Curve.DivideByCount(circleCrv, numOfTreeHorizontalSegments, includeEnds))
+            circleDivision_tL = circleDivision_tL + [circleDivision_tL[0]]  # closing the polyline
+            circleDivision_ptsL = [circleCrv.PointAt(t) for t in circleDivision_tL]
+            crown_polyline = Rhino.Geometry.Polyline(circleDivision_ptsL).ToNurbsCurve()
+            crownSection_crvs.append(crown_polyline)
+        elif (treeType == 2):
+            centroid = Rhino.Geometry.AreaMassProperties.Compute(circleCrv).Centroid
+            includeEnds = True
+            t_L = circleCrv.DivideByCount(12, includeEnds)
+            randomCirclePts = []
+            for t in t_L:
+                pt = circleCrv.PointAt(t)
+                vector = pt - centroid
+                vectorScaleFactor = randomGenerator.uniform(-0.2, 0.2)
+                randomPt = pt + vector*vectorScaleFactor
+                randomCirclePts.append(randomPt)
+                degree = 3; knotstyle = 3; knotstyle2 = System.Enum.ToObject(Rhino.Geometry.CurveKnotStyle, 3); start_tangent = end_tangent = Rhino.Geometry.Vector3d.Unset
+            randomCirclePts2 = randomCirclePts + [randomCirclePts[0]]  # close the crv
+            randomCrv = Rhino.Geometry.Curve.CreateInterpolatedCurve(randomCirclePts2, degree, knotstyle2, start_tangent, end_tangent)
+            crownSection_crvs.append(randomCrv)
+    
+    # crow brep
+    bottomCrown_brep = Rhino.Geometry.Brep.CreatePlanarBreps([crownSection_crvs[0],trunkTop_crv])[0]
+    topCrown_brep = Rhino.Geometry.Brep.CreatePlanarBreps(crownSection_crvs[-1])[0]
+    if (treeType == 0):
+        loftType2 = Rhino.Geometry.LoftType.Normal
+    elif (treeType == 1):
+        loftType2 = Rhino.Geometry.LoftType.Straight
+    elif (treeType == 2):
+        loftType2 = Rhino.Geometry.LoftType.Normal
+    closed = False
+    crownSideBrep = Rhino.Geometry.Brep.CreateFromLoft(crownSection_crvs, Rhino.Geometry.Point3d.Unset, Rhino.Geometry.Point3d.Unset, loftType2, closed)[0]
+    treeJoinedBrep = Rhino.Geometry.Brep.JoinBreps([bottomCrown_brep, crownSideBrep, topCrown_brep, trunkBrep], tol)[0]
+    treeJoinedBrep.Flip()  # for some reason the "treeJoinedBrep" has always normals pointed downwards
+    
+    return treeJoinedBrep
+
+
+def treePrototypeKey(treeType, deciduousOrConiferous, height, crownRadius, treeSizeBucket):
+    """
+    trees of the same type, whose height and crown radius fall into the same size buckets, share the same prototype tree geometry
+    """
+    heightBucket = max(int(round(height / treeSizeBucket)), 1)
+    crownRadiusBucket = max(int(round(2 * float(crownRadius) / treeSizeBucket)), 1)  # crown radii are bucketed with half of the treeSizeBucket
+    
+    return (treeType, deciduousOrConiferous, heightBucket, crownRadiusBucket)
+
+
+def createTreePrototype(prototypeKey, treeSizeBucket, seed):
+    """
+    create the tree geometry for the prototypeKey, with the bottom of its trunk at the origin
+    """
+    treeType, deciduousOrConiferous, heightBucket, crownRadiusBucket = prototypeKey
+    height = heightBucket * treeSizeBucket
+    crownRadius = crownRadiusBucket * treeSizeBucket / 2
+    trunkRadius = height/46.0  # the middle of the 44 to 48 range used for the non-instanced trees
+    trunkHeight = 0.2*height
+    crownHeight = height - trunkHeight
+    
+    # the trunk starts below the origin, so that the instances placed on a sloped groundTerrain_ do not float above it
+    trunkBottom_crv = Rhino.Geometry.Circle(Rhino.Geometry.Point3d(0, 0, -0.5*trunkHeight), trunkRadius).ToNurbsCurve()
+    extrusionVector = Rhino.Geometry.Vector3d(0, 0, 1.5*trunkHeight)
+    trunkBrep = Rhino.Geometry.Surface.CreateExtrusion(trunkBottom_crv, extrusionVector).ToBrep()
+    trunkTop_pt = Rhino.Geometry.Point3d(0, 0, trunkHeight)
+    trunkTop_crv = Rhino.Geometry.Circle(trunkTop_pt, trunkRadius).ToNurbsCurve()
+    
+    prototypeRandom = random.Random(hash((seed, prototypeKey)))
+    treePrototype = createTreeCrown(trunkTop_pt, trunkTop_crv, trunkBrep, crownRadius, crownHeight, deciduousOrConiferous, treeType, prototypeRandom)
+    
+    return treePrototype
+
+
+def createBuildingMesh(topCrvs, height, minHeight, terrainSampler):
+    """
+    create the building mesh directly from its topCrvs (lifted footprint) and height, with ear clipping triangulation of the footprint.
+    Returns None if the topCrvs are not polylines, or if the footprint can not be triangulated. The building is then created as a brep
+    """
+    ringsPts = []
+    for topCrv in topCrvs:
+        success, polyline = topCrv.TryGetPolyline()
+        if (not success) or (polyline.Count < 4):
+            return None
+        ringPts = [(pt.X, pt.Y)  for pt in polyline]
+        ringsPts.append(ringPts[:-1])  # remove the closing point
+    topZ = topCrvs[0].PointAtStart.Z
+    
+    # topCrvs inside of the first one are its holes (the same as with Brep.CreatePlanarBreps)
+    outerPts = ringsPts[0]
+    holesPtsL = [ringPts  for ringPts in ringsPts[1:]  if gismo_createGeometry.pointInPolygon(ringPts[0], outerPts)]
+    
+    if (minHeight != ""):
+        # there is a valid "min_height" value
+        bottomZ = topZ - (height - minHeight)
+    elif (terrainSampler == None):
+        bottomZ = topZ - height
+    else:
+        # walls go down to the lowest terrain point below the footprint. Their parts below the terrain are covered by it
+        drapedCrvs = terrainSampler.drapeCurves([topCrvs[0]])[0]
+        drapedZs = [pt.Z  for drapedCrv in drapedCrvs  for pt in drapedCrv.TryGetPolyline()[1]]
+        if (len(drapedZs) != 0):
+            bottomZ = min(drapedZs)
+        else:
+            bottomZ = topZ - height
+    
+    buildingMesh = gismo_createGeometry.extrudedPolygonMesh(outerPts, holesPtsL, bottomZ, topZ)
+    
+    return buildingMesh
+
+
+def createThreeDeeShapes(shapesDataTree, keys, valuesDataTree, heightPerLevel, randomHeightRange, randomHeightRangeStart, randomHeightRangeEnd, treeType, groundTerrain, osm_id_Only, osm_way_id_Only, osm_id_Remove, osm_way_id_Remove, shapeType, unitConversionFactor, parallel, instanceTrees, buildingsAsMeshes, seed):
+    
+    phaseTimings = []  # [phase name, duration in seconds]
+    phaseStartTime = time.time()
     
     # use the Z coordinate of the origin_ input from "OSM shapes"
     OSMshapesComp_origin = sc.sticky["gismo_OSMshapesComp_origin"]
@@ -276,7 +439,7 @@ def createThreeDeeShapes(shapesDataTree, keys, valuesDataTree, heightPerLevel, r
         elif (key == "osm_way_id"):
             osm_way_id_keyIndex = keyIndex
     
-    buildingShapes = []
+    buildingShapes = {}  # shapeId: shape
     buildingShapes_with_BuildingPartsAndHeight_insideL2 = []
     valueBuilding = ""  # dummy value in case "building" key does not exist
     valueBuildingPart = ""  # dummy value in case "building:part" key does not exist
@@ -284,13 +447,30 @@ def createThreeDeeShapes(shapesDataTree, keys, valuesDataTree, heightPerLevel, r
     valueHeight2 = ""  # dummy value in case "height" key does not exist
     value_osm_id = ""  # initial "osm_id" key value
     value_osm_way_id = ""  # dummy value in case "osm_way_id" key does not exist
+    geometryProperties = gismo_osm.shapesGeometryProperties(shapesDataTree)  # areas, centroids of the shapes are calculated only when needed, and only once (shared with "OSM shapes" component)
     if (building_keyIndex != None) and (shapeType == 0):  # "(shapeType == 0)" because a node can also be tagged as: "building=yes"
         
         shapesLL = shapesDataTree.Branches
         valuesLL = valuesDataTree.Branches
-        paths = shapesDataTree.Paths  # obrisati ovaj red
+        paths = shapesDataTree.Paths
         shapePlane = Rhino.Geometry.Plane(Rhino.Geometry.Point3d(0,0,OSMshapesComp_origin.Z), Rhino.Geometry.Vector3d(0,0,1))  # it will always be constant because each shapesL has a constant height (coming from "OSM shapes" component)
         tol = Rhino.RhinoDoc.ActiveDoc.ModelAbsoluteTolerance
+        
+        # for b): centroids and areas of all shapes with valid "building:part" and "height" values are calculated only once, and indexed
+        buildingPartCentroids = []
+        buildingPartAreas = []
+        if (buildingPart_keyIndex != None) and (height_keyIndex != None):
+            for branchIndex2,shapesL2 in enumerate(shapesLL):
+                if len(shapesL2) != 0:  # some shape may have been removed with the "OSM ids" component
+                    valueBuildingPart = valuesLL[branchIndex2][buildingPart_keyIndex]
+                    valueHeight2 = valuesLL[branchIndex2][height_keyIndex]
+                    if (valueBuildingPart != "") and (valueHeight2 != ""):
+                        shapeId2 = geometryProperties.shapeId(paths[branchIndex2])
+                        buildingPartCentroids.append(geometryProperties.centroid(shapeId2))
+                        buildingPartAreas.append(geometryProperties.area(shapeId2))
+        buildingPartShapesIndex = gismo_createGeometry.shapesCentroidsIndex(buildingPartCentroids, buildingPartAreas)
+        del buildingPartCentroids; del buildingPartAreas
+        
         for branchIndex,shapesL in enumerate(shapesLL):
             if len(shapesL) != 0:  # some shape may have been removed with the "OSM ids" component
                 valueBuilding = valuesLL[branchIndex][building_keyIndex]  # for a)
@@ -304,25 +484,15 @@ def createThreeDeeShapes(shapesDataTree, keys, valuesDataTree, heightPerLevel, r
                 else:
                     value_osm_way_id = None  # the "osm_way_id" key does not exist in "keys"
                 if (valueBuilding != ""):
-                    buildingShapes.append(shapesL[0])  # "shapes" output from "OSM shapes" component will always have one item per branch
+                    buildingShapes[geometryProperties.shapeId(paths[branchIndex])] = shapesL[0]  # "shapes" output from "OSM shapes" component will always have one item per branch
                     
                     # for b)
                     if (valueHeight == ""):  # there is a shapesL[0] with a valid "building" value but invalid "height" value (it does not have a value for "height" key)
-                        shapesLArea = Rhino.Geometry.AreaMassProperties.Compute(shapesL[0]).Area
-                        innerShapesTotalArea = 0
-                        for branchIndex2,shapesL2 in enumerate(shapesLL):  # for b)
-                            if len(shapesL2) != 0:  # some shape may have been removed with the "OSM ids" component
-                               if (buildingPart_keyIndex != None) and (height_keyIndex != None):# OVAJ RED JE SKORO DODAT. proveriti da li pravi probleme
-                                    valueBuildingPart = valuesLL[branchIndex2][buildingPart_keyIndex]
-                                    valueHeight2 = valuesLL[branchIndex2][height_keyIndex]
-                                    if (valueBuildingPart != "") and (valueHeight2 != ""):  # there is AT LEAST ONE shapesL2[0] with a valid "building:part" and "height" values
-                                        shapeCentroid = Rhino.Geometry.AreaMassProperties.Compute(shapesL2[0]).Centroid
-                                        pointContainment = shapesL[0].Contains(shapeCentroid, shapePlane, tol)
-                                        if (pointContainment == Rhino.Geometry.PointContainment.Inside):# or (pointContainment == Rhino.Geometry.PointContainment.Coincident):
-                                            shapesL2Area = Rhino.Geometry.AreaMassProperties.Compute(shapesL2[0]).Area
-                                            innerShapesTotalArea += shapesL2Area
+                        shapesLArea = geometryProperties.area(geometryProperties.shapeId(paths[branchIndex]))
+                        # total area of the shapes with valid "building:part" and "height" values, whose centroids are inside of shapesL[0]
+                        innerShapesTotalArea = gismo_createGeometry.containedShapesArea(buildingPartShapesIndex, shapesL[0], shapePlane, tol)
                         
-                        if innerShapesTotalArea >= shapesLArea:
+                        if (shapesLArea != None) and (innerShapesTotalArea >= shapesLArea):
                             # shapesL[0] containsts other shapesL2[0]'s which fill up (cover) the complete shapesL[0] area. In that case do not extrude the shapesL[0]
                             if (value_osm_id != ""):
                                 #print "value_osm_id: ", value_osm_id
@@ -342,6 +512,13 @@ def createThreeDeeShapes(shapesDataTree, keys, valuesDataTree, heightPerLevel, r
         
         del shapesLL
         del valuesLL
+        del buildingPartShapesIndex
+    
+    # R-tree of the shapes bounding boxes (shared with "OSM shapes" component): a shape's centroid is checked for containment only in those building shapes whose bounding boxes contain it
+    if len(buildingShapes) > 0:
+        spatialIndex = gismo_osm.shapesSpatialIndex(geometryProperties)
+    else:
+        spatialIndex = None
     
     
     # get groundBrep_singleBrepFace
@@ -349,17 +526,23 @@ def createThreeDeeShapes(shapesDataTree, keys, valuesDataTree, heightPerLevel, r
         groundBrep_singleBrepFace = groundTerrain.Faces[0].DuplicateFace(False)  # always use the top face (the actual terrain) in case inputted groundTerrain_ has been created as a polysurface
         accurate = False
         bb_volume, bb_centroid, bb_length, bb_depth, bb_height, bb_bottomLeftCorner, bb_bottomRightCorner, bb_topRightCorner, bb_topLeftCorner = gismo_preparation.boundingBox_properties([groundTerrain], accurate)
+        if (shapeType == 0):
+            # terrain heights are sampled only at the grid nodes around the buildings vertices (each node once), and then looked up for all of them
+            terrainSampler = sc.sticky["gismo_TerrainSampler"](groundBrep_singleBrepFace)
+        else:
+            terrainSampler = None
     elif (groundTerrain == None):
         groundBrep_singleBrepFace = None
+        terrainSampler = None
         bb_height = 10  # dummy value
     bb_height = 3000  # dummy large value (until "Ladybug Terrain Generator" starts support "origin_" input to be on the terrain)
     
     
     
     if (shapeType == 0):
-        # shift the paths in "shapes" and "values" data trees by -1, to extrude buildings
-        shapes_shiftedPaths_DataTree = gismo_preparation.datatree_shiftPaths(shapesDataTree)
-        values_shiftedPaths_DataTree = gismo_preparation.datatree_shiftPaths(valuesDataTree)
+        # shift the paths in "shapes" and "values" data trees by -1 (without copying their branches), to extrude buildings
+        shapes_shiftedPaths_DataTree = gismo_preparation.datatree_shiftPathsView(shapesDataTree)
+        values_shiftedPaths_DataTree = gismo_preparation.datatree_shiftPathsView(valuesDataTree)
     elif (shapeType != 0):
         # no shifting of paths should be done in case the trees need to be created
         shapes_shiftedPaths_DataTree = shapesDataTree
@@ -375,15 +558,28 @@ def createThreeDeeShapes(shapesDataTree, keys, valuesDataTree, heightPerLevel, r
     
     projectionDirection = Rhino.Geometry.Vector3d(0,0,1)  # it can be direction = Rhino.Geometry.Vector3d(0,0,-1) as well, does not matter
     tol = Rhino.RhinoDoc.ActiveDoc.ModelAbsoluteTolerance
-    atleastOneThreeDeeShapeCanBeCreated = False  # initial value
-    for branchIndex,shapesL in enumerate(shapes_shiftedPaths_LL):
+    treeSizeBucket = 2.0/unitConversionFactor  # 2 meters (6.56 feet)
+    idFilter = gismo_osm.shapesIdFilter(keys, osm_id_Only, osm_way_id_Only, osm_id_Remove, osm_way_id_Remove)  # "osm_id", "osm_way_id" keys positions and ids sets are created only once for all shapes
+    phaseTimings.append(["preparation", time.time() - phaseStartTime])
+    phaseStartTime = time.time()
+    
+    def createBranchThreeDeeShapes(branchIndex):
+        """
+        create the 3d shape of a single branch. Branches are independent of each other, so they can be created in parallel.
+        Each branch has its own random generator seeded with the seed and the branch index, so that the random heights and tree shapes are the same regardless of the order in which the branches are created
+        """
+        shapesL = shapes_shiftedPaths_LL[branchIndex]
+        branchRandom = random.Random(hash((seed, branchIndex)))
+        atleastOneThreeDeeShapeCanBeCreated = False  # initial value
+        treeInstance = None  # [prototypeKey, transform] of the tree, in case instanceTrees == True
+        
         if len(shapesL) == 0:
             # some shape may have been removed with the "OSM ids" component
             height = 0
             threeDeeShapeL = []
             threeDeeValueL = []
         else:
-            subValuesL_filtered, shapesL_filtered = gismo_osm.filterShapes(keys, values_shiftedPaths_LL[branchIndex], "shapesL dummy string", osm_id_Only, osm_way_id_Only, osm_id_Remove, osm_way_id_Remove)
+            subValuesL_filtered, shapesL_filtered = gismo_osm.filterShapes(keys, values_shiftedPaths_LL[branchIndex], "shapesL dummy string", osm_id_Only, osm_way_id_Only, osm_id_Remove, osm_way_id_Remove, idFilter)
             if (len(subValuesL_filtered) == 0) and (len(shapesL_filtered) == 0):
                 # the id supplied to the "osm_id_Only, osm_way_id_Only, osm_id_Remove, osm_way_id_Remove" is found
                 height = 0
@@ -434,7 +630,7 @@ def createThreeDeeShapes(shapesDataTree, keys, valuesDataTree, heightPerLevel, r
                     # b) there are NO "height" and "building_l" keys. And there is "building" key, and it's valid (it's not equal to "". So it's either True or some other value, like: "residential", "house", "industrial"...)
                     if (randomHeightRange != None):
                         # domain supplied into the "randomHeightRange_" input
-                        height = round(random.uniform(randomHeightRangeStart, randomHeightRangeEnd),2)  # in Rhino document units
+                        height = round(branchRandom.uniform(randomHeightRangeStart, randomHeightRangeEnd),2)  # in Rhino document units
                         threeDeeShapesObject = "3d building"
                     else:
                         # nothing inputted to the "randomHeightRange_" input
@@ -483,7 +679,7 @@ def createThreeDeeShapes(shapesDataTree, keys, valuesDataTree, heightPerLevel, r
                         # this happens if the value for the "height" key was: "", or there the "height" key does not even exist
                         if (randomHeightRange != None):
                             # domain supplied into the "randomHeightRange_" input
-                            height = round(random.uniform(randomHeightRangeStart, randomHeightRangeEnd),2)  # in Rhino document units
+                            height = round(branchRandom.uniform(randomHeightRangeStart, randomHeightRangeEnd),2)  # in Rhino document units
                         else:
                             # nothing inputted to the "randomHeightRange_" input
                             height = 0
@@ -499,21 +695,39 @@ def createThreeDeeShapes(shapesDataTree, keys, valuesDataTree, heightPerLevel, r
                             deciduousOrConiferous = "deciduous"  # by default, if it can not be identified if a tree is deciduous or coniferous always use the deciduous
                             #deciduousOrConiferous = "coniferous"
                         
-                        numOfTreeHorizontalSegments = 6  # this value is fixed, and should not be changed
-                        
                         # heights and radii
-                        trunkRadius = height/random.uniform(44, 48)  # lower values (than 44,48) can result in "bottomCrown_brep" not being able to be created
+                        trunkRadius = height/branchRandom.uniform(44, 48)  # lower values (than 44,48) can result in "bottomCrown_brep" not being able to be created
                         if isNumber(valueDiameterCrown):
                             # there is a valid "valueDiameterCrown" value
-                            crownRadius = valueDiameterCrown
+                            crownRadius = float(valueDiameterCrown) / 2
                         else: 
                             # valueDiameterCrown == ""
-                            crownRadius = height/random.uniform(2, 5)
+                            crownRadius = height/branchRandom.uniform(2, 5)
                         
                         trunkHeight = 0.2*height
                         crownHeight = height - trunkHeight
                         
                         treeBottom_pt = shapesL[0].Location  # convert Point to Point3d
+                        
+                        if instanceTrees:
+                            # the tree will be an instance of the prototype tree of the same type and size bucket. Only its placement is created here
+                            if (groundTerrain == None):
+                                projectedTreeBottom_pts = [treeBottom_pt]
+                            elif (groundTerrain != None):
+                                projectedTreeBottom_pts = Rhino.Geometry.Intersect.Intersection.ProjectPointsToBreps([groundTerrain], [treeBottom_pt], projectionDirection, tol)
+                            
+                            # the instanced tree is not a part of the "threeDeeShapes" output, so its values are not a part of the "threeDeeValues" output either
+                            threeDeeValueL = []
+                            if len(projectedTreeBottom_pts) == 0:
+                                # the shapeL[0] point is located outside of terrainGround_ input boundaries
+                                height = 0
+                            else:
+                                prototypeKey = treePrototypeKey(treeType, deciduousOrConiferous, height, crownRadius, treeSizeBucket)
+                                rotationAngleR = branchRandom.uniform(0, 2*math.pi)  # random rotation, so that the instances of the same prototype do not look the same
+                                treeTransform = Rhino.Geometry.Transform.Translation(Rhino.Geometry.Vector3d(projectedTreeBottom_pts[0])) * Rhino.Geometry.Transform.Rotation(rotationAngleR, Rhino.Geometry.Vector3d(0,0,1), Rhino.Geometry.Point3d(0,0,0))
+                                treeInstance = [prototypeKey, treeTransform]
+                            return threeDeeShapeL, threeDeeValueL, height, atleastOneThreeDeeShapeCanBeCreated, treeInstance
+                        
                         unprojectedTrunkBottom_crv = Rhino.Geometry.Circle(treeBottom_pt, trunkRadius).ToNurbsCurve()
                         
                         # project the shapes (points) to the groundTerrain_
@@ -533,10 +747,7 @@ def createThreeDeeShapes(shapesDataTree, keys, valuesDataTree, heightPerLevel, r
                                 height = 0
                                 threeDeeShapeL = []
                                 threeDeeValueL = []
-                                threeDeeShapesDataTree.AddRange(threeDeeShapeL, shapes_shiftedPaths_Paths[branchIndex])
-                                threeDeeValuesDataTree.AddRange(threeDeeValueL, shapes_shiftedPaths_Paths[branchIndex])
-                                heightDataTree.AddRange([height], shapes_shiftedPaths_Paths[branchIndex])
-                                continue
+                                return threeDeeShapeL, threeDeeValueL, height, atleastOneThreeDeeShapeCanBeCreated, treeInstance
                             else:
                                 projectedTreeBottom_pt = projectedTreeBottom_pts[0]
                                 projectedTrunkBottom_crv1 = Rhino.Geometry.Curve.ProjectToBrep(unprojectedTrunkBottom_crv, groundTerrain, projectionDirection, tol)[0]
@@ -560,57 +771,7 @@ def createThreeDeeShapes(shapesDataTree, keys, valuesDataTree, heightPerLevel, r
                                 del splittedBreps
                         
                         # b) crown
-                        # crown curves/polylines
-                        crownSection_crvs = []
-                        
-                        if deciduousOrConiferous == "deciduous":
-                            crownRadii = [0.15*crownRadius, crownRadius, crownRadius, crownRadius, 0.15*crownRadius]  # [crownBottom_crv radius, crownMiddle1_crv, crownMiddle2_crv, crownTop_crv]
-                            crownPartitionHeights = [0*crownHeight, 0.275*crownHeight, 0.5*crownHeight, 0.725*crownHeight, 1.0*crownHeight]
-                        elif deciduousOrConiferous == "coniferous":
-                            crownRadii = [0.2*crownRadius, crownRadius, 0.1*crownRadius]  # [crownBottom_crv radius, crownMiddle1_crv, crownMiddle2_crv, crownTop_crv]
-                            crownPartitionHeights = [0*crownHeight, 0.05*crownHeight, 1.0*crownHeight]
-                        
-                        for i in xrange(len(crownRadii)):
-                            crown_pt = Rhino.Geometry.Point3d(trunkTop_pt.X, trunkTop_pt.Y, trunkTop_pt.Z + crownPartitionHeights[i])
-                            circleCrv = Rhino.Geometry.Circle(crown_pt, crownRadii[i]).ToNurbsCurve()
-                            if (treeType == 0):
-                                crownSection_crvs.append(circleCrv)
-                            elif (treeType == 1):
-                                includeEnds = True
-                                circleDivision_tL = list(Rhino.Geometry.Curve.DivideByCount(circleCrv, numOfTreeHorizontalSegments, includeEnds))
-                                circleDivision_tL = circleDivision_tL + [circleDivision_tL[0]]  # closing the polyline
-                                circleDivision_ptsL = [circleCrv.PointAt(t) for t in circleDivision_tL]
-                                crown_polyline = Rhino.Geometry.Polyline(circleDivision_ptsL).ToNurbsCurve()
-                                crownSection_crvs.append(crown_polyline)
-                            elif (treeType == 2):
-                                centroid = Rhino.Geometry.AreaMassProperties.Compute(circleCrv).Centroid
-                                includeEnds = True
-                                t_L = circleCrv.DivideByCount(12, includeEnds)
-                                randomCirclePts = []
-                                for t in t_L:
-                                    pt = circleCrv.PointAt(t)
-                                    vector = pt - centroid
-                                    vectorScaleFactor = random.uniform(-0.2, 0.2)
-                                    randomPt = pt + vector*vectorScaleFactor
-                                    randomCirclePts.append(randomPt)
-                                    degree = 3; knotstyle = 3; knotstyle2 = System.Enum.ToObject(Rhino.Geometry.CurveKnotStyle, 3); start_tangent = end_tangent = Rhino.Geometry.Vector3d.Unset
-                                randomCirclePts2 = randomCirclePts + [randomCirclePts[0]]  # close the crv
-                                randomCrv = Rhino.Geometry.Curve.CreateInterpolatedCurve(randomCirclePts2, degree, knotstyle2, start_tangent, end_tangent)
-                                crownSection_crvs.append(randomCrv)
-                        
-                        # crow brep
-                        bottomCrown_brep = Rhino.Geometry.Brep.CreatePlanarBreps([crownSection_crvs[0],trunkTop_crv])[0]
-                        topCrown_brep = Rhino.Geometry.Brep.CreatePlanarBreps(crownSection_crvs[-1])[0]
-                        if (treeType == 0):
-                            loftType2 = Rhino.Geometry.LoftType.Normal
-                        elif (treeType == 1):
-                            loftType2 = Rhino.Geometry.LoftType.Straight
-                        elif (treeType == 2):
-                            loftType2 = Rhino.Geometry.LoftType.Normal
-                        closed = False
-                        crownSideBrep = Rhino.Geometry.Brep.CreateFromLoft(crownSection_crvs, Rhino.Geometry.Point3d.Unset, Rhino.Geometry.Point3d.Unset, loftType2, closed)[0]
-                        treeJoinedBrep = Rhino.Geometry.Brep.JoinBreps([bottomCrown_brep, crownSideBrep, topCrown_brep, trunkBrep], tol)[0]
-                        treeJoinedBrep.Flip()  # for some reason the "treeJoinedBrep" has always normals pointed downwards
+                        treeJoinedBrep = createTreeCrown(trunkTop_pt, trunkTop_crv, trunkBrep, crownRadius, crownHeight, deciduousOrConiferous, treeType, branchRandom)
                         threeDeeShapeL.append(treeJoinedBrep)
                 
                 
@@ -623,16 +784,21 @@ def createThreeDeeShapes(shapesDataTree, keys, valuesDataTree, heightPerLevel, r
                         bottomCrvControlPt_highestZcoord = None  # check if commenting-out this line will make some errors
                         # find out whether shapesL is included in other building shapes (like shapesL which have valid "building:part" key). If it is, then calculate the "bottomCrvControlPt_highestZcoord" of that other building shape
                         shapePlane = Rhino.Geometry.Plane(Rhino.Geometry.Point3d(0,0,shapesL[0].PointAtStart.Z), Rhino.Geometry.Vector3d(0,0,1))  # it will always be constant because each shapesL has a constant height (coming from "OSM shapes" component)
-                        for buildingShape in buildingShapes:
-                            shapeCentroid = Rhino.Geometry.AreaMassProperties.Compute(shapesL[0]).Centroid
+                        shapeCentroid = geometryProperties.centroid(geometryProperties.shapeId(shapes_shiftedPaths_Paths[branchIndex], 0))  # the same for all buildingShapes
+                        if (spatialIndex != None) and (shapeCentroid != None):
+                            candidateShapeIds = [shapeId  for shapeId in spatialIndex.searchPoint(shapeCentroid, tol)  if buildingShapes.has_key(shapeId)]
+                        else:
+                            candidateShapeIds = []
+                        for buildingShapeId in candidateShapeIds:
+                            buildingShape = buildingShapes[buildingShapeId]
                             pointContainment = buildingShape.Contains(shapeCentroid, shapePlane, tol)
                             if (pointContainment == Rhino.Geometry.PointContainment.Inside) or (pointContainment == Rhino.Geometry.PointContainment.Coincident):
                                 # shapesL[0]'s centroid is contained inside another shapesL[0] (which has a valid "building" key), so use the "bottomCrvControlPt_highestZcoord" of that another shapesL[0]
-                                dummy_topCrvs, bottomCrvControlPt_highestZcoord = gismo_createGeometry.liftingOSMshapes_from_groundTerrain([buildingShape], groundBrep_singleBrepFace, height, valueMinHeight)  # "bottomCrvControlPt_highestZcoord" calculated
+                                dummy_topCrvs, bottomCrvControlPt_highestZcoord = gismo_createGeometry.liftingOSMshapes_from_groundTerrain([buildingShape], groundBrep_singleBrepFace, height, valueMinHeight, None, terrainSampler)  # "bottomCrvControlPt_highestZcoord" calculated
                                 del dummy_topCrvs
                                 break  # the shapesL[0] has found to be inside another shapesL[0] which has a valid "building" key. No need for checking of other shapes
                         
-                        topCrvs, dummy_bottomCrvControlPt_highestZcoord = gismo_createGeometry.liftingOSMshapes_from_groundTerrain(shapesL, groundBrep_singleBrepFace, height, valueMinHeight, bottomCrvControlPt_highestZcoord)
+                        topCrvs, dummy_bottomCrvControlPt_highestZcoord = gismo_createGeometry.liftingOSMshapes_from_groundTerrain(shapesL, groundBrep_singleBrepFace, height, valueMinHeight, bottomCrvControlPt_highestZcoord, terrainSampler)
                         if (len(topCrvs) == 0):
                             # the shapesL is located outside of the "groundTerrain_" ("if groundTerrain_" inputted. If "groundTerrain_" not inputted, len(projectedShapeCrvs) will never be equal to 0)
                             height = 0
@@ -641,36 +807,45 @@ def createThreeDeeShapes(shapesDataTree, keys, valuesDataTree, heightPerLevel, r
                         elif (len(topCrvs) != 0):
                             threeDeeValueL = values_shiftedPaths_LL[branchIndex]
                             
-                            planarBrep = Rhino.Geometry.Brep.CreatePlanarBreps(topCrvs)[0]
-                            planarBrep.Flip()  # for some reason the upper planarBrep has always a normal pointed downwards
-                            # extrude buildings
-                            if (valueMinHeight != ""):
-                                # there is a valid "min_height" value
-                                extrusionVec = Rhino.Geometry.Vector3d(0,0,-(height-valueMinHeight))
-                            elif (valueMinHeight == ""):
-                                if (groundTerrain == None):
-                                    extrusionVec = Rhino.Geometry.Vector3d(0,0,-height)
-                                elif(groundTerrain != None):
-                                    shapeExtrudeHeight = -(height + 2 * bb_height)  # "2" is due to safety
-                                    extrusionVec = Rhino.Geometry.Vector3d(0,0,shapeExtrudeHeight)
+                            if buildingsAsMeshes:
+                                # the building mesh is created directly from the topCrvs, without creation and splitting of breps
+                                buildingMesh = createBuildingMesh(topCrvs, height, valueMinHeight, terrainSampler)
+                            else:
+                                buildingMesh = None
                             
-                            topCrvs_StartPt = topCrvs[0].PointAtStart  # if topCrvs has more shapes than 1, the others will also be on the same height
-                            extrudeCrv = Rhino.Geometry.Line(topCrvs_StartPt, topCrvs_StartPt + extrusionVec).ToNurbsCurve()
-                            planarBrepFace = planarBrep.Faces[0]
-                            cap = True
-                            extrudedShape = Rhino.Geometry.BrepFace.CreateExtrusion(planarBrepFace, extrudeCrv, cap)
-                            if (groundTerrain == None):
-                                # nothing inputted into the "groundTerrain_" input
-                                threeDeeShapeL = [extrudedShape]
-                            elif (groundTerrain != None):
+                            if (buildingMesh != None):
+                                threeDeeShapeL = [buildingMesh]
+                            else:
+                                planarBrep = Rhino.Geometry.Brep.CreatePlanarBreps(topCrvs)[0]
+                                planarBrep.Flip()  # for some reason the upper planarBrep has always a normal pointed downwards
+                                # extrude buildings
                                 if (valueMinHeight != ""):
-                                    threeDeeShapeL = [extrudedShape]
+                                    # there is a valid "min_height" value
+                                    extrusionVec = Rhino.Geometry.Vector3d(0,0,-(height-valueMinHeight))
                                 elif (valueMinHeight == ""):
-                                    # something inputted into the "groundTerrain_" input
-                                    splittedBreps = Rhino.Geometry.Brep.Split(extrudedShape, groundBrep_singleBrepFace, tol)
-                                    if len(splittedBreps) > 0:
-                                        threeDeeShapeL = [splittedBreps[0]]
-                                    del splittedBreps
+                                    if (groundTerrain == None):
+                                        extrusionVec = Rhino.Geometry.Vector3d(0,0,-height)
+                                    elif(groundTerrain != None):
+                                        shapeExtrudeHeight = -(height + 2 * bb_height)  # "2" is due to safety
+                                        extrusionVec = Rhino.Geometry.Vector3d(0,0,shapeExtrudeHeight)
+                            
+                                topCrvs_StartPt = topCrvs[0].PointAtStart  # if topCrvs has more shapes than 1, the others will also be on the same height
+                                extrudeCrv = Rhino.Geometry.Line(topCrvs_StartPt, topCrvs_StartPt + extrusionVec).ToNurbsCurve()
+                                planarBrepFace = planarBrep.Faces[0]
+                                cap = True
+                                extrudedShape = Rhino.Geometry.BrepFace.CreateExtrusion(planarBrepFace, extrudeCrv, cap)
+                                if (groundTerrain == None):
+                                    # nothing inputted into the "groundTerrain_" input
+                                    threeDeeShapeL = [extrudedShape]
+                                elif (groundTerrain != None):
+                                    if (valueMinHeight != ""):
+                                        threeDeeShapeL = [extrudedShape]
+                                    elif (valueMinHeight == ""):
+                                        # something inputted into the "groundTerrain_" input
+                                        splittedBreps = Rhino.Geometry.Brep.Split(extrudedShape, groundBrep_singleBrepFace, tol)
+                                        if len(splittedBreps) > 0:
+                                            threeDeeShapeL = [splittedBreps[0]]
+                                        del splittedBreps
                     
                     else:
                         # height is equal to 0
@@ -683,18 +858,49 @@ def createThreeDeeShapes(shapesDataTree, keys, valuesDataTree, heightPerLevel, r
                     threeDeeShapeL = []
                     threeDeeValueL = []
         
+        return threeDeeShapeL, threeDeeValueL, height, atleastOneThreeDeeShapeCanBeCreated, treeInstance
+    
+    branchesThreeDeeShapes = [None] * len(shapes_shiftedPaths_LL)
+    def createBranchThreeDeeShapes_toList(branchIndex):
+        branchesThreeDeeShapes[branchIndex] = createBranchThreeDeeShapes(branchIndex)
+    
+    if parallel:
+        # branches are partitioned across the .NET thread pool
+        System.Threading.Tasks.Parallel.ForEach(xrange(len(shapes_shiftedPaths_LL)), createBranchThreeDeeShapes_toList)
+    else:
+        for branchIndex in xrange(len(shapes_shiftedPaths_LL)):
+            createBranchThreeDeeShapes_toList(branchIndex)
+    
+    # one prototype tree for each distinct prototypeKey. The prototypes are sorted, so that their order does not depend on the order in which the branches have been created
+    treePrototypeKeys = sorted(set([branchThreeDeeShapes[4][0]  for branchThreeDeeShapes in branchesThreeDeeShapes  if branchThreeDeeShapes[4] != None]))
+    treePrototypes = [createTreePrototype(prototypeKey, treeSizeBucket, seed)  for prototypeKey in treePrototypeKeys]
+    treePrototypeIndices = dict([(prototypeKey, prototypeIndex)  for prototypeIndex, prototypeKey in enumerate(treePrototypeKeys)])
+    phaseTimings.append(["generation", time.time() - phaseStartTime])
+    phaseStartTime = time.time()
+    
+    # output data trees are always filled in the order of the branches
+    atleastOneThreeDeeShapeCanBeCreated = False  # initial value
+    treeTransformsDataTree = Grasshopper.DataTree[object]()  # transforms of the instances of each prototype tree are in the branch with the prototype's index
+    for branchIndex, (threeDeeShapeL, threeDeeValueL, height, branchThreeDeeShapeCanBeCreated, treeInstance) in enumerate(branchesThreeDeeShapes):
         threeDeeShapesDataTree.AddRange(threeDeeShapeL, shapes_shiftedPaths_Paths[branchIndex])
         threeDeeValuesDataTree.AddRange(threeDeeValueL, shapes_shiftedPaths_Paths[branchIndex])
         heightDataTree.AddRange([height], shapes_shiftedPaths_Paths[branchIndex])
+        if branchThreeDeeShapeCanBeCreated:
+            atleastOneThreeDeeShapeCanBeCreated = True
+        if treeInstance != None:
+            prototypeKey, treeTransform = treeInstance
+            treeTransformsDataTree.Add(treeTransform, Grasshopper.Kernel.Data.GH_Path(treePrototypeIndices[prototypeKey]))
+    phaseTimings.append(["output", time.time() - phaseStartTime])
+    phaseStartTime = time.time()
     
     
-    if (threeDeeShapesDataTree.DataCount == 0):
+    if (threeDeeShapesDataTree.DataCount == 0) and (len(treePrototypes) == 0):
         if (len(osm_id_Only) != 0) or (len(osm_way_id_Only) != 0):
             # this may happen if ids supplied to the "osm_id_Only_" and/or "osm_way_id_Only_" inputs of "OSM ids" component can not be found in this _location and/or radius_ (they may correspond to other _location and/or radius_)
             valid_onlyRemove_Ids_or_shapes = False
             printMsg = "The ids you supplied through \"osm_id_Only_\" and/or \"osm_way_id_Only_\" inputs do not exist for this \"_location\" and/or \"radius_\" inputs.\nTry removing the ids from the \"osm_id_Only_\" and/or \"osm_way_id_Only_\" inputs of \"OSM ids\" component."
             
-            return threeDeeShapesDataTree, threeDeeValuesDataTree, heightDataTree, valid_onlyRemove_Ids_or_shapes, printMsg
+            return threeDeeShapesDataTree, threeDeeValuesDataTree, heightDataTree, treePrototypes, treeTransformsDataTree, phaseTimings, valid_onlyRemove_Ids_or_shapes, printMsg
         elif (len(osm_id_Only) == 0) and (len(osm_way_id_Only) == 0):
             if (atleastOneThreeDeeShapeCanBeCreated == True):
                 valid_onlyRemove_Ids_or_shapes = False
@@ -705,7 +911,7 @@ def createThreeDeeShapes(shapesDataTree, keys, valuesDataTree, heightPerLevel, r
                 valid_onlyRemove_Ids_or_shapes = False
                 printMsg = "No 3D shape (building or tree) could be created with the supplied _values of _keys"
             
-            return threeDeeShapesDataTree, threeDeeValuesDataTree, heightDataTree, valid_onlyRemove_Ids_or_shapes, printMsg
+            return threeDeeShapesDataTree, threeDeeValuesDataTree, heightDataTree, treePrototypes, treeTransformsDataTree, phaseTimings, valid_onlyRemove_Ids_or_shapes, printMsg
     
     
     # baking
@@ -726,26 +932,30 @@ def createThreeDeeShapes(shapesDataTree, keys, valuesDataTree, heightPerLevel, r
         
         threeDeeShapesFlattened = [shape  for threeDeeShapeL in threeDeeShapesDataTree.Branches  for shape in threeDeeShapeL]
         geometryIds = gismo_preparation.bakeGeometry(threeDeeShapesFlattened, layerIndex)
+        if (len(treePrototypes) != 0):
+            # instanced trees are baked as block instances
+            geometryIds.extend(gismo_preparation.bakeInstances(treePrototypes, treeTransformsDataTree.Branches, layerIndex, "3D_OSM_TREE_" + layerName))
         
         # grouping
         groupIndex = gismo_preparation.groupGeometry("3D_OSM_SHAPES" + "_" + layerName, geometryIds)
         del threeDeeShapesFlattened
         del geometryIds
+    phaseTimings.append(["baking", time.time() - phaseStartTime])
     
     
     # deleting
-    del shapesDataTree; del shapes_shiftedPaths_Paths; del shapes_shiftedPaths_LL; del valuesDataTree; del values_shiftedPaths_LL; del keys; del buildingShapes  # delete local variables
+    del shapesDataTree; del valuesDataTree; del createBranchThreeDeeShapes_toList  # delete local variables (the ones used by "createBranchThreeDeeShapes" function can not be deleted)
     gc.collect()
     
     valid_onlyRemove_Ids_or_shapes = True
     printMsg = "ok"
     
-    return threeDeeShapesDataTree, threeDeeValuesDataTree, heightDataTree, valid_onlyRemove_Ids_or_shapes, printMsg
+    return threeDeeShapesDataTree, threeDeeValuesDataTree, heightDataTree, treePrototypes, treeTransformsDataTree, phaseTimings, valid_onlyRemove_Ids_or_shapes, printMsg
 
 
-def printOutput(osm_id_Only, osm_way_id_Only, osm_id_Remove, osm_way_id_Remove, heightPerLevel, randomHeightRangeStart, randomHeightRangeEnd, treeType):
+def printOutput(osm_id_Only, osm_way_id_Only, osm_id_Remove, osm_way_id_Remove, heightPerLevel, randomHeightRangeStart, randomHeightRangeEnd, treeType, seed, phaseTimings):
     if bakeIt_ == True:
-        bakedOrNot = "and baked "
+        bakedOrNot = "and baked %s " % gismo_preparation.bakeSummary()
     elif bakeIt_ == False:
         bakedOrNot = ""
     
@@ -754,6 +964,23 @@ def printOutput(osm_id_Only, osm_way_id_Only, osm_id_Remove, osm_way_id_Remove,
     else:
         groundTerrainInputted = "no"
     
+    if parallel_:
+        parallelOrNot = "yes"
+    else:
+        parallelOrNot = "no"
+    
+    if instanceTrees_:
+        instanceTreesOrNot = "yes"
+    else:
+        instanceTreesOrNot = "no"
+    
+    if buildingsAsMeshes_:
+        buildingsAsMeshesOrNot = "yes"
+    else:
+        buildingsAsMeshesOrNot = "no"
+    
+    phaseTimingsMsg = ", ".join(["%s: %0.2f s" % (phaseName, phaseDuration)  for phaseName, phaseDuration in phaseTimings])
+    
     resultsCompletedMsg = "OSM 3D component results successfully completed %s!" % bakedOrNot
     printOutputMsg = \
     """
@@ -765,7 +992,13 @@ Height per level (rhino doc. units): %s
 Random height range (rhino doc. units): %s - %s
 Tree geometry type: %s
 Ground terrain inputted: %s
-    """ % (osm_id_Only, osm_way_id_Only, osm_id_Remove, osm_way_id_Remove, heightPerLevel, randomHeightRangeStart, randomHeightRangeEnd, treeType, groundTerrainInputted)
+Parallel: %s
+Seed: %s
+Instanced trees: %s
+Buildings as meshes: %s
+
+Timings: %s
+    """ % (osm_id_Only, osm_way_id_Only, osm_id_Remove, osm_way_id_Remove, heightPerLevel, randomHeightRangeStart, randomHeightRangeEnd, treeType, groundTerrainInputted, parallelOrNot, seed, instanceTreesOrNot, buildingsAsMeshesOrNot, phaseTimingsMsg)
     print resultsCompletedMsg
     print printOutputMsg
 
@@ -773,6 +1006,8 @@ Ground terrain inputted: %s
 level = Grasshopper.Kernel.GH_RuntimeMessageLevel.Warning
 if sc.sticky.has_key("gismoGismo_released"):
     validVersionDate, printMsg = sc.sticky["gismo_check"].versionDate(ghenv.Component)
+    if validVersionDate:
+        validVersionDate, printMsg = sc.sticky["gismo_check"].componentParams(ghenv.Component, ["buildingsAsMeshes_", "instanceTrees_", "parallel_", "seed_"], ["treePrototypes", "treeTransforms"])
     if validVersionDate:
         gismo_preparation = sc.sticky["gismo_Preparation"]()
         gismo_createGeometry = sc.sticky["gismo_CreateGeometry"]()
@@ -781,9 +1016,13 @@ if sc.sticky.has_key("gismoGismo_released"):
         heightPerLevel, randomHeightRange, randomHeightRangeStart, randomHeightRangeEnd, treeType, osm_id_Only, osm_way_id_Only, osm_id_Remove, osm_way_id_Remove, shapeType, unitConversionFactor, validInputData, printMsg = checkInputData(_shapes, _keys, _values, heightPerLevel_, randomHeightRange_, treeType_, onlyRemove_Ids_)
         if validInputData:
             if _runIt:
-                threeDeeShapes, threeDeeValues, height, valid_onlyRemove_Ids_or_shapes, printMsg = createThreeDeeShapes(_shapes, _keys, _values, heightPerLevel, randomHeightRange, randomHeightRangeStart, randomHeightRangeEnd, treeType, groundTerrain_, osm_id_Only, osm_way_id_Only, osm_id_Remove, osm_way_id_Remove, shapeType, unitConversionFactor)
+                if seed_ == None:
+                    seed = random.randint(0, 1000000)  # a different seed on each run
+                else:
+                    seed = int(seed_)
+                threeDeeShapes, threeDeeValues, height, treePrototypes, treeTransforms, phaseTimings, valid_onlyRemove_Ids_or_shapes, printMsg = createThreeDeeShapes(_shapes, _keys, _values, heightPerLevel, randomHeightRange, randomHeightRangeStart, randomHeightRangeEnd, treeType, groundTerrain_, osm_id_Only, osm_way_id_Only, osm_id_Remove, osm_way_id_Remove, shapeType, unitConversionFactor, parallel_, instanceTrees_, buildingsAsMeshes_, seed)
                 if valid_onlyRemove_Ids_or_shapes:
-                    printOutput(osm_id_Only, osm_way_id_Only, osm_id_Remove, osm_way_id_Remove, heightPerLevel, randomHeightRangeStart, randomHeightRangeEnd, treeType)
+                    printOutput(osm_id_Only, osm_way_id_Only, osm_id_Remove, osm_way_id_Remove, heightPerLevel, randomHeightRangeStart, randomHeightRangeEnd, treeType, seed, phaseTimings)
                     threeDeeKeys = _keys
                 else:
                     print printMsg
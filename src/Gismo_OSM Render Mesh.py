@@ -89,7 +89,7 @@ def checkInputData(threeDeeShapes, threeDeeKeys, threeDeeValues, defaultColor, t
     
     
     
-    if (len(threeDeeShapes.Branches[0]) == 1) and (type(threeDeeShapes.Branches[0][0]) == Rhino.Geometry.Mesh):
+    if (threeDeeShapes.BranchCount == 1) and (len(threeDeeShapes.Branches[0]) == 1) and (type(threeDeeShapes.Branches[0][0]) == Rhino.Geometry.Mesh) and (len(threeDeeKeys) == 0):  # "OSM 3D" component can also output meshes ("buildingsAsMeshes_" input), but always with keys
         # if a mesh from "Terrain analysis" component is inputted into the "_threeDeeShapes", then "_threeDeeKeys" and "_threeDeeValues" values are not needed
         OSM3DrenderMesh = False
     else:
@@ -202,6 +202,7 @@ def main(shapesDataTree, keys, valuesDataTree, OSM3DrenderMesh, defaultColor, te
                 grassColor_keyIndex = keyIndex
         
         allMeshesSeparated = []
+        allMeshesSeparatedColors = []  # color of each of the allMeshesSeparated. None if the mesh has already been colored
         if (buildingColor_keyIndex != None) or (roofColor_keyIndex != None) or (treeColor_keyIndex != None) or (grassColor_keyIndex != None):
             shapesLL = shapesDataTree.Branches
             valuesLL = valuesDataTree.Branches
@@ -247,43 +248,40 @@ def main(shapesDataTree, keys, valuesDataTree, OSM3DrenderMesh, defaultColor, te
                         roofColor = shapesLColor
                     
                     # mesh the shapesL (building with roof included, or tree, or grass)
-                    meshes = Rhino.Geometry.Mesh.CreateFromBrep(shapesL[0], meshParam)
-                    joinedMesh = Rhino.Geometry.Mesh()
-                    for mesh in meshes:
-                        joinedMesh.Append(mesh)
-                    shapes2L = [joinedMesh]
-                    
-                    # color the mesh (colorTheShapesL = True)
-                    shapes2L[0].VertexColors.Clear()
-                    mesh_verticesCount = shapes2L[0].Vertices.Count
-                    for i in xrange(mesh_verticesCount):
-                        shapes2L[0].VertexColors.Add(shapesLColor)
+                    if isinstance(shapesL[0], Rhino.Geometry.Mesh):
+                        # building created as a mesh by "OSM 3D" component ("buildingsAsMeshes_" input)
+                        shapes2L = [shapesL[0].DuplicateMesh()]
+                    else:
+                        meshes = Rhino.Geometry.Mesh.CreateFromBrep(shapesL[0], meshParam)
+                        joinedMesh = Rhino.Geometry.Mesh()
+                        for mesh in meshes:
+                            joinedMesh.Append(mesh)
+                        shapes2L = [joinedMesh]
                     
+                    # the mesh will be colored with the shapesLColor when merged with other meshes of the same color
+                    shapes2LColor = shapesLColor
                     
-                    if (roofColor != None):
-                        # roof
+                    if (roofColor != None) and isinstance(shapesL[0], Rhino.Geometry.Mesh):
+                        # roof faces of the building mesh have their own vertices, with normals pointing upwards. Color all vertices at once
+                        if (shapes2L[0].Normals.Count != shapes2L[0].Vertices.Count):
+                            shapes2L[0].Normals.ComputeNormals()
+                        verticesColors = [roofColor if (normal.Z > 0.5) else shapesLColor  for normal in shapes2L[0].Normals]
+                        shapes2L[0].VertexColors.SetColors(System.Array[System.Drawing.Color](verticesColors))
+                        shapes2LColor = None  # already colored
+                    elif (roofColor != None):
+                        # roof: the upper face of the shapesL, lifted for 0.01 so that it is visible above the shapesL
                         upperShapesLfaceBrep = shapesL[0].Faces[0].DuplicateFace(False)
-                        upperShapesLfaceBrep.Flip()  # if it isn't fliped the upperShapesLface_extruded is invalid
-                        
-                        nakedOnly = False
-                        shapesL_randomCrvs = upperShapesLfaceBrep.DuplicateEdgeCurves(nakedOnly)
-                        shapesL_startPt = shapesL_randomCrvs[0].PointAtStart
-                        extrusionVec = Rhino.Geometry.Vector3d(0,0,0.01)
-                        extrudeCrv = Rhino.Geometry.Line(shapesL_startPt, shapesL_startPt + extrusionVec).ToNurbsCurve()
-                        cap = True
-                        upperShapesLface_extruded = Rhino.Geometry.BrepFace.CreateExtrusion(upperShapesLfaceBrep.Faces[0], extrudeCrv, cap)
                         
                         # mesh the roof
-                        meshes = Rhino.Geometry.Mesh.CreateFromBrep(upperShapesLface_extruded, meshParam)
+                        meshes = Rhino.Geometry.Mesh.CreateFromBrep(upperShapesLfaceBrep, meshParam)
                         joinedMesh = Rhino.Geometry.Mesh()
                         for mesh in meshes:
                             joinedMesh.Append(mesh)
+                        joinedMesh.Normals.ComputeNormals()
+                        if (joinedMesh.Normals.Count != 0) and (joinedMesh.Normals[0].Z < 0):
+                            joinedMesh.Flip(True, True, True)  # roof needs to face upwards
+                        joinedMesh.Translate(Rhino.Geometry.Vector3d(0,0,0.01))
                         roofsL = [joinedMesh]
-                        
-                        roofsL[0].VertexColors.Clear()
-                        mesh_verticesCount = roofsL[0].Vertices.Count
-                        for i in xrange(mesh_verticesCount):
-                            roofsL[0].VertexColors.Add(roofColor)
                 
                 
                 elif (len(shapesL) == 0):
@@ -292,8 +290,10 @@ def main(shapesDataTree, keys, valuesDataTree, OSM3DrenderMesh, defaultColor, te
                 
                 if len(shapes2L) != 0:
                     allMeshesSeparated.extend(shapes2L)
+                    allMeshesSeparatedColors.append(shapes2LColor)
                 if len(roofsL) != 0:
                     allMeshesSeparated.extend(roofsL)
+                    allMeshesSeparatedColors.append(roofColor)
         
         else:
             renderedJoinedMesh = None
@@ -305,32 +305,12 @@ def main(shapesDataTree, keys, valuesDataTree, OSM3DrenderMesh, defaultColor, te
             return renderedJoinedMesh
         
         
-        # join the "allMeshesSeparated" to "joinedMesh"
-        rs.EnableRedraw(False)
-        allMeshesSeparated_ids = []
-        for mesh in allMeshesSeparated:
-            meshId = Rhino.RhinoDoc.ActiveDoc.Objects.AddMesh(mesh)
-            allMeshesSeparated_ids.append(meshId)
-        
-        sc.doc = Rhino.RhinoDoc.ActiveDoc
-        numOfSelectedObjs = rs.SelectObjects(allMeshesSeparated_ids)
-        
-        echo = False
-        sucess = rs.Command("NoEcho _-Join _Enter", echo)
-        
-        select = True
-        joinedMesh_id = rs.LastCreatedObjects(select)[0]
-        joinedMesh = Rhino.RhinoDoc.ActiveDoc.Objects.Find(joinedMesh_id).Geometry
-        
-        quiet = True
-        deleteSuccess = Rhino.RhinoDoc.ActiveDoc.Objects.Delete(joinedMesh_id, quiet)
-        rs.EnableRedraw(True)
-        sc.doc = ghdoc
+        # join the "allMeshesSeparated" to "joinedMesh", without adding them to Rhino document
+        joinedMesh = gismo_createGeometry.mergeMeshesByColor(allMeshesSeparated, allMeshesSeparatedColors)
     
     
     elif (OSM3DrenderMesh == False):
         allMeshesSeparated = Rhino.Geometry.Mesh()  # dummy variable, due to need to delete
-        allMeshesSeparated_ids = Rhino.Geometry.Mesh()  # dummy variable, due to need to delete
         joinedMesh = shapesDataTree.Branches[0][0]
     
     
@@ -358,7 +338,6 @@ def main(shapesDataTree, keys, valuesDataTree, OSM3DrenderMesh, defaultColor, te
     # deleting
     del joinedMesh
     del allMeshesSeparated
-    del allMeshesSeparated_ids
     gc.collect()
     
     return renderedJoinedMesh
@@ -366,7 +345,7 @@ def main(shapesDataTree, keys, valuesDataTree, OSM3DrenderMesh, defaultColor, te
 
 def printOutput(defaultColor, textureImageName, textureImageFolder):
     if bakeIt_ == True:
-        bakedOrNot = "and baked "
+        bakedOrNot = "and baked %s " % gismo_preparation.bakeSummary()
     elif bakeIt_ == False:
         bakedOrNot = ""
     
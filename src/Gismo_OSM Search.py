@@ -26,6 +26,9 @@ Provided by Gismo 0.0.1
     input:
         _requiredTag: Required tag represents a combination between a key and value(s) for which this component will perform the search.
                       Use "OSM tag" component to generate it.
+                      -
+                      Several required tags can be searched at once: merge the "requiredTag" outputs of a few "OSM tag" components with Grasshopper's "Entwine" component, and plug its result in here.
+                      The shapes will then be classified for all required tags in a single pass, and "foundShapes", "foundValues", "foundShapeOrNot" outputs will have one main branch per each required tag ({0;...} for the first one, {1;...} for the second one...).
         _shapes: Plug in the data from the Gismo OSM shapes "shapes" output
         _keys: Plug in the data from the Gismo OSM shapes "keys" output.
         _values: Plug in the data from the Gismo OSM shapes "values" output.
@@ -40,6 +43,7 @@ Provided by Gismo 0.0.1
                          -
                          If nothing supplied, then search of 2d OSM shapes (that's "_shapes" input) will be performed only.
         createFootprints_: In case your shape is a polygon, this input will create a surface from it.
+                           If "groundTerrain_" is inputted, the footprints which are inside of it are draped onto it as meshes, and the ones crossing its edge are cut out of it as surfaces.
                            -
                            This input is irrelevant if you are performing search of 3D OSM shapes (if data is supplied to "threeDeeShapes_" and "threeDeeValues_" inputs).
                            -
@@ -97,99 +101,125 @@ import gc
 
 def checkInputData(requiredTag, shapes, keys, values, threeDeeShapes, threeDeeValues, createFootprints):
     
-    # check _requiredTag input, get requiredKey, requiredValues, OSMobjectName
+    # check _requiredTag input, get requiredKeys, requiredValuesLL, OSMobjectName
     if (len(requiredTag.Branches) == 0)  or  (len(requiredTag.Branches) == 1) and (requiredTag.Branches[0][0] == None):
         # this happens when nothing is supplied to the "_requiredTag" input,  OR  when "requiredTag" ouput of "OSM tag" component is supplied to the "_requiredTag" input, but the "OSM tag" component has not been ran
-        OSMobjectName = requiredKey = requiredValues = createFootprints = perform_searchThreeDeeShapes = shapeType = None
+        OSMobjectName = requiredKeys = requiredValuesLL = createFootprints = perform_searchThreeDeeShapes = shapeType = None
         validInputData = False
         printMsg = "There is no data supplied to the \"_requiredTag\" input.\n" + \
                    " \n" + \
                    "Use the \"OSM tag\" component to generate this input."
-        return OSMobjectName, requiredKey, requiredValues, createFootprints, perform_searchThreeDeeShapes, shapeType, validInputData, printMsg
+        return OSMobjectName, requiredKeys, requiredValuesLL, createFootprints, perform_searchThreeDeeShapes, shapeType, validInputData, printMsg
     else:
-        # deconstruct "_requiredTag" input to requiredKey, requiredValues
-        requiredKey = list(requiredTag.Branches[0])[0]
-        requiredValues = list(requiredTag.Branches[1])
-        if len(requiredValues) == 0:
-            requiredValues = ["^"]  # returning changed "requiredValues = ["^"]" in "OSM tag" component
+        # group the "_requiredTag" branches per each required tag: {0} and {1} paths for a single required tag, {n;0} and {n;1} paths for the n-th of the several entwined required tags
+        requiredTagsBranches = {}  # path without its last index: [requiredKey branch, requiredValues branch]
+        requiredTagsPaths = []
+        for path, branch in zip(requiredTag.Paths, requiredTag.Branches):
+            pathIndices = list(path.Indices)
+            requiredTagPath = tuple(pathIndices[:-1])
+            if not requiredTagsBranches.has_key(requiredTagPath):
+                requiredTagsBranches[requiredTagPath] = [None, []]
+                requiredTagsPaths.append(requiredTagPath)
+            if (pathIndices[-1] == 0) or (pathIndices[-1] == 1):
+                requiredTagsBranches[requiredTagPath][pathIndices[-1]] = list(branch)
         
-        # try finding "OSMobjectName" if _requiredTag has been generated with already defined requiredKey and requiredValues
         requiredKeyRequiredValue_dict = gismo_osm.requiredTag_dictionary()
         requiredKeyRequiredValue_dict_keys = requiredKeyRequiredValue_dict.keys()
-        for potential_OSMobjectName in requiredKeyRequiredValue_dict_keys:
-            potential_requiredKey, potential_requiredValues = requiredKeyRequiredValue_dict[potential_OSMobjectName]
-            if (requiredKey == potential_requiredKey) and (requiredValues == list(potential_requiredValues)):
-                OSMobjectName = potential_OSMobjectName
-                break
-        else:
-            # "OSMobjectName" can not be found in gismo_osm.requiredTag_dictionary(). Create it from: requiredKey and requiredValues
-            OSMobjectName = "requiredKey=" + requiredKey + "_requiredValues=" + requiredValues[0] + "..."
+        OSMobjectNames = []; requiredKeys = []; requiredValuesLL = []
+        for requiredTagPath in requiredTagsPaths:
+            requiredKeyL, requiredValues = requiredTagsBranches[requiredTagPath]
+            if (requiredKeyL == None) or (len(requiredKeyL) == 0) or (requiredKeyL[0] == None):
+                OSMobjectName = requiredKeys = requiredValuesLL = createFootprints = perform_searchThreeDeeShapes = shapeType = None
+                validInputData = False
+                printMsg = "The data supplied to the \"_requiredTag\" input is not valid.\n" + \
+                           " \n" + \
+                           "Use the \"OSM tag\" component to generate this input. If you would like to search for several required tags at once, merge the \"requiredTag\" outputs of \"OSM tag\" components with Grasshopper's \"Entwine\" component."
+                return OSMobjectName, requiredKeys, requiredValuesLL, createFootprints, perform_searchThreeDeeShapes, shapeType, validInputData, printMsg
+            
+            # deconstruct a required tag to requiredKey, requiredValues
+            requiredKey = requiredKeyL[0]
+            if len(requiredValues) == 0:
+                requiredValues = ["^"]  # returning changed "requiredValues = ["^"]" in "OSM tag" component
+            
+            # try finding "OSMobjectName" if _requiredTag has been generated with already defined requiredKey and requiredValues
+            for potential_OSMobjectName in requiredKeyRequiredValue_dict_keys:
+                potential_requiredKey, potential_requiredValues = requiredKeyRequiredValue_dict[potential_OSMobjectName]
+                if (requiredKey == potential_requiredKey) and (requiredValues == list(potential_requiredValues)):
+                    OSMobjectName = potential_OSMobjectName
+                    break
+            else:
+                # "OSMobjectName" can not be found in gismo_osm.requiredTag_dictionary(). Create it from: requiredKey and requiredValues
+                OSMobjectName = "requiredKey=" + requiredKey + "_requiredValues=" + requiredValues[0] + "..."
+            OSMobjectNames.append(OSMobjectName)
+            requiredKeys.append(requiredKey)
+            requiredValuesLL.append(requiredValues)
+        OSMobjectName = ", ".join(OSMobjectNames)
         del requiredKeyRequiredValue_dict
     #print "OSMobjectName: ", OSMobjectName
-    #print "requiredKey: ", requiredKey
-    #print "requiredValues: ", requiredValues
+    #print "requiredKeys: ", requiredKeys
+    #print "requiredValuesLL: ", requiredValuesLL
     
     
     # check _shapes, _keys, _values inputs
     if (shapes.DataCount == 0):
-        OSMobjectName = requiredKey = requiredValues = createFootprints = perform_searchThreeDeeShapes = shapeType = None
+        OSMobjectName = requiredKeys = requiredValuesLL = createFootprints = perform_searchThreeDeeShapes = shapeType = None
         validInputData = False
         printMsg = "Please connect the \"shapes\" output from Gismo \"OSM shapes\" component to this component's \"_shapes\" input."
-        return OSMobjectName, requiredKey, requiredValues, createFootprints, perform_searchThreeDeeShapes, shapeType, validInputData, printMsg
+        return OSMobjectName, requiredKeys, requiredValuesLL, createFootprints, perform_searchThreeDeeShapes, shapeType, validInputData, printMsg
     
     elif (len(shapes.Branches) == 1) and (shapes.Branches[0][0] == None):
         # this happens when "OSM shapes" component's "_runIt" input is set to "False"
-        OSMobjectName = requiredKey = requiredValues = createFootprints = perform_searchThreeDeeShapes = shapeType = None
+        OSMobjectName = requiredKeys = requiredValuesLL = createFootprints = perform_searchThreeDeeShapes = shapeType = None
         validInputData = False
         printMsg = "There is no data supplied to the \"_shapes\" input.\n" + \
                    " \n" + \
                    "Please connect the \"shapes\" output from Gismo \"OSM shapes\" component to this component's \"_shapes\" input.\n" + \
                    "And make sure that you set the \"OSM shapes\" \"_runIt\" input to \"True\"."
-        return OSMobjectName, requiredKey, requiredValues, createFootprints, perform_searchThreeDeeShapes, shapeType, validInputData, printMsg
+        return OSMobjectName, requiredKeys, requiredValuesLL, createFootprints, perform_searchThreeDeeShapes, shapeType, validInputData, printMsg
     
     
     if (len(keys) == 0):
-        OSMobjectName = requiredKey = requiredValues = createFootprints = perform_searchThreeDeeShapes = shapeType = None
+        OSMobjectName = requiredKeys = requiredValuesLL = createFootprints = perform_searchThreeDeeShapes = shapeType = None
         validInputData = False
         printMsg = "Please connect the \"keys\" output from Gismo \"OSM shapes\" component to this component's \"_keys\" input."
-        return OSMobjectName, requiredKey, requiredValues, createFootprints, perform_searchThreeDeeShapes, shapeType, validInputData, printMsg
+        return OSMobjectName, requiredKeys, requiredValuesLL, createFootprints, perform_searchThreeDeeShapes, shapeType, validInputData, printMsg
     elif (len(keys) == 1) and (keys[0] == None):
         # this happens when "OSM shapes" component's "_runIt" input is set to "False"
-        OSMobjectName = requiredKey = requiredValues = createFootprints = perform_searchThreeDeeShapes = shapeType = None
+        OSMobjectName = requiredKeys = requiredValuesLL = createFootprints = perform_searchThreeDeeShapes = shapeType = None
         validInputData = False
         printMsg = "There is no data supplied to the \"_keys\" input.\n" + \
                    " \n" + \
                    "Please connect the \"keys\" output from Gismo \"OSM shapes\" component to this component's \"_keys\" input.\n" + \
                    "And make sure that you set the \"OSM shapes\" \"_runIt\" input to \"True\"."
-        return OSMobjectName, requiredKey, requiredValues, createFootprints, perform_searchThreeDeeShapes, shapeType, validInputData, printMsg
+        return OSMobjectName, requiredKeys, requiredValuesLL, createFootprints, perform_searchThreeDeeShapes, shapeType, validInputData, printMsg
     
     
     if (values.DataCount == 0):
-        OSMobjectName = requiredKey = requiredValues = createFootprints = perform_searchThreeDeeShapes = shapeType = None
+        OSMobjectName = requiredKeys = requiredValuesLL = createFootprints = perform_searchThreeDeeShapes = shapeType = None
         validInputData = False
         printMsg = "Please connect the \"values\" output from Gismo \"OSM shapes\" component to this component's \"_values\" input."
-        return OSMobjectName, requiredKey, requiredValues, createFootprints, perform_searchThreeDeeShapes, shapeType, validInputData, printMsg
+        return OSMobjectName, requiredKeys, requiredValuesLL, createFootprints, perform_searchThreeDeeShapes, shapeType, validInputData, printMsg
     
     elif (len(values.Branches) == 1) and (values.Branches[0][0] == None):
         # this happens when "OSM shapes" component's "_runIt" input is set to "False"
-        OSMobjectName = requiredKey = requiredValues = createFootprints = perform_searchThreeDeeShapes = shapeType = None
+        OSMobjectName = requiredKeys = requiredValuesLL = createFootprints = perform_searchThreeDeeShapes = shapeType = None
         validInputData = False
         printMsg = "There is no data supplied to the \"_values\" input.\n" + \
                    " \n" + \
                    "Please connect the \"values\" output from Gismo \"OSM shapes\" component to this component's \"_values\" input.\n" + \
                    "And make sure that you set the \"OSM shapes\" \"_runIt\" input to \"True\"."
-        return OSMobjectName, requiredKey, requiredValues, createFootprints, perform_searchThreeDeeShapes, shapeType, validInputData, printMsg
+        return OSMobjectName, requiredKeys, requiredValuesLL, createFootprints, perform_searchThreeDeeShapes, shapeType, validInputData, printMsg
     
     
     if len(shapes.Paths) != len(values.Paths):
-        OSMobjectName = requiredKey = requiredValues = createFootprints = perform_searchThreeDeeShapes = shapeType = None
+        OSMobjectName = requiredKeys = requiredValuesLL = createFootprints = perform_searchThreeDeeShapes = shapeType = None
         validInputData = False
         printMsg = "The number of tree branches inputted to the \"_shapes\" and \"_values\" inputs do not match.\n" + \
                    " \n" + \
                    "Make sure that you connected:\n" + \
                    "\"shapes\" output from Gismo \"OSM shapes\" component to this component's \"_shapes\" input. And:\n" + \
                    "\"values\" output from Gismo \"OSM shapes\" component to this component's \"_values\" input."
-        return OSMobjectName, requiredKey, requiredValues, createFootprints, perform_searchThreeDeeShapes, shapeType, validInputData, printMsg
+        return OSMobjectName, requiredKeys, requiredValuesLL, createFootprints, perform_searchThreeDeeShapes, shapeType, validInputData, printMsg
     
     
     
@@ -201,39 +231,39 @@ def checkInputData(requiredTag, shapes, keys, values, threeDeeShapes, threeDeeVa
     
     if (len(threeDeeShapes.Branches) == 1) and (threeDeeShapes.Branches[0][0] == None):
         # this happens when "OSM shapes" component's "_runIt" input is set to "False"
-        OSMobjectName = requiredKey = requiredValues = createFootprints = perform_searchThreeDeeShapes = shapeType = None
+        OSMobjectName = requiredKeys = requiredValuesLL = createFootprints = perform_searchThreeDeeShapes = shapeType = None
         validInputData = False
         printMsg = "There is no data supplied to the \"_threeDeeShapes\" input.\n" + \
                    " \n" + \
                    "Please connect the \"threeDeeShapes\" output from Gismo \"OSM 3D\" component to this component's \"_threeDeeShapes\" input.\n" + \
                    "And make sure that you set the \"OSM 3D\" \"_runIt\" input to \"True\"."
-        return OSMobjectName, requiredKey, requiredValues, createFootprints, perform_searchThreeDeeShapes, shapeType, validInputData, printMsg
+        return OSMobjectName, requiredKeys, requiredValuesLL, createFootprints, perform_searchThreeDeeShapes, shapeType, validInputData, printMsg
     elif (threeDeeShapes.DataCount != 0):
         validThreeDeeShapes = True
     
     
     if (len(threeDeeValues.Branches) == 1) and (threeDeeValues.Branches[0][0] == None):
         # this happens when "OSM shapes" component's "_runIt" input is set to "False"
-        OSMobjectName = requiredKey = requiredValues = createFootprints = perform_searchThreeDeeShapes = shapeType = None
+        OSMobjectName = requiredKeys = requiredValuesLL = createFootprints = perform_searchThreeDeeShapes = shapeType = None
         validInputData = False
         printMsg = "There is no data supplied to the \"_threeDeeValues\" input.\n" + \
                    " \n" + \
                    "Please connect the \"threeDeeValues\" output from Gismo \"OSM 3D\" component to this component's \"_threeDeeValues\" input.\n" + \
                    "And make sure that you set the \"OSM 3D\" \"_runIt\" input to \"True\"."
-        return OSMobjectName, requiredKey, requiredValues, createFootprints, perform_searchThreeDeeShapes, shapeType, validInputData, printMsg
+        return OSMobjectName, requiredKeys, requiredValuesLL, createFootprints, perform_searchThreeDeeShapes, shapeType, validInputData, printMsg
     elif (threeDeeValues.DataCount != 0):
         validThreeDeeValues = True
     
     
     if len(threeDeeShapes.Paths) != len(threeDeeValues.Paths):
-        OSMobjectName = requiredKey = requiredValues = createFootprints = perform_searchThreeDeeShapes = shapeType = None
+        OSMobjectName = requiredKeys = requiredValuesLL = createFootprints = perform_searchThreeDeeShapes = shapeType = None
         validInputData = False
         printMsg = "The number of tree branches inputted to the \"threeDeeShapes_\" and \"threeDeeValues_\" inputs do not match.\n" + \
                    " \n" + \
                    "Make sure that you connected:\n" + \
                    "\"threeDeeShapes\" output from Gismo \"OSM 3D\" component to this component's \"threeDeeShapes_\" input. And:\n" + \
                    "\"threeDeeValues\" output from Gismo \"OSM 3D\" component to this component's \"threeDeeValues_\" input."
-        return OSMobjectName, requiredKey, requiredValues, createFootprints, perform_searchThreeDeeShapes, shapeType, validInputData, printMsg
+        return OSMobjectName, requiredKeys, requiredValuesLL, createFootprints, perform_searchThreeDeeShapes, shapeType, validInputData, printMsg
     else:
         valid_threeDeeShapes_vs_threeDeeValues = True
     
@@ -248,13 +278,13 @@ def checkInputData(requiredTag, shapes, keys, values, threeDeeShapes, threeDeeVa
     # check the "shapeType_" input value set in the "OSM shapes" component.
     shapeType = gismo_preparation.checkShapeType(shapes.Branches)
     if (perform_searchThreeDeeShapes == True)  and  ((shapeType == 1) or (shapeType == 2)):
-        OSMobjectName = requiredKey = requiredValues = createFootprints = perform_searchThreeDeeShapes = shapeType = None
+        OSMobjectName = requiredKeys = requiredValuesLL = createFootprints = perform_searchThreeDeeShapes = shapeType = None
         validInputData = False
         printMsg = "This component can be used to find only 3D shapes for \"shapeType_ == 0\" set in \"OSM shapes\" component.\n" + \
                    " \n" + \
                    "For any other \"shapeType_\" value (1 and 2), just unplug the data from the \"threeDeeShapes_\" and \"threeDeeValues_\" inputs of this component.\n" + \
                    "In this way, 2D shapes will be successfully searched."
-        return OSMobjectName, requiredKey, requiredValues, createFootprints, perform_searchThreeDeeShapes, shapeType, validInputData, printMsg
+        return OSMobjectName, requiredKeys, requiredValuesLL, createFootprints, perform_searchThreeDeeShapes, shapeType, validInputData, printMsg
     elif (perform_searchThreeDeeShapes == True)  and  (shapeType == 0):
         # everything is ok, as this component can be used to find only 3d shapes for shapeType == 0, which currently is the case.
         pass
@@ -264,13 +294,12 @@ def checkInputData(requiredTag, shapes, keys, values, threeDeeShapes, threeDeeVa
     validInputData = True
     printMsg = "ok"
     
-    return OSMobjectName, requiredKey, requiredValues, createFootprints, perform_searchThreeDeeShapes, shapeType, validInputData, printMsg
+    return OSMobjectName, requiredKeys, requiredValuesLL, createFootprints, perform_searchThreeDeeShapes, shapeType, validInputData, printMsg
 
 
-def searchShapes(OSMobjectName, requiredKey, requiredValues, shapesDataTree, keys, valuesDataTree, threeDeeShapesDataTree, threeDeeValuesDataTree, createFootprints, groundTerrain, shapeType, perform_searchThreeDeeShapes):
+def terrainSetup(groundTerrain):
     
     tol = Rhino.RhinoDoc.ActiveDoc.ModelAbsoluteTolerance
-    projectionDirection = Rhino.Geometry.Vector3d(0,0,1)  # it can be projectionDirection = Rhino.Geometry.Vector3d(0,0,-1) as well, does not matter
     
     if groundTerrain:
         # something inputted to the "groundTerrain_"
@@ -297,10 +326,33 @@ def searchShapes(OSMobjectName, requiredKey, requiredValues, shapesDataTree, key
         extrudeVector = Rhino.Geometry.Vector3d(0,0,bb_height)
         groundTerrain_outerEdge_extrusion = Rhino.Geometry.Surface.CreateExtrusion(groundTerrain_outterEdge, extrudeVector).ToBrep()
         
+        # 2d outline polygon of the groundTerrain_, for cheap classification of the footprints against it
+        success, groundTerrain_outterEdge_polyline = groundTerrain_outterEdge.TryGetPolyline()
+        if not success:
+            # circular groundTerrain_
+            groundTerrain_outterEdge_polylineCurve = groundTerrain_outterEdge.ToPolyline(0, 0, 0.05, 0, 0, tol, 0, 0, True)
+            if groundTerrain_outterEdge_polylineCurve != None:
+                groundTerrain_outterEdge_polyline = groundTerrain_outterEdge_polylineCurve.ToPolyline()
+            else:
+                groundTerrain_outterEdge_polyline = []
+        groundTerrain_outlinePts = [(pt.X, pt.Y)  for pt in groundTerrain_outterEdge_polyline]
+        if (len(groundTerrain_outlinePts) > 1) and (groundTerrain_outlinePts[0] == groundTerrain_outlinePts[-1]):
+            groundTerrain_outlinePts.pop()  # closed polyline repeats its first point
+        if len(groundTerrain_outlinePts) >= 3:
+            groundTerrain_outlineIndex = gismo_createGeometry.outlineIndex(groundTerrain_outlinePts)
+        else:
+            # the outline polygon could not be created. All footprints will be split with the groundTerrain_
+            groundTerrain_outlineIndex = None
+        
+        # terrain heights for draping the footprints which are inside of the groundTerrain_ outline
+        terrainSampler = sc.sticky["gismo_TerrainSampler"](groundBrep_singleBrepFace)
         
     else:
         # nothing inputted to the "groundTerrain_"
         groundBrep_singleBrepFace = None
+        groundTerrain_outerEdge_extrusion = None
+        groundTerrain_outlineIndex = None
+        terrainSampler = None
         shapeExtrudeHeight = None  # dummy value
         bb_height = 30  # dummy value
     
@@ -322,11 +374,193 @@ def searchShapes(OSMobjectName, requiredKey, requiredValues, shapesDataTree, key
         # groundTerrain_ inputted from Ladybug "Terrain Generator"
         liftingOSMshapesHeight = 8848  # dummy (high) value
     
+    return groundBrep_singleBrepFace, groundTerrain_outerEdge_extrusion, groundTerrain_outlineIndex, terrainSampler, bb_height, liftingOSMshapesHeight
+
+
+def footprintClassification(shapesL, groundTerrain_outlineIndex):
+    # 1 if the footprint (shapesL: outer polygon and its holes) is inside of the groundTerrain_ outline, -1 if it is outside, 0 if it crosses the outline or if this can not be determined
+    if (groundTerrain_outlineIndex == None):
+        return 0
+    
+    polygonsPtsL = []
+    for shape in shapesL:
+        success, polyline = shape.TryGetPolyline()
+        if (not success) or (polyline.Count < 3):
+            return 0
+        polygonPts = [(pt.X, pt.Y)  for pt in polyline]
+        if (polygonPts[0] == polygonPts[-1]):
+            polygonPts.pop()  # closed polyline repeats its first point
+        polygonsPtsL.append(polygonPts)
+    
+    return gismo_createGeometry.classifyPolygonAgainstOutline(polygonsPtsL, groundTerrain_outlineIndex)
+
+
+def classifyShapes(shapesL, valuesL, createFootprints, shapeType, groundBrep_singleBrepFace, groundTerrain_outerEdge_extrusion, groundTerrain_outlineIndex, terrainSampler, bb_height, liftingOSMshapesHeight):
+    
+    tol = Rhino.RhinoDoc.ActiveDoc.ModelAbsoluteTolerance
+    projectionDirection = Rhino.Geometry.Vector3d(0,0,1)  # it can be projectionDirection = Rhino.Geometry.Vector3d(0,0,-1) as well, does not matter
+    
+    if (len(shapesL) == 0):
+        # for some unknown reason "shapesL" is empty
+        foundShapesL = []
+        values = []
+        foundShapeOrNotL = [False]
+    elif (len(shapesL) > 0):
+        # set "values" and "foundShapeOrNotL" at the very start. Now find the "foundShapesL"
+        values = valuesL
+        foundShapeOrNotL = [True]
+    
+    
+    if (shapeType == 2):
+        # 1) shapeType_ == 2
+        if (groundBrep_singleBrepFace == None):
+            # 1) NOTHING inputted into "terrainGround_"
+            foundShapesL = shapesL
+        elif (groundBrep_singleBrepFace != None):
+            # b) terrain inputted into "terrainGround_"
+            shapesL_point3d = [shapesL[0].Location]  # converting the "Point" to "Point3d" type
+            foundShapesL = Rhino.Geometry.Intersect.Intersection.ProjectPointsToBreps([groundBrep_singleBrepFace], shapesL_point3d, projectionDirection, tol)  # foundShapesL will be empty is a point is out of the groundTerrain_ boundaries
+    
+    
+    elif (shapeType != 2):
+        # 2) shapeType_ == 0 or 1
+        if (groundBrep_singleBrepFace == None):
+            # a) NOTHING inputted into "terrainGround_"
+            if (createFootprints == False):
+                foundShapesL = shapesL
+            elif (createFootprints == True):
+                try:
+                    # closed shapesL (shapeType == 0)
+                    foundShapesL = [Rhino.Geometry.Brep.CreatePlanarBreps(shapesL)[0]]
+                except:
+                    # opened shapesL (shapeType == 1)
+                    foundShapesL = shapesL
+        
+        elif (groundBrep_singleBrepFace != None):
+            # b) terrain inputted into "terrainGround_"
+            if (createFootprints == False):
+                projectedShapesL = Rhino.Geometry.Curve.ProjectToBrep(shapesL, [groundBrep_singleBrepFace], projectionDirection, 0.01)
+                if len(projectedShapesL) > 0:
+                    foundShapesL = projectedShapesL
+                else:
+                    foundShapesL = []
+                    values = []
+                    foundShapeOrNotL = [False]
+            
+            elif (createFootprints == True):
+                if (not shapesL[0].IsClosed):  # it is assumed that all shapes in "shapesL" are closed or open
+                    # the shapesL[0] is not closed (this will happen with shapeType == 1)
+                    projectedShapesL = Rhino.Geometry.Curve.ProjectToBrep(shapesL, [groundBrep_singleBrepFace], projectionDirection, 0.01)
+                    if len(projectedShapesL) > 0:
+                        foundShapesL = projectedShapesL
+                    elif len(projectedShapesL) == 0:
+                        # shapesL is outside of groundTerrain_ bounding box
+                        foundShapesL = []
+                        values = []
+                        foundShapeOrNotL = [False]
+                
+                elif (shapesL[0].IsClosed):
+                    # cheap 2d classification of the footprint against the groundTerrain_ outline. The footprints inside of the outline are draped onto the groundTerrain_, and the brep split is needed only for the ones crossing it
+                    classification = footprintClassification(shapesL, groundTerrain_outlineIndex)
+                    if (classification == -1):
+                        # the footprint is outside of groundTerrain_ outline
+                        foundShapesL = []
+                        values = []
+                        foundShapeOrNotL = [False]
+                    
+                    else:
+                        if (classification == 1):
+                            # the footprint is inside of groundTerrain_ outline: drape it onto the terrain directly, without splitting the groundTerrain_ with it
+                            drapedFootprint = terrainSampler.drapeFootprint(shapesL)
+                        else:
+                            drapedFootprint = None
+                        
+                        if (drapedFootprint != None):
+                            foundShapesL = [drapedFootprint]
+                        
+                        else:
+                            # the footprint crosses the groundTerrain_ outline (or it could not be draped): split the groundTerrain_ with it
+                            # move _shapes above so that intersection with groundTerrain_ is fullfiled successfully. Moved copies are used, as the same shapes may be classified for more required tags
+                            moveMatrix = Rhino.Geometry.Transform.Translation(0,0,liftingOSMshapesHeight)
+                            shapesL = [shape.Duplicate()  for shape in shapesL]
+                            for shapeIndex, shape in enumerate(shapesL):
+                                shape.Transform(moveMatrix)
+                            
+                            planarBrep = Rhino.Geometry.Brep.CreatePlanarBreps(shapesL)[0]
+                            shapeStartPt = shapesL[0].PointAtStart  # if there are more shapes in shapesL, they will all have the same Z coordinates (on the same height)
+                            extrudePathCurve = Rhino.Geometry.Line(shapeStartPt, Rhino.Geometry.Point3d(shapeStartPt.X, shapeStartPt.Y, shapeStartPt.Z - (liftingOSMshapesHeight+(2 * bb_height)) )).ToNurbsCurve()
+                            cap = True
+                            extrudedShapeBrep = planarBrep.Faces[0].CreateExtrusion(extrudePathCurve, cap)
+                            splittedBreps = Rhino.Geometry.Brep.Split(groundBrep_singleBrepFace, extrudedShapeBrep, tol)
+                            
+                            if len(splittedBreps) > 0:
+                                # the shapesL are inside of groundTerrain_ bounding box (a) or the interesect with it (b)
+                                # determine which one of these two is the case
+                                if (classification == 1):
+                                    # already known from the 2d classification
+                                    intersectCrvs = []
+                                else:
+                                    intersectionYes, intersectCrvs, intersectPts = Rhino.Geometry.Intersect.Intersection.BrepBrep(groundTerrain_outerEdge_extrusion, extrudedShapeBrep, tol)
+                            
+                                if (len(intersectCrvs) > 0):
+                                    # shapeL planar srf intersects with groundTerrrain_
+                                    foundShapesL = [splittedBreps[0]]
+                                    foundShapesL[0].Faces.ShrinkFaces()  # shrink the cutted foundShapesL
+                                elif (len(intersectCrvs) == 0):
+                                    # shapeL planar srf is inside groundTerrain_ and does not intersect it
+                                    foundShapesL = [splittedBreps[len(splittedBreps)-1]]
+                                    foundShapesL[0].Faces.ShrinkFaces()  # shrink the cutted foundShapesL
+                            
+                            else:
+                                # shapesL is outside of groundTerrain_ bounding box
+                                foundShapesL = []
+                                values = []
+                                foundShapeOrNotL = [False]
+                            
+                            del splittedBreps
+                            del extrudedShapeBrep
+    
+    return foundShapesL, values, foundShapeOrNotL
+
+
+def queryPath(queryIndex, path, numberOfQueries):
+    # for several required tags, the path of each found shape is prefixed with the index of its required tag
+    if (numberOfQueries == 1):
+        return path
+    else:
+        return Grasshopper.Kernel.Data.GH_Path(System.Array[int]([queryIndex] + list(path.Indices)))
+
+
+def upperFaceCentroid(threeDeeShape):
+    # centroid of the upper face of a 3d shape: brep from "OSM 3D" component, or a mesh (if its "buildingsAsMeshes_" input is set to True)
+    if isinstance(threeDeeShape, Rhino.Geometry.Mesh):
+        # the roof of a building mesh consists of its upper vertices
+        vertices = threeDeeShape.Vertices.ToPoint3dArray()
+        tol = Rhino.RhinoDoc.ActiveDoc.ModelAbsoluteTolerance
+        maxZ = max(vertex.Z for vertex in vertices)
+        upperVertices = [vertex for vertex in vertices if (maxZ - vertex.Z) <= tol]
+        centroid = Rhino.Geometry.Point3d(sum(vertex.X for vertex in upperVertices) / len(upperVertices), sum(vertex.Y for vertex in upperVertices) / len(upperVertices), maxZ)
+        del vertices; del upperVertices
+    else:
+        upperFace = threeDeeShape.Faces[0]
+        centroid = Rhino.Geometry.AreaMassProperties.Compute(upperFace).Centroid
+    
+    return centroid
+
+
+def searchShapes(OSMobjectName, requiredKeys, requiredValuesLL, shapesDataTree, keys, valuesDataTree, threeDeeShapesDataTree, threeDeeValuesDataTree, createFootprints, groundTerrain, shapeType, perform_searchThreeDeeShapes):
+    
+    tol = Rhino.RhinoDoc.ActiveDoc.ModelAbsoluteTolerance
+    projectionDirection = Rhino.Geometry.Vector3d(0,0,1)  # it can be projectionDirection = Rhino.Geometry.Vector3d(0,0,-1) as well, does not matter
+    
+    # the groundTerrain_ edges, extrusion, bounding box and terrain sampler are created only once for all required tags
+    groundBrep_singleBrepFace, groundTerrain_outerEdge_extrusion, groundTerrain_outlineIndex, terrainSampler, bb_height, liftingOSMshapesHeight = terrainSetup(groundTerrain)
+    
     
     if (shapeType == 0):
-        # shift the paths in "shapes" and "values" data trees by -1, to create closed surfaces with holes
-        shapes_shiftedPaths_DataTree = gismo_preparation.datatree_shiftPaths(shapesDataTree)
-        values_shiftedPaths_DataTree = gismo_preparation.datatree_shiftPaths(valuesDataTree)
+        # shift the paths in "shapes" and "values" data trees by -1 (without copying their branches), to create closed surfaces with holes
+        shapes_shiftedPaths_DataTree = gismo_preparation.datatree_shiftPathsView(shapesDataTree)
+        values_shiftedPaths_DataTree = gismo_preparation.datatree_shiftPathsView(valuesDataTree)
     elif (shapeType != 0):
         # no shifting of paths should be done for shapeType == 1,2
         shapes_shiftedPaths_DataTree = shapesDataTree
@@ -336,141 +570,46 @@ def searchShapes(OSMobjectName, requiredKey, requiredValues, shapesDataTree, key
     shapes_shiftedPaths_LL = shapes_shiftedPaths_DataTree.Branches
     values_shiftedPaths_LL = values_shiftedPaths_DataTree.Branches
     
-    foundShapes_flattened = []
-    foundShapesDataTree = Grasshopper.DataTree[object]()
-    foundValuesDataTree = Grasshopper.DataTree[object]()
-    foundShapeOrNotDataTree = Grasshopper.DataTree[object]()
-    paths = shapes_shiftedPaths_DataTree.Paths
+    # indices of shapes with each of the "_requiredTag" tags, looked up in the inverted tag index instead of searching each shape's keys
+    valuesInputParam = [param  for param in ghenv.Component.Params.Input  if (param.NickName == "_values")][0]
+    tagIndex = gismo_osm.shapesTagIndex(keys, valuesDataTree, valuesInputParam)
+    foundShapesIndicesL = [tagIndex.shapesIndices(requiredKey, requiredValues)  for requiredKey, requiredValues in zip(requiredKeys, requiredValuesLL)]
+    numberOfQueries = len(foundShapesIndicesL)
     
+    # a single pass through all shapes: each shape is classified against the groundTerrain_ only once, even if it has more than one of the required tags
+    foundBranchesLL = [[]  for queryIndex in xrange(numberOfQueries)]  # per each required tag: (path, foundShapesL, values, foundShapeOrNotL) for each branch
+    foundShapes_flattenedLL = [[]  for queryIndex in xrange(numberOfQueries)]  # for 3D foundShapes only
     for branchIndex,shapesL in enumerate(shapes_shiftedPaths_LL):
+        path = shapes_shiftedPaths_Paths[branchIndex]
         if len(shapesL) == 0:
             # some shape may have been removed with the "OSM ids" component
-            foundShapesL = []
-            values = []
-            foundShapeOrNotL = [False]
+            foundQueryIndices = []
         else:
-            value = ""  # dummy value in case requiredKey or requiredValues does not exist
-            foundShapesSwitch = False  # initial value
-            for keyIndex,key in enumerate(keys):
-                if (key == requiredKey):
-                    value = values_shiftedPaths_LL[branchIndex][keyIndex]
-                    break  # if requiredKey is found, stop iterrating through other keys for that shapesL
-            
-            if (value in requiredValues) and (value != ""):
-                foundShapesSwitch = True
-            #elif (key == requiredKey) and (requiredValues == "^") and (value != ""):
-            elif (key == requiredKey) and (requiredValues == ["^"]) and (value != ""):
-                foundShapesSwitch = True
-            
-            if foundShapesSwitch == True:
-                if (len(shapesL) == 0):
-                    # for some unknown reason "shapesL" is empty
-                    foundShapesL = []
-                    values = []
-                    foundShapeOrNotL = [False]
-                elif (len(shapesL) > 0):
-                    # set "values" and "foundShapeOrNotL" at the very start. Now find the "foundShapesL"
-                    values = values_shiftedPaths_LL[branchIndex]
-                    foundShapeOrNotL = [True]
-                
-                
-                if (shapeType == 2):
-                    # 1) shapeType_ == 2
-                    if (groundBrep_singleBrepFace == None):
-                        # 1) NOTHING inputted into "terrainGround_"
-                        foundShapesL = shapesL
-                    elif (groundBrep_singleBrepFace != None):
-                        # b) terrain inputted into "terrainGround_"
-                        shapesL_point3d = [shapesL[0].Location]  # converting the "Point" to "Point3d" type
-                        foundShapesL = Rhino.Geometry.Intersect.Intersection.ProjectPointsToBreps([groundBrep_singleBrepFace], shapesL_point3d, projectionDirection, tol)  # foundShapesL will be empty is a point is out of the groundTerrain_ boundaries
-                
-                
-                elif (shapeType != 2):
-                    # 2) shapeType_ == 0 or 1
-                    if (groundBrep_singleBrepFace == None):
-                        # a) NOTHING inputted into "terrainGround_"
-                        if (createFootprints == False):
-                            foundShapesL = shapesL
-                        elif (createFootprints == True):
-                            try:
-                                # closed shapesL (shapeType == 0)
-                                foundShapesL = [Rhino.Geometry.Brep.CreatePlanarBreps(shapesL)[0]]
-                            except:
-                                # opened shapesL (shapeType == 1)
-                                foundShapesL = shapesL
-                    
-                    elif (groundBrep_singleBrepFace != None):
-                        # b) terrain inputted into "terrainGround_"
-                        if (createFootprints == False):
-                            projectedShapesL = Rhino.Geometry.Curve.ProjectToBrep(shapesL, [groundBrep_singleBrepFace], projectionDirection, 0.01)
-                            if len(projectedShapesL) > 0:
-                                foundShapesL = projectedShapesL
-                            else:
-                                foundShapesL = []
-                                values = []
-                                foundShapeOrNotL = [False]
-                        
-                        elif (createFootprints == True):
-                            if (not shapesL[0].IsClosed):  # it is assumed that all shapes in "shapesL" are closed or open
-                                # the shapesL[0] is not closed (this will happen with shapeType == 1)
-                                projectedShapesL = Rhino.Geometry.Curve.ProjectToBrep(shapesL, [groundBrep_singleBrepFace], projectionDirection, 0.01)
-                                if len(projectedShapesL) > 0:
-                                    foundShapesL = projectedShapesL
-                                elif len(projectedShapesL) == 0:
-                                    # shapesL is outside of groundTerrain_ bounding box
-                                    foundShapesL = []
-                                    values = []
-                                    foundShapeOrNotL = [False]
-                            
-                            elif (shapesL[0].IsClosed):
-                                # move _shapes above so that intersection with groundTerrain_ is fullfiled successfully
-                                moveMatrix = Rhino.Geometry.Transform.Translation(0,0,liftingOSMshapesHeight)
-                                for shapeIndex, shape in enumerate(shapesL):
-                                    shape.Transform(moveMatrix)
-                                
-                                planarBrep = Rhino.Geometry.Brep.CreatePlanarBreps(shapesL)[0]
-                                shapeStartPt = shapesL[0].PointAtStart  # if there are more shapes in shapesL, they will all have the same Z coordinates (on the same height)
-                                extrudePathCurve = Rhino.Geometry.Line(shapeStartPt, Rhino.Geometry.Point3d(shapeStartPt.X, shapeStartPt.Y, shapeStartPt.Z - (liftingOSMshapesHeight+(2 * bb_height)) )).ToNurbsCurve()
-                                cap = True
-                                extrudedShapeBrep = planarBrep.Faces[0].CreateExtrusion(extrudePathCurve, cap)
-                                splittedBreps = Rhino.Geometry.Brep.Split(groundBrep_singleBrepFace, extrudedShapeBrep, tol)
-                                
-                                if len(splittedBreps) > 0:
-                                    # the shapesL are inside of groundTerrain_ bounding box (a) or the interesect with it (b)
-                                    # determine which one of these two is the case
-                                    intersectionYes, intersectCrvs, intersectPts = Rhino.Geometry.Intersect.Intersection.BrepBrep(groundTerrain_outerEdge_extrusion, extrudedShapeBrep, tol)
-                                    
-                                    if (len(intersectCrvs) > 0):
-                                        # shapeL planar srf intersects with groundTerrrain_
-                                        foundShapesL = [splittedBreps[0]]
-                                        foundShapesL[0].Faces.ShrinkFaces()  # shrink the cutted foundShapesL
-                                    elif (len(intersectCrvs) == 0):
-                                        # shapeL planar srf is inside groundTerrain_ and does not intersect it
-                                        foundShapesL = [splittedBreps[len(splittedBreps)-1]]
-                                        foundShapesL[0].Faces.ShrinkFaces()  # shrink the cutted foundShapesL
-                                    
-                                else:
-                                    # shapesL is outside of groundTerrain_ bounding box
-                                    foundShapesL = []
-                                    values = []
-                                    foundShapeOrNotL = [False]
-                                
-                                del splittedBreps
-                                del extrudedShapeBrep
-            
-            
+            shapeIndex = path[0]  # the first path index is the shape index
+            foundQueryIndices = [queryIndex  for queryIndex, foundShapesIndices in enumerate(foundShapesIndicesL)  if (shapeIndex in foundShapesIndices)]
+        
+        if (len(foundQueryIndices) > 0):
+            foundShapesL, values, foundShapeOrNotL = classifyShapes(shapesL, values_shiftedPaths_LL[branchIndex], createFootprints, shapeType, groundBrep_singleBrepFace, groundTerrain_outerEdge_extrusion, groundTerrain_outlineIndex, terrainSampler, bb_height, liftingOSMshapesHeight)
+        
+        for queryIndex in xrange(numberOfQueries):
+            if queryIndex in foundQueryIndices:
+                if (len(foundShapesL) != 0):
+                    foundShapes_flattenedLL[queryIndex].extend(foundShapesL)
+                foundBranchesLL[queryIndex].append((path, foundShapesL, values, foundShapeOrNotL))
             else:
                 # the required value is not found. There for the OSM object sought through "_requiredTag" is not found. Try changing the "shapeType_" at "OSM shapes" component
-                foundShapesL = []
-                values = []
-                foundShapeOrNotL = [False]
-        
-        if (len(foundShapesL) != 0):
-            foundShapes_flattened.extend(foundShapesL)  # for 3D foundShapes only
-        foundShapesDataTree.AddRange(foundShapesL, shapes_shiftedPaths_Paths[branchIndex])
-        foundValuesDataTree.AddRange(values, shapes_shiftedPaths_Paths[branchIndex])
-        foundShapeOrNotDataTree.AddRange(foundShapeOrNotL, shapes_shiftedPaths_Paths[branchIndex])
+                foundBranchesLL[queryIndex].append((path, [], [], [False]))
     
+    foundShapesDataTree = Grasshopper.DataTree[object]()
+    foundValuesDataTree = Grasshopper.DataTree[object]()
+    foundShapeOrNotDataTree = Grasshopper.DataTree[object]()
+    for queryIndex, foundBranchesL in enumerate(foundBranchesLL):
+        for path, foundShapesL, values, foundShapeOrNotL in foundBranchesL:
+            foundPath = queryPath(queryIndex, path, numberOfQueries)
+            foundShapesDataTree.AddRange(foundShapesL, foundPath)
+            foundValuesDataTree.AddRange(values, foundPath)
+            foundShapeOrNotDataTree.AddRange(foundShapeOrNotL, foundPath)
+    del foundBranchesLL
     
     
     # 3D (foundThreeDeeShapesDataTree, foundThreeDeeValuesDataTree, foundThreeDeeShapeOrNotDataTree if "threeDeeShapes_" and "threeDeeValues_" are inputted)
@@ -481,42 +620,50 @@ def searchShapes(OSMobjectName, requiredKey, requiredValues, shapesDataTree, key
         threeDeeShapes_LL = threeDeeShapesDataTree.Branches
         threeDeeValues_LL = threeDeeValuesDataTree.Branches
         threeDeePaths = threeDeeShapesDataTree.Paths
+        foundThreeDeeBranchesLL = [[]  for queryIndex in xrange(numberOfQueries)]
         for branchIndex,threeDeeShapesL in enumerate(threeDeeShapes_LL):
             if (len(threeDeeShapesL) != 0):
-                upperFace = threeDeeShapesL[0].Faces[0]
-                upperFaceCentroid = Rhino.Geometry.AreaMassProperties.Compute(upperFace).Centroid
-                for foundShape in foundShapes_flattened:
-                    upperFaceCentroid_projected = Rhino.Geometry.Intersect.Intersection.ProjectPointsToBreps([foundShape], [upperFaceCentroid], projectionDirection, tol)
-                    if len(upperFaceCentroid_projected) == 0:
-                        continue
+                upperFaceCentroid_ = upperFaceCentroid(threeDeeShapesL[0])  # the same for all required tags
+            
+            for queryIndex in xrange(numberOfQueries):
+                if (len(threeDeeShapesL) != 0):
+                    for foundShape in foundShapes_flattenedLL[queryIndex]:
+                        if isinstance(foundShape, Rhino.Geometry.Mesh):
+                            # footprint draped onto the groundTerrain_
+                            upperFaceCentroid_projected = Rhino.Geometry.Intersect.Intersection.ProjectPointsToMeshes([foundShape], [upperFaceCentroid_], projectionDirection, tol)
+                        else:
+                            upperFaceCentroid_projected = Rhino.Geometry.Intersect.Intersection.ProjectPointsToBreps([foundShape], [upperFaceCentroid_], projectionDirection, tol)
+                        if (upperFaceCentroid_projected == None) or (len(upperFaceCentroid_projected) == 0):
+                            continue
+                        else:
+                            foundThreeDeeShapesL = threeDeeShapesL
+                            foundThreeDeeValuesL = threeDeeValues_LL[branchIndex]
+                            foundThreeDeeShapeOrNotL = [True]
+                            break
                     else:
-                        foundThreeDeeShapesL = threeDeeShapesL
-                        foundThreeDeeValuesL = threeDeeValues_LL[branchIndex]
-                        foundThreeDeeShapeOrNotL = [True]
-                        break
+                        foundThreeDeeShapesL = []
+                        foundThreeDeeValuesL = []
+                        foundThreeDeeShapeOrNotL = [False]
                 else:
+                    # the 3d shape was not created from some particular shape
                     foundThreeDeeShapesL = []
                     foundThreeDeeValuesL = []
                     foundThreeDeeShapeOrNotL = [False]
-            else:
-                # the 3d shape was not created from some particular shape
-                foundThreeDeeShapesL = []
-                foundThreeDeeValuesL = []
-                foundThreeDeeShapeOrNotL = [False]
-            
-            foundThreeDeeShapesDataTree.AddRange(foundThreeDeeShapesL, threeDeePaths[branchIndex])
-            foundThreeDeeValuesDataTree.AddRange(foundThreeDeeValuesL, threeDeePaths[branchIndex])
-            foundThreeDeeShapeOrNotDataTree.AddRange(foundThreeDeeShapeOrNotL, threeDeePaths[branchIndex])
+                
+                foundThreeDeeBranchesLL[queryIndex].append((threeDeePaths[branchIndex], foundThreeDeeShapesL, foundThreeDeeValuesL, foundThreeDeeShapeOrNotL))
+        
+        for queryIndex, foundThreeDeeBranchesL in enumerate(foundThreeDeeBranchesLL):
+            for path, foundThreeDeeShapesL, foundThreeDeeValuesL, foundThreeDeeShapeOrNotL in foundThreeDeeBranchesL:
+                foundPath = queryPath(queryIndex, path, numberOfQueries)
+                foundThreeDeeShapesDataTree.AddRange(foundThreeDeeShapesL, foundPath)
+                foundThreeDeeValuesDataTree.AddRange(foundThreeDeeValuesL, foundPath)
+                foundThreeDeeShapeOrNotDataTree.AddRange(foundThreeDeeShapeOrNotL, foundPath)
+        del foundThreeDeeBranchesLL
     
     
     # deleting
-    del shapesDataTree; del shapes_shiftedPaths_Paths; del shapes_shiftedPaths_LL; del valuesDataTree; del values_shiftedPaths_LL; del keys  # delete local variables
-    
-    try:
-        # terrainGround_ has been inputted
-        del groundTerrain_outerEdge_extrusion
-    except:
-        pass
+    del shapesDataTree; del shapes_shiftedPaths_Paths; del shapes_shiftedPaths_LL; del valuesDataTree; del values_shiftedPaths_LL; del keys; del foundShapesIndicesL; del foundShapes_flattenedLL  # delete local variables
+    del groundTerrain_outerEdge_extrusion; del groundTerrain_outlineIndex; del terrainSampler
     gc.collect()
     
     
@@ -545,7 +692,7 @@ def searchShapes(OSMobjectName, requiredKey, requiredValues, shapesDataTree, key
         return foundShapesDataTree, foundValuesDataTree, foundShapeOrNotDataTree, OSMobjectName, validInputs, printMsg
 
 
-def titleAndBaking(OSMobjectName, foundShapesDataTree, shapeType):
+def titleAndBaking(OSMobjectName, foundShapesDataTree, shapeType, numberOfQueries):
     
     # title
     
@@ -564,7 +711,7 @@ def titleAndBaking(OSMobjectName, foundShapesDataTree, shapeType):
                         curve = shape.ToNurbsCurve()
                         foundShapesFlattenedList.append(curve)
                     except:
-                        # 3d buildings (shapeType = 0)
+                        # footprints (draped onto the groundTerrain_ or cut out of it) or 3d buildings (shapeType = 0)
                         foundShapesFlattenedList.append(shape)
     
     
@@ -592,7 +739,16 @@ def titleAndBaking(OSMobjectName, foundShapesDataTree, shapeType):
         
         layerIndex, layerName_dummy = gismo_preparation.createLayer(layParentName, laySubName, layerCategoryName, newLayerCategory, layerName, laySubName_color, layerColor) 
         
-        foundShapesFlattened = [shape  for foundShapesL in foundShapesDataTree.Branches  for shape in foundShapesL]
+        # a shape with several of the required tags is found once per each tag (in {queryIndex;path} branches), but baked only once
+        foundShapesFlattened = []
+        bakedPaths = set()
+        for path, foundShapesL in zip(foundShapesDataTree.Paths, foundShapesDataTree.Branches):
+            shapePath = tuple(path.Indices)[1:]  if (numberOfQueries > 1)  else tuple(path.Indices)
+            if shapePath in bakedPaths:
+                continue
+            bakedPaths.add(shapePath)
+            foundShapesFlattened.extend(foundShapesL)
+        del bakedPaths
         geometryIds = gismo_preparation.bakeGeometry(foundShapesFlattened, layerIndex)
         geometryIds2 = gismo_preparation.bakeGeometry([titleLabelMesh], layerIndex)
         
@@ -611,13 +767,13 @@ def titleAndBaking(OSMobjectName, foundShapesDataTree, shapeType):
     return titleLabelMesh, titleStartPt
 
 
-def printOutput(requiredKey, requiredValues, createFootprints):
+def printOutput(requiredKeys, requiredValuesLL, createFootprints):
     
     #requiredTagLL = [list(item)  for item in requiredTag.Branches]
     #if requiredValues == ["^"]: requiredValues = []
     
     if bakeIt_ == True:
-        bakedOrNot = "and baked "
+        bakedOrNot = "and baked %s " % gismo_preparation.bakeSummary()
     elif bakeIt_ == False:
         bakedOrNot = ""
     
@@ -631,9 +787,9 @@ def printOutput(requiredKey, requiredValues, createFootprints):
     """
 Input data:
 
-requiredTag: %s, %s
+requiredTag: %s
 Ground terrain inputted: %s
-    """ % (requiredKey, requiredValues, groundTerrainInputted)
+    """ % ("; ".join(["%s, %s" % (requiredKey, requiredValues)  for requiredKey, requiredValues in zip(requiredKeys, requiredValuesLL)]), groundTerrainInputted)
     print resultsCompletedMsg
     print printOutputMsg
 
@@ -646,19 +802,19 @@ if sc.sticky.has_key("gismoGismo_released"):
         gismo_createGeometry = sc.sticky["gismo_CreateGeometry"]()
         gismo_osm = sc.sticky["gismo_OSM"]()
         
-        OSMobjectName, requiredKey, requiredValues, createFootprints, perform_searchThreeDeeShapes, shapeType, validInputData, printMsg = checkInputData(_requiredTag, _shapes, _keys, _values, threeDeeShapes_, threeDeeValues_, createFootprints_)
+        OSMobjectName, requiredKeys, requiredValuesLL, createFootprints, perform_searchThreeDeeShapes, shapeType, validInputData, printMsg = checkInputData(_requiredTag, _shapes, _keys, _values, threeDeeShapes_, threeDeeValues_, createFootprints_)
         if validInputData:
             if _runIt:
                 if (not perform_searchThreeDeeShapes):
                     # 2D
-                    foundShapes, foundValues, foundShapeOrNot, OSMobjectName, validInputs, printMsg = searchShapes(OSMobjectName, requiredKey, requiredValues, _shapes, _keys, _values, threeDeeShapes_, threeDeeValues_, createFootprints, groundTerrain_, shapeType, perform_searchThreeDeeShapes)
+                    foundShapes, foundValues, foundShapeOrNot, OSMobjectName, validInputs, printMsg = searchShapes(OSMobjectName, requiredKeys, requiredValuesLL, _shapes, _keys, _values, threeDeeShapes_, threeDeeValues_, createFootprints, groundTerrain_, shapeType, perform_searchThreeDeeShapes)
                 elif perform_searchThreeDeeShapes:
                     # 3D
                     createFootprints = True
-                    foundShapes, foundValues, foundShapeOrNot, OSMobjectName, validInputs, printMsg = searchShapes(OSMobjectName, requiredKey, requiredValues, _shapes, _keys, _values, threeDeeShapes_, threeDeeValues_, createFootprints, groundTerrain_, shapeType, perform_searchThreeDeeShapes)
+                    foundShapes, foundValues, foundShapeOrNot, OSMobjectName, validInputs, printMsg = searchShapes(OSMobjectName, requiredKeys, requiredValuesLL, _shapes, _keys, _values, threeDeeShapes_, threeDeeValues_, createFootprints, groundTerrain_, shapeType, perform_searchThreeDeeShapes)
                 if validInputs:
-                    title, titleOriginPt = titleAndBaking(OSMobjectName, foundShapes, shapeType)
-                    printOutput(requiredKey, requiredValues, createFootprints)
+                    title, titleOriginPt = titleAndBaking(OSMobjectName, foundShapes, shapeType, len(requiredKeys))
+                    printOutput(requiredKeys, requiredValuesLL, createFootprints)
                     foundKeys = _keys
                 else:
                     print printMsg
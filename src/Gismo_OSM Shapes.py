@@ -36,8 +36,7 @@ Provided by Gismo 0.0.1
                  -
                  It can not be shorter than 50 meters or longer than 20 000 meters.
                  -
-                 The component itself might inform the user to alter the initial radius_ inputted by the user.
-                 This is due to restriction of downloadable OSM data being limited to 0.5 latitude x 0.5 longitude range. If radius_ value for chosen location gets is equal to the mentioned range, or larger than it, the component will inform the user to shrink the radius_ for a certain amount.
+                 Larger regions (above 0.1 latitude x 0.1 longitude degrees) will be downloaded in several tiles which are then merged together.
                  -
                  If not supplied, default value of 100 meters will be used.
                  -
@@ -65,6 +64,11 @@ Provided by Gismo 0.0.1
                        Either that, or simply leave this input empty. It that way the component will take only those keys which are attached to all shapeType_ shapes.
                        -
                        If not supplied, only those keys that appear at that particular "location_" and "radius_" will be used.
+        requiredTag_: Optional "requiredTag" output from the "OSM tag" component.
+                      -
+                      If supplied, only the shapes with this tag will be downloaded from openstreetmap.org (for example only buildings, instead of the whole map data). This can considerably shorten the download and processing time for larger radius_ values.
+                      -
+                      If not supplied, all shapes of the chosen shapeType_ will be downloaded.
         onlyRemove_Ids_: Use this input to define lists of Open Street Map ids. "OSM ids" component will generate them.
                          -
                          These lists can be used to define:
@@ -109,6 +113,7 @@ import scriptcontext as sc
 import Grasshopper
 import System
 import shutil
+import urllib
 import Rhino
 import math
 import time
@@ -117,7 +122,7 @@ import os
 import gc
 
 
-def checkInputData(radiusM, north, originPt, shapeType, requiredKeys, onlyRemove_Ids):
+def checkInputData(radiusM, north, originPt, shapeType, requiredKeys, requiredTag, onlyRemove_Ids):
     
     # check if MapWinGIS is properly installed
     gismoGismoComponentNotRan = False  # initial value
@@ -125,8 +130,8 @@ def checkInputData(radiusM, north, originPt, shapeType, requiredKeys, onlyRemove
         mapFolder_ = sc.sticky["gismo_mapwingisFolder"]
         iteropMapWinGIS_dll_folderPath, gdalDataPath_folderPath, validInputData, printMsg = gismo_mainComponent.mapWinGIS(mapFolder_)
         if not validInputData:
-            radiusM = northRad = northDeg = originPt = requiredKeys = shapeType = shapeTypeLabel = osm_id_Only = osm_way_id_Only = osm_id_Remove = osm_way_id_Remove = iteropMapWinGIS_dll_folderPath = unitConversionFactor = None
-            return radiusM, northRad, northDeg, originPt, shapeType, shapeTypeLabel, requiredKeys, osm_id_Only, osm_way_id_Only, osm_id_Remove, osm_way_id_Remove, iteropMapWinGIS_dll_folderPath, unitConversionFactor, validInputData, printMsg
+            radiusM = northRad = northDeg = originPt = requiredKeys = requiredTag = shapeType = shapeTypeLabel = osm_id_Only = osm_way_id_Only = osm_id_Remove = osm_way_id_Remove = iteropMapWinGIS_dll_folderPath = unitConversionFactor = None
+            return radiusM, northRad, northDeg, originPt, shapeType, shapeTypeLabel, requiredKeys, requiredTag, osm_id_Only, osm_way_id_Only, osm_id_Remove, osm_way_id_Remove, iteropMapWinGIS_dll_folderPath, unitConversionFactor, validInputData, printMsg
         if sc.sticky.has_key("MapWinGIS"):
             global MapWinGIS
             import MapWinGIS
@@ -136,21 +141,21 @@ def checkInputData(radiusM, north, originPt, shapeType, requiredKeys, onlyRemove
         gismoGismoComponentNotRan = True
     
     if (gismoGismoComponentNotRan == True):
-        radiusM = northRad = northDeg = originPt = requiredKeys = shapeType = shapeTypeLabel = osm_id_Only = osm_way_id_Only = osm_id_Remove = osm_way_id_Remove = iteropMapWinGIS_dll_folderPath = unitConversionFactor = None
+        radiusM = northRad = northDeg = originPt = requiredKeys = requiredTag = shapeType = shapeTypeLabel = osm_id_Only = osm_way_id_Only = osm_id_Remove = osm_way_id_Remove = iteropMapWinGIS_dll_folderPath = unitConversionFactor = None
         validInputData = False
         printMsg = "The \"Gismo Gismo\" component has not been run. Run it before running this component."
-        return radiusM, northRad, northDeg, originPt, shapeType, shapeTypeLabel, requiredKeys, osm_id_Only, osm_way_id_Only, osm_id_Remove, osm_way_id_Remove, iteropMapWinGIS_dll_folderPath, unitConversionFactor, validInputData, printMsg
+        return radiusM, northRad, northDeg, originPt, shapeType, shapeTypeLabel, requiredKeys, requiredTag, osm_id_Only, osm_way_id_Only, osm_id_Remove, osm_way_id_Remove, iteropMapWinGIS_dll_folderPath, unitConversionFactor, validInputData, printMsg
     
     
     # check inputs
     if (radiusM == None):
         radiusM = 100  # default in meters
     elif (radiusM < 50):  # values of 10 or 20 meters can download an invalid .osm file from http://api.openstreetmap.org
-        radiusM = northRad = northDeg = originPt = requiredKeys = shapeType = shapeTypeLabel = osm_id_Only = osm_way_id_Only = osm_id_Remove = osm_way_id_Remove = iteropMapWinGIS_dll_folderPath = unitConversionFactor = None
+        radiusM = northRad = northDeg = originPt = requiredKeys = requiredTag = shapeType = shapeTypeLabel = osm_id_Only = osm_way_id_Only = osm_id_Remove = osm_way_id_Remove = iteropMapWinGIS_dll_folderPath = unitConversionFactor = None
         validInputData = False
         printMsg = "radius_ input only supports values equal or larger than 50 meters."
         
-        return radiusM, northRad, northDeg, originPt, shapeType, shapeTypeLabel, requiredKeys, osm_id_Only, osm_way_id_Only, osm_id_Remove, osm_way_id_Remove, iteropMapWinGIS_dll_folderPath, unitConversionFactor, validInputData, printMsg
+        return radiusM, northRad, northDeg, originPt, shapeType, shapeTypeLabel, requiredKeys, requiredTag, osm_id_Only, osm_way_id_Only, osm_id_Remove, osm_way_id_Remove, iteropMapWinGIS_dll_folderPath, unitConversionFactor, validInputData, printMsg
     #arcAngleD = math.degrees( math.atan( radiusM / (6371000+elevation) ) )  # assumption of Earth being a sphere
     #arcLength = (arcAngleD*math.pi*R)/180
     # correction of radiusM length due to light refraction can not be calculated, so it is assumed that arcLength = radiusM. radiusM variable will be used from now on instead of arcLength.
@@ -163,10 +168,10 @@ def checkInputData(radiusM, north, originPt, shapeType, requiredKeys, onlyRemove
         try:  # check if it's a number
             north = float(north)
             if north < 0 or north > 360:
-                radiusM = northRad = northDeg = originPt = requiredKeys = shapeType = shapeTypeLabel = osm_id_Only = osm_way_id_Only = osm_id_Remove = osm_way_id_Remove = iteropMapWinGIS_dll_folderPath = unitConversionFactor = None
+                radiusM = northRad = northDeg = originPt = requiredKeys = requiredTag = shapeType = shapeTypeLabel = osm_id_Only = osm_way_id_Only = osm_id_Remove = osm_way_id_Remove = iteropMapWinGIS_dll_folderPath = unitConversionFactor = None
                 validInputData = False
                 printMsg = "Please input north angle value from 0 to 360."
-                return radiusM, northRad, northDeg, originPt, shapeType, shapeTypeLabel, requiredKeys, osm_id_Only, osm_way_id_Only, osm_id_Remove, osm_way_id_Remove, iteropMapWinGIS_dll_folderPath, unitConversionFactor, validInputData, printMsg
+                return radiusM, northRad, northDeg, originPt, shapeType, shapeTypeLabel, requiredKeys, requiredTag, osm_id_Only, osm_way_id_Only, osm_id_Remove, osm_way_id_Remove, iteropMapWinGIS_dll_folderPath, unitConversionFactor, validInputData, printMsg
         except Exception, e:  # check if it's a vector
             north.Unitize()
         
@@ -187,12 +192,12 @@ def checkInputData(radiusM, north, originPt, shapeType, requiredKeys, onlyRemove
     elif (len(requiredKeys) > 250):
         # .dbf files require maximal number of fields to be 255 (254 if one of the fields contains None values)
         # source: https://msdn.microsoft.com/en-us/library/3kfd3hw9
-        radiusM = northRad = northDeg = originPt = requiredKeys = shapeType = shapeTypeLabel = osm_id_Only = osm_way_id_Only = osm_id_Remove = osm_way_id_Remove = iteropMapWinGIS_dll_folderPath = unitConversionFactor = None
+        radiusM = northRad = northDeg = originPt = requiredKeys = requiredTag = shapeType = shapeTypeLabel = osm_id_Only = osm_way_id_Only = osm_id_Remove = osm_way_id_Remove = iteropMapWinGIS_dll_folderPath = unitConversionFactor = None
         validInputData = False
         printMsg = "requiredKeys_ input accepts maximum 250 keys.\n" + \
                    "You inputted %s keys. Remove some of them." % len(requiredKeys)
         requiredKeys = None  # set in here so that it can be printed in the printMsg
-        return radiusM, northRad, northDeg, originPt, shapeType, shapeTypeLabel, requiredKeys, osm_id_Only, osm_way_id_Only, osm_id_Remove, osm_way_id_Remove, iteropMapWinGIS_dll_folderPath, unitConversionFactor, validInputData, printMsg
+        return radiusM, northRad, northDeg, originPt, shapeType, shapeTypeLabel, requiredKeys, requiredTag, osm_id_Only, osm_way_id_Only, osm_id_Remove, osm_way_id_Remove, iteropMapWinGIS_dll_folderPath, unitConversionFactor, validInputData, printMsg
     
     
     if (shapeType == None):
@@ -205,22 +210,38 @@ def checkInputData(radiusM, north, originPt, shapeType, requiredKeys, onlyRemove
     elif (shapeType == 2):
         shapeTypeLabel = "points"
     elif (shapeType < 0) or (shapeType > 2):
-        radiusM = northRad = northDeg = originPt = requiredKeys = shapeType = shapeTypeLabel = osm_id_Only = osm_way_id_Only = osm_id_Remove = osm_way_id_Remove = iteropMapWinGIS_dll_folderPath = unitConversionFactor = None
+        radiusM = northRad = northDeg = originPt = requiredKeys = requiredTag = shapeType = shapeTypeLabel = osm_id_Only = osm_way_id_Only = osm_id_Remove = osm_way_id_Remove = iteropMapWinGIS_dll_folderPath = unitConversionFactor = None
         validInputData = False
         printMsg = "shapeType_ input can not be smaller than 0, nor larger than 2.\n" + \
                    "Please input some of the following values:\n" + \
                    "0 (polygons)\n" + \
                    "1 (polylines)\n" + \
                    "2 (points)."
-        return radiusM, northRad, northDeg, originPt, shapeType, shapeTypeLabel, requiredKeys, osm_id_Only, osm_way_id_Only, osm_id_Remove, osm_way_id_Remove, iteropMapWinGIS_dll_folderPath, unitConversionFactor, validInputData, printMsg
+        return radiusM, northRad, northDeg, originPt, shapeType, shapeTypeLabel, requiredKeys, requiredTag, osm_id_Only, osm_way_id_Only, osm_id_Remove, osm_way_id_Remove, iteropMapWinGIS_dll_folderPath, unitConversionFactor, validInputData, printMsg
+    
+    
+    requiredKey = ""
+    if (requiredTag != None) and (requiredTag.BranchCount > 0) and (len(requiredTag.Branches[0]) > 0) and (requiredTag.Branches[0][0] != None):
+        requiredKey = str(requiredTag.Branches[0][0]).strip()
+    
+    if (requiredKey == ""):
+        # nothing inputted to "requiredTag_" input (or the "OSM tag" component which generates it has not been run). Download all shapes of the shapeType_
+        requiredTag = None
+    else:
+        # something inputted to "requiredTag_" input. Download only the shapes with that tag
+        if (requiredTag.BranchCount > 1):
+            requiredValues = [str(value).strip()  for value in requiredTag.Branches[1]  if (value != None)]
+        else:
+            requiredValues = []
+        requiredTag = [requiredKey, requiredValues]
     
     
     if (onlyRemove_Ids.BranchCount == 1) and (onlyRemove_Ids.Branches[0][0] == None):
         # in "OSM ids" component, an id exists both in "osm_id_Only_" and "osm_id_Remove_" inputs,  or an id exists both in "osm_way_id_Only_" and "osm_way_id_Remove_" inputs
-        radiusM = northRad = northDeg = originPt = requiredKeys = shapeType = shapeTypeLabel = osm_id_Only = osm_way_id_Only = osm_id_Remove = osm_way_id_Remove = iteropMapWinGIS_dll_folderPath = unitConversionFactor = None
+        radiusM = northRad = northDeg = originPt = requiredKeys = requiredTag = shapeType = shapeTypeLabel = osm_id_Only = osm_way_id_Only = osm_id_Remove = osm_way_id_Remove = iteropMapWinGIS_dll_folderPath = unitConversionFactor = None
         validInputData = False
         printMsg = "Your \"_onlyRemove_Ids\" input is invalid. Check the \"readMe!\" output of \"OSM ids\" component to see what's wrong with it."
-        return radiusM, northRad, northDeg, originPt, shapeType, shapeTypeLabel, requiredKeys, osm_id_Only, osm_way_id_Only, osm_id_Remove, osm_way_id_Remove, iteropMapWinGIS_dll_folderPath, unitConversionFactor, validInputData, printMsg
+        return radiusM, northRad, northDeg, originPt, shapeType, shapeTypeLabel, requiredKeys, requiredTag, osm_id_Only, osm_way_id_Only, osm_id_Remove, osm_way_id_Remove, iteropMapWinGIS_dll_folderPath, unitConversionFactor, validInputData, printMsg
     elif (onlyRemove_Ids.BranchCount == 0):
         # nothing inputted to "OSM ids" component's four inputs
         osm_id_Only = [];  osm_way_id_Only = [];  osm_id_Remove = [];  osm_way_id_Remove = []
@@ -239,7 +260,7 @@ def checkInputData(radiusM, north, originPt, shapeType, requiredKeys, onlyRemove
     validInputData = True
     printMsg = "ok"
     
-    return radiusM, northRad, northDeg, originPt, shapeType, shapeTypeLabel, requiredKeys, osm_id_Only, osm_way_id_Only, osm_id_Remove, osm_way_id_Remove, iteropMapWinGIS_dll_folderPath, unitConversionFactor, validInputData, printMsg
+    return radiusM, northRad, northDeg, originPt, shapeType, shapeTypeLabel, requiredKeys, requiredTag, osm_id_Only, osm_way_id_Only, osm_id_Remove, osm_way_id_Remove, iteropMapWinGIS_dll_folderPath, unitConversionFactor, validInputData, printMsg
 
 
 def destinationLatLon(latitude1D, longitude1D):
@@ -301,74 +322,6 @@ def destinationLatLon(latitude1D, longitude1D):
     return latitudeTopD, longitudeTopD, latitudeBottomD, longitudeBottomD, latitudeLeftD, longitudeLeftD, latitudeRightD, longitudeRightD
 
 
-def distanceBetweenTwoPoints(latitude1D, longitude1D, radiusM):
-    # "Distance/bearing between two points (inverse solution)" by Vincenty solution
-    # based on JavaScript code made by Chris Veness
-    # http://www.movable-type.co.uk/scripts/latlong-vincenty.html
-    
-    # setting the latitude2D, longitude2D according to SRTM latitude range boundaries (-56 to 60)
-    if latitude1D >= 0:
-        # northern hemishere:
-        latitude2D = 60
-    elif latitude1D < 0:
-        # southern hemishere:
-        latitude2D = -56
-    longitude2D = longitude1D
-    
-    # for WGS84:
-    a = 6378137  # equatorial radius, meters
-    b = 6356752.314245  # polar radius, meters
-    f = 0.00335281066474  # flattening (ellipticity, oblateness) parameter = (a-b)/a, dimensionless
-    
-    latitude1R = math.radians(latitude1D)
-    latitude2R = math.radians(latitude2D)
-    longitude1R = math.radians(longitude1D)
-    longitude2R = math.radians(longitude2D)
-    
-    L = longitude2R - longitude1R
-    tanU1 = (1-f) * math.tan(latitude1R)
-    cosU1 = 1 / math.sqrt((1 + tanU1*tanU1))
-    sinU1 = tanU1 * cosU1
-    tanU2 = (1-f) * math.tan(latitude2R)
-    cosU2 = 1 / math.sqrt((1 + tanU2*tanU2))
-    sinU2 = tanU2 * cosU2
-    longitudeR = L
-    longitudeR_ = 0
-    
-    for i in range(100):
-        sinLongitudeR = math.sin(longitudeR)
-        cosLongitudeR = math.cos(longitudeR)
-        sinSqSigma = (cosU2*sinLongitudeR) * (cosU2*sinLongitudeR) + (cosU1*sinU2-sinU1*cosU2*cosLongitudeR) * (cosU1*sinU2-sinU1*cosU2*cosLongitudeR)
-        sinSigma = math.sqrt(sinSqSigma)
-        cosSigma = sinU1*sinU2 + cosU1*cosU2*cosLongitudeR
-        sigma = math.atan2(sinSigma, cosSigma)
-        sinBearingAngleR = cosU1 * cosU2 * sinLongitudeR / sinSigma
-        cosSqBearingAngleR = 1 - sinBearingAngleR*sinBearingAngleR
-        if cosSqBearingAngleR == 0:
-            # if distanceM is measured along the equator line (latitude1D = latitude2D = 0, longitude1D != longitude2D != 0)
-            cos2SigmaM = 0
-        else:
-            cos2SigmaM = cosSigma - 2*sinU1*sinU2/cosSqBearingAngleR
-        C = f/16*cosSqBearingAngleR*(4+f*(4-3*cosSqBearingAngleR))
-        longitudeR_ = longitudeR
-        longitudeR = L + (1-C) * f * sinBearingAngleR * (sigma + C*sinSigma*(cos2SigmaM+C*cosSigma*(-1+2*cos2SigmaM*cos2SigmaM)))
-    
-    uSq = cosSqBearingAngleR * (a*a - b*b) / (b*b)
-    A = 1 + uSq/16384*(4096+uSq*(-768+uSq*(320-175*uSq)))
-    B = uSq/1024 * (256+uSq*(-128+uSq*(74-47*uSq)))
-    deltaSigma = B*sinSigma*(cos2SigmaM+B/4*(cosSigma*(-1+2*cos2SigmaM*cos2SigmaM) - B/6*cos2SigmaM*(-3+4*sinSigma*sinSigma)*(-3+4*cos2SigmaM*cos2SigmaM)))
-    
-    distanceM = b*A*(sigma-deltaSigma)  # in meters
-    
-    bearingAngleForwardR = math.atan2(cosU2*sinLongitudeR,  cosU1*sinU2-sinU1*cosU2*cosLongitudeR)
-    bearingAngleReverseR = math.atan2(cosU1*sinLongitudeR, -sinU1*cosU2+cosU1*sinU2*cosLongitudeR)
-    
-    bearingAngleForwardD = math.degrees(bearingAngleForwardR)
-    bearingAngleReverseD = math.degrees(bearingAngleReverseR)
-    
-    return distanceM
-
-
 def setupOsmconf_ini_File(requiredKeys, shapeType, overpassFile_filePathL, osmconf_ini_filePath):
     
     # identify unique keys from overpassFile_filePathL files
@@ -523,23 +476,10 @@ def setupOsmconf_ini_File(requiredKeys, shapeType, overpassFile_filePathL, osmco
         return ["osm_id"] + fullName_keysL[shapeType]
 
 
-def checkOsmShpFiles(locationLatitudeD, locationLongitudeD, fileNameIncomplete, radiusM, requiredKeys, shapeType):
+def checkOsmShpFiles(locationLatitudeD, locationLongitudeD, fileNameIncomplete, radiusM, requiredKeys, requiredTag, shapeType):
     
     latitudeTopD, longitudeTopD, latitudeBottomD, longitudeBottomD, latitudeLeftD, longitudeLeftD, latitudeRightD, longitudeRightD = destinationLatLon(locationLatitudeD, locationLongitudeD)
     
-    # check if osm region is 0.5x0.5 degrees
-    if ((latitudeTopD - latitudeBottomD) >= 0.5)  or  ((longitudeRightD - longitudeLeftD) >= 0.5):
-        distanceM = distanceBetweenTwoPoints(locationLatitudeD, locationLongitudeD, radiusM)
-        correctedRadiusM = int(distanceM)  # int(distanceM) will always perform the math.floor(distanceM)
-        validVisibilityRadiusM = False
-        printMsg = "This component downloads map data from openstreetmap.org in order to create the shapes for the chosen _location.\n" + \
-                   "But mentioned openstreetmap.org data has limits: the radius can not be longer than 0.25 degrees of latitude and longitude.\n" + \
-                   "This is why the inputted radius_ value, needs to be shank.\n" + \
-                   " \n" + \
-                   "Please supply the \"radius_\" input with value: %s.\n" % correctedRadiusM
-        return shapeFile_filePath, valid_osm_or_shp_files, printMsg
-    
-    
     # create "gismoFolder_\osm_files" folder
     # always use the "gismoFolder_" input of Gismo_Gismo component + "\osm_files" as the working folder for downloaded .osm files and converted shapefiles
     gismoFolder = sc.sticky["gismo_gismoFolder"]  # "gismoFolder_" input of Gismo_Gismo component
@@ -553,7 +493,9 @@ def checkOsmShpFiles(locationLatitudeD, locationLongitudeD, fileNameIncomplete,
     if not os.path.isdir(osm_shp_file_folderPath):
         os.mkdir(osm_shp_file_folderPath)
     
-    osmFile_filePath = os.path.join(osm_shp_file_folderPath, fileName + ".osm")
+    # only the OSM elements required for the shapeType and requiredTag will be downloaded. Each different query is cached in its own .osm file
+    overpassQuery, overpassQuerySignature = gismo_osm.overpassQuery(shapeType, latitudeBottomD, longitudeLeftD, latitudeTopD, longitudeRightD, requiredTag)
+    osmFile_filePath = os.path.join(osm_shp_file_folderPath, fileName + "_" + overpassQuerySignature + ".osm")
     
     osmconf_ini_filePath = os.path.join(iteropMapWinGIS_dll_folderPath, "gdal-data\\osmconf.ini")  # for MapWinGIS
     osmconf_ini_present = os.path.isfile(osmconf_ini_filePath)
@@ -591,7 +533,7 @@ def checkOsmShpFiles(locationLatitudeD, locationLongitudeD, fileNameIncomplete,
     files = os.listdir(osm_shp_file_folderPath)
     for fileNameWithExtension in files:
         fileExtension = fileNameWithExtension[-4:]
-        if (fileExtension != ".osm") and (fileExtension != ".txt"):  # delete only .shp/.shx/.dbf/.prj files
+        if (fileExtension != ".osm") and (fileExtension != ".txt") and (fileExtension != "part"):  # delete only .shp/.shx/.dbf/.prj files. Keep the partially downloaded ".part" files: their download is resumed only if the server confirms (If-Range) that the file did not change, otherwise it restarts
             filePath = os.path.join(osm_shp_file_folderPath, fileNameWithExtension)
             os.remove(filePath)
     
@@ -607,13 +549,29 @@ def checkOsmShpFiles(locationLatitudeD, locationLongitudeD, fileNameIncomplete,
             requiredKeys = []
         else:
             # overpassNodeTags....txt, overpassWayTags....txt, overpassRelationTags....txt files DO NOT exist in "osm_files\osm_shp_file_folderPath\" folder
-            downloadOverpassNodeFile_link = "http://overpass-api.de/api/interpreter?data=[out:json];node[~\".\"~\".\"](%s,%s,%s,%s);out;" % (latitudeBottomD, longitudeLeftD, latitudeTopD, longitudeRightD)
-            downloadOverpassWayFile_link = "http://overpass-api.de/api/interpreter?data=[out:json];way[~\".\"~\".\"](%s,%s,%s,%s);out;" % (latitudeBottomD, longitudeLeftD, latitudeTopD, longitudeRightD)
+            # only the tags are needed (no coordinates and no nodes of the ways). Larger regions are split into tiles, which are downloaded concurrently
+            tiles = gismo_osm.tileBoundingBox(latitudeBottomD, longitudeLeftD, latitudeTopD, longitudeRightD, 0.5)
+            downloadOverpassTagsFile_links = []
+            overpassTagsTileFile_filePathsL = [[], []]  # node tiles, way tiles
+            for tileIndex, tile in enumerate(tiles):
+                for elementIndex, elementType in enumerate(["node", "way"]):
+                    overpassTagsQuery = "[out:json][timeout:180];%s[~\".\"~\".\"](%s,%s,%s,%s);out tags;" % (elementType, tile[0], tile[1], tile[2], tile[3])
+                    downloadOverpassTagsFile_links.append("http://overpass-api.de/api/interpreter?data=" + urllib.quote(overpassTagsQuery))
+                    overpassTagsTileFile_filePathsL[elementIndex].append(os.path.join(osm_shp_file_folderPath, fileName + "_" + elementType + "Tags_tile" + str(tileIndex) + ".txt"))
+            overpassTagsTileFile_filePaths = [filePath  for tileIndex in range(len(tiles))  for filePath in (overpassTagsTileFile_filePathsL[0][tileIndex], overpassTagsTileFile_filePathsL[1][tileIndex])]
             
-            overpassNodeFileDownloaded = gismo_preparation.downloadFile(downloadOverpassNodeFile_link, overpassFile_nodeTags_filePath)
-            overpassWayFileDownloaded = gismo_preparation.downloadFile(downloadOverpassWayFile_link, overpassFile_wayTags_filePath)
+            # tiles downloaded in some previous unsuccessful run are not downloaded again
+            missingTileFileIndices = [fileIndex  for fileIndex in range(len(overpassTagsTileFile_filePaths))  if not os.path.isfile(overpassTagsTileFile_filePaths[fileIndex])]
+            gismo_preparation.downloadFiles([downloadOverpassTagsFile_links[fileIndex]  for fileIndex in missingTileFileIndices], [overpassTagsTileFile_filePaths[fileIndex]  for fileIndex in missingTileFileIndices])
             
-            if (overpassNodeFileDownloaded == True) and (overpassWayFileDownloaded == True):
+            if False not in [os.path.isfile(filePath)  for filePath in overpassTagsTileFile_filePaths]:
+                # join the tiles into the overpass .txt files. Keys are extracted from them line by line, so repeated elements on the tiles edges do not matter
+                for overpassFile_filePath, overpassTagsTileFile_filePathsForElement in zip([overpassFile_nodeTags_filePath, overpassFile_wayTags_filePath], overpassTagsTileFile_filePathsL):
+                    with open(overpassFile_filePath, "w") as overpassFile:
+                        for overpassTagsTileFile_filePath in overpassTagsTileFile_filePathsForElement:
+                            with open(overpassTagsTileFile_filePath) as overpassTagsTileFile:
+                                shutil.copyfileobj(overpassTagsTileFile, overpassFile)
+                            os.remove(overpassTagsTileFile_filePath)
                 # overpassNodeTags....txt, overpassWayTags....txt, overpassRelationTags....txt files SUCCESSFULLY DOWNLOADED in "osm_files\osm_shp_file_folderPath\" folder. Extract the "requiredKeys" from them
                 requiredKeys = []
             else:
@@ -680,8 +638,31 @@ def checkOsmShpFiles(locationLatitudeD, locationLongitudeD, fileNameIncomplete,
                 
                 # download .osm file
                 # based on: http://wiki.openstreetmap.org/wiki/Downloading_data
-                downloadOSMfile_link = "http://overpass-api.de/api/map?bbox=%s,%s,%s,%s" % (longitudeLeftD,latitudeBottomD,longitudeRightD,latitudeTopD)
-                osmFileDownloaded = gismo_preparation.downloadFile(downloadOSMfile_link, osmFile_filePath)
+                # larger regions are split into tiles, which are downloaded concurrently and then merged into a single .osm file
+                tiles = gismo_osm.tileBoundingBox(latitudeBottomD, longitudeLeftD, latitudeTopD, longitudeRightD)
+                if len(tiles) == 1:
+                    downloadOSMfile_link = "http://overpass-api.de/api/interpreter?data=" + urllib.quote(overpassQuery.encode("utf-8"))
+                    osmFileDownloaded = gismo_preparation.downloadFiles([downloadOSMfile_link], [osmFile_filePath], timeout=200)[0]
+                else:
+                    downloadOSMtileFile_links = []
+                    osmTileFile_filePaths = []
+                    for tileIndex, tile in enumerate(tiles):
+                        overpassTileQuery, overpassTileQuerySignature = gismo_osm.overpassQuery(shapeType, tile[0], tile[1], tile[2], tile[3], requiredTag)
+                        downloadOSMtileFile_links.append("http://overpass-api.de/api/interpreter?data=" + urllib.quote(overpassTileQuery.encode("utf-8")))
+                        osmTileFile_filePaths.append(os.path.join(osm_shp_file_folderPath, fileName + "_" + overpassQuerySignature + "_tile" + str(tileIndex) + ".osm"))
+                    
+                    # tiles downloaded in some previous unsuccessful run are not downloaded again
+                    missingTileIndices = [tileIndex  for tileIndex in range(len(tiles))  if not os.path.isfile(osmTileFile_filePaths[tileIndex])]
+                    gismo_preparation.downloadFiles([downloadOSMtileFile_links[tileIndex]  for tileIndex in missingTileIndices], [osmTileFile_filePaths[tileIndex]  for tileIndex in missingTileIndices], timeout=200)
+                    osmTileFilesDownloaded = [os.path.isfile(osmTileFile_filePath)  for osmTileFile_filePath in osmTileFile_filePaths]
+                    if False not in osmTileFilesDownloaded:
+                        # ways crossing the tiles edges are written only once to the merged .osm file
+                        gismo_osm.mergeOsmFiles(osmTileFile_filePaths, osmFile_filePath, latitudeBottomD, longitudeLeftD, latitudeTopD, longitudeRightD)
+                        osmFileDownloaded = True
+                        for osmTileFile_filePath in osmTileFile_filePaths:
+                            os.remove(osmTileFile_filePath)
+                    else:
+                        osmFileDownloaded = False
                 
                 if osmFileDownloaded == False:
                     # .osm file has NOT been downloaded
@@ -749,38 +730,7 @@ def checkOsmShpFiles(locationLatitudeD, locationLongitudeD, fileNameIncomplete,
     return shapeFile_filePath, fullName_keys, valid_osm_or_shp_files, printMsg
 
 
-def filterShapes(shortenedName_keys, subValuesL, shapesL, osm_id_Only, osm_way_id_Only, osm_id_Remove, osm_way_id_Remove):
-    
-    value__osm_id = "^#-@"  # dummy value, in case for some unknown reason there is no "osm_id" field
-    value__osm_way_id = "^#-@"  # dummy value, in case there is no "osm_way_id" field (shapeType = 1,2)
-    for shortenedName_keysIndex, field in enumerate(shortenedName_keys):
-        if field == "osm_id":
-            value__osm_id = subValuesL[shortenedName_keysIndex]
-        if field == "osm_way_id":
-            value__osm_way_id = subValuesL[shortenedName_keysIndex]
-    
-    
-    # removing shapes
-    if value__osm_id in osm_id_Remove:
-        return [], []
-    elif value__osm_way_id in osm_way_id_Remove:
-        return [], []
-    
-    # allowing this shapes
-    if value__osm_id in osm_id_Only:
-        return subValuesL, shapesL
-    elif value__osm_way_id in osm_way_id_Only:
-        return subValuesL, shapesL
-    else:
-        if (len(osm_id_Only) == 0) and (len(osm_way_id_Only) == 0):
-            # "osm_id_Only" and "osm_way_id_Only" are empty. Use ALL shapes except ones whos "osm_id" and "osm_way_id" are defined in either "osm_id_Remove" and "osm_way_id_Remove"
-            return subValuesL, shapesL
-        else:
-            # either "osm_id_Only" and "osm_way_id_Only" are NOT empty. Use ONLY those shapes whos "osm_id" and "osm_way_id" are defined in either "osm_id_Only" and "osm_way_id_Only"
-            return [], []
-
-
-def createShapesKeysValues(locationName, locationLatitudeD, locationLongitudeD, shapeFile_filePath, northRad, originPt, shapeType, osm_id_Only, osm_way_id_Only, osm_id_Remove, osm_way_id_Remove, unitConversionFactor):
+def createShapesKeysValues(locationName, locationLatitudeD, locationLongitudeD, shapeFile_filePath, fullName_keys, northRad, originPt, shapeType, osm_id_Only, osm_way_id_Only, osm_id_Remove, osm_way_id_Remove, unitConversionFactor):
     
     # UTM CRS for given location
     # by http://stackoverflow.com/a/9188972/3137724 (link given by Even Rouault)
@@ -795,8 +745,7 @@ def createShapesKeysValues(locationName, locationLatitudeD, locationLongitudeD,
         outputCRS_EPSG = 32700 + UTMzone
     
     # output crs
-    outputCRS = MapWinGIS.GeoProjectionClass()
-    outputCRS.ImportFromEPSG(outputCRS_EPSG)
+    outputCRS = gismo_osm.CRS_from_EPSGcode(outputCRS_EPSG)
     
     
     
@@ -854,9 +803,7 @@ def createShapesKeysValues(locationName, locationLatitudeD, locationLongitudeD,
     
     originPtProjected = gismo_osm.projectedLocationCoordinates(locationLatitudeD, locationLongitudeD)  # in meters!
     
-    # rotation due to north angle position
-    #transformMatrixRotate = Rhino.Geometry.Transform.Rotation(-northRad, Rhino.Geometry.Vector3d(0,0,1), originPt)  # counter-clockwise
-    transformMatrixRotate = Rhino.Geometry.Transform.Rotation(northRad, Rhino.Geometry.Vector3d(0,0,1), originPt)  # clockwise
+    moveVector = originPt - originPtProjected
     
     
     # open reprojectedShapefile
@@ -868,21 +815,49 @@ def createShapesKeysValues(locationName, locationLatitudeD, locationLongitudeD,
         shortenedName_keys.append(field.Name)
     
     
-    values = Grasshopper.DataTree[object]()
-    shapes = Grasshopper.DataTree[object]()
+    # values read from the shapefile: the row index is equal to the shape index (the first index of the "values" and "shapes" data trees paths)
+    attributeTable = sc.sticky["gismo_AttributeTable"](shortenedName_keys)
+    
+    # read the values of all shapes (only once per shape, not per each of its parts) into the attributeTable, and
+    # read the points of all shapes into flat coordinates lists, then scale, move and rotate (due to north angle position) all of them at once
+    shapefileShapes = []
+    shapesFirstPointIndices = []  # index of each shape's first point in the "xs", "ys", "zs", "transformedPts" lists
+    xs = []; ys = []; zs = []
     for i in range(reprojectedShapefile.NumShapes):
         shape = reprojectedShapefile.Shape[i]
+        shapefileShapes.append(shape)
         
-        moveVector = originPt - originPtProjected
+        subValuesL = []
+        for g in range(reprojectedShapefile.NumFields):
+            value = reprojectedShapefile.CellValue(g,i)
+            if (value == "yes") and (shape.ShapeType != 0): value = True  # for example: "building=yes"
+            subValuesL.append(value)
+        attributeTable.addRow(subValuesL)
+        
+        shapesFirstPointIndices.append(len(xs))
+        if (shape.ShapeType == 1) or (shape.ShapeType == 3) or (shape.ShapeType == 5):
+            for k in range(shape.numPoints):
+                pt = shape.Point[k]
+                xs.append(pt.x); ys.append(pt.y); zs.append(pt.z)
+    transformedPts = gismo_osm.transformCoordinates(xs, ys, zs, unitConversionFactor, moveVector, northRad, originPt)  # in Rhino document units
+    del xs; del ys; del zs
+    
+    # filter all shapes for the four inputs from "OSM ids" component at once
+    shapesAllowed = gismo_osm.filterAttributeTable(attributeTable, osm_id_Only, osm_way_id_Only, osm_id_Remove, osm_way_id_Remove)
+    
+    
+    values = Grasshopper.DataTree[object]()
+    shapes = Grasshopper.DataTree[object]()
+    for i in range(reprojectedShapefile.NumShapes):
+        shape = shapefileShapes[i]
+        firstPointIndex = shapesFirstPointIndices[i]
+        rowIndex = i
         
         if (shape.ShapeType == 0):  # NULL_SHAPE
             # ShapeType: NULL_SHAPE
             
             # values
-            subValuesL = []
-            for g in range(reprojectedShapefile.NumFields):
-                value = reprojectedShapefile.CellValue(g,i)
-                subValuesL.append(value)
+            subValuesL = attributeTable.row(rowIndex)
             values.AddRange(subValuesL, Grasshopper.Kernel.Data.GH_Path(i))
             
             # pts
@@ -892,61 +867,52 @@ def createShapesKeysValues(locationName, locationLatitudeD, locationLongitudeD,
         if (shape.ShapeType == 1):  # SHP_POINT
             # ShapeType: POINT
             
-            # values
-            subValuesL = []
-            for g in range(reprojectedShapefile.NumFields):
-                value = reprojectedShapefile.CellValue(g,i)
-                if value == "yes": value = True  # for example: "building=yes"
-                subValuesL.append(value)
-            
-            # pts
-            ptsPerShape = []
-            for k in range(shape.numPoints):
-                pt = shape.Point[k]
-                point3dProjected = Rhino.Geometry.Point3d(pt.x/unitConversionFactor, pt.y/unitConversionFactor, pt.z/unitConversionFactor)
-                point3dMoved = point3dProjected + moveVector
-                transformBoolSuccess = point3dMoved.Transform(transformMatrixRotate)
-                ptsPerShape.append(point3dMoved)
-            
-            subValuesL_filtered, ptsPerShape_filtered = filterShapes(shortenedName_keys, subValuesL, ptsPerShape, osm_id_Only, osm_way_id_Only, osm_id_Remove, osm_way_id_Remove)
+            if shapesAllowed[rowIndex]:
+                # values
+                subValuesL_filtered = attributeTable.row(rowIndex)
+                
+                # pts
+                ptsPerShape_filtered = transformedPts[firstPointIndex : firstPointIndex + shape.numPoints]
+            else:
+                # shape removed with the "OSM ids" component
+                subValuesL_filtered = []
+                ptsPerShape_filtered = []
             
             values.AddRange(subValuesL_filtered, Grasshopper.Kernel.Data.GH_Path(i))
             shapes.AddRange(ptsPerShape_filtered, Grasshopper.Kernel.Data.GH_Path(i))
-            del ptsPerShape
+            del subValuesL_filtered
+            del ptsPerShape_filtered
         
         if (shape.ShapeType == 3) or (shape.ShapeType == 5):  # POLYLINE and 
             # ShapeType: POLYLINE OR POLYGON
             
             for n in range(shape.NumParts):
-                # values
-                subValuesL = []
-                for g in range(reprojectedShapefile.NumFields):
-                    value = reprojectedShapefile.CellValue(g,i)
-                    if value == "yes": value = True  # for example: "building=yes"
-                    subValuesL.append(value)
-                
-                
-                # points
-                ptsPerPart = []
-                subShape = shape.PartAsShape(n)
-                for k in range(subShape.numPoints):
-                    pt = subShape.Point[k]
-                    point3dProjected = Rhino.Geometry.Point3d(pt.x/unitConversionFactor, pt.y/unitConversionFactor, pt.z/unitConversionFactor)  # in Rhino document units
-                    point3dMoved = point3dProjected + moveVector
-                    transformBoolSuccess = point3dMoved.Transform(transformMatrixRotate)
-                    ptsPerPart.append(point3dMoved)
-                polyline = Rhino.Geometry.Polyline(ptsPerPart)
-                
-                subValuesL_filtered, shapesL_filtered = filterShapes(shortenedName_keys, subValuesL, [polyline], osm_id_Only, osm_way_id_Only, osm_id_Remove, osm_way_id_Remove)
+                if shapesAllowed[rowIndex]:
+                    # values
+                    subValuesL_filtered = attributeTable.row(rowIndex)
+                    
+                    # points
+                    partFirstPointIndex = shape.Part[n]
+                    if (n + 1) < shape.NumParts:
+                        partLastPointIndex = shape.Part[n + 1]
+                    else:
+                        partLastPointIndex = shape.numPoints
+                    ptsPerPart = transformedPts[firstPointIndex + partFirstPointIndex : firstPointIndex + partLastPointIndex]
+                    shapesL_filtered = [Rhino.Geometry.Polyline(ptsPerPart)]
+                    del ptsPerPart
+                else:
+                    # shape removed with the "OSM ids" component
+                    subValuesL_filtered = []
+                    shapesL_filtered = []
                 
                 values.AddRange(subValuesL_filtered, Grasshopper.Kernel.Data.GH_Path(i,n))
                 shapes.AddRange(shapesL_filtered, Grasshopper.Kernel.Data.GH_Path(i,n))
-                del subValuesL
-                del ptsPerPart
-                del polyline
                 del subValuesL_filtered
                 del shapesL_filtered
-            subShape = None
+    
+    del shapefileShapes
+    del transformedPts
+    del shapesAllowed
     
     shapefile.Close()  # naknadno dodat - proveriti da li pravi neke probleme
     fixedShapefile.Close()
@@ -958,10 +924,27 @@ def createShapesKeysValues(locationName, locationLatitudeD, locationLongitudeD,
         shortenedName_keys = values = shapes = None
         validShapes = False
         printMsg = "The ids you supplied through \"osm_id_Only_\" and/or \"osm_way_id_Only_\" inputs do not exist for this \"_location\" and/or \"radius_\" inputs.\nTry removing the ids from the \"osm_id_Only_\" and/or \"osm_way_id_Only_\" inputs of \"OSM ids\" component."
+        # the tag index and geometry properties of the previous run do not correspond to any shapes anymore
+        sc.sticky.pop("gismo_OSMshapesComp_tagIndex", None)
+        sc.sticky.pop("gismo_OSMshapesComp_geometryProperties", None)
+        sc.sticky.pop("gismo_OSMshapesComp_spatialIndex", None)
         
         return shortenedName_keys, values, shapes, validShapes, printMsg
     
     
+    # send the inverted tag index (key -> value -> shapes indices) to sc.sticky, in order for it be used in the "OSM search" components.
+    # It is created with the full key names (the "keys" output of this component), which have the same order as the shapefile fields (shortenedName_keys)
+    valuesOutputParam = [param  for param in ghenv.Component.Params.Output  if (param.NickName == "values")][0]
+    sc.sticky["gismo_OSMshapesComp_tagIndex"] = sc.sticky["gismo_TagIndex"](fullName_keys, values, attributeTable, valuesOutputParam)
+    del attributeTable
+    # send the (lazily calculated) shapes areas, centroids, bounding boxes to sc.sticky, in order for them be used in the other OSM components
+    geometryProperties = sc.sticky["gismo_GeometryProperties"](shapes)
+    sc.sticky["gismo_OSMshapesComp_geometryProperties"] = geometryProperties
+    # send the R-tree of shapes bounding boxes to sc.sticky, in order for it be used in the other OSM components for region, point and nearest shape queries
+    sc.sticky["gismo_OSMshapesComp_spatialIndex"] = sc.sticky["gismo_SpatialIndex"](geometryProperties)
+    del geometryProperties
+    
+    
     validShapes = True
     printMsg = "ok"
     
@@ -1025,9 +1008,9 @@ def titleAndBaking(locationName, locationLatitudeD, locationLongitudeD, radiusM,
     return titleLabelMesh, titleStartPt
 
 
-def printOutput(locationName, locationLatitudeD, locationLongitudeD, radiusM, northDeg, originPt, requiredKeys, shapeType, osm_id_Only, osm_way_id_Only, osm_id_Remove, osm_way_id_Remove):
+def printOutput(locationName, locationLatitudeD, locationLongitudeD, radiusM, northDeg, originPt, requiredKeys, requiredTag, shapeType, osm_id_Only, osm_way_id_Only, osm_id_Remove, osm_way_id_Remove):
     if bakeIt_ == True:
-        bakedOrNot = "and baked "
+        bakedOrNot = "and baked %s " % gismo_preparation.bakeSummary()
     elif bakeIt_ == False:
         bakedOrNot = ""
     resultsCompletedMsg = "OSM shapes component results successfully completed %s!" % bakedOrNot
@@ -1044,8 +1027,9 @@ Radius (m): %s
 Origin: %s
 Shape type: %s
 Required keys: %s
+Required tag: %s
 Only remove Ids: %s, %s, %s, %s
-    """ % (locationName, locationLatitudeD, locationLongitudeD, northDeg, radiusM, originPt, shapeType, requiredKeys, osm_id_Only, osm_way_id_Only, osm_id_Remove, osm_way_id_Remove)
+    """ % (locationName, locationLatitudeD, locationLongitudeD, northDeg, radiusM, originPt, shapeType, requiredKeys, requiredTag, osm_id_Only, osm_way_id_Only, osm_id_Remove, osm_way_id_Remove)
     print resultsCompletedMsg
     print printOutputMsg
 
@@ -1053,6 +1037,8 @@ Only remove Ids: %s, %s, %s, %s
 level = Grasshopper.Kernel.GH_RuntimeMessageLevel.Warning
 if sc.sticky.has_key("gismoGismo_released"):
     validVersionDate, printMsg = sc.sticky["gismo_check"].versionDate(ghenv.Component)
+    if validVersionDate:
+        validVersionDate, printMsg = sc.sticky["gismo_check"].componentParams(ghenv.Component, ["requiredTag_"], [], {"requiredTag_": Grasshopper.Kernel.GH_ParamAccess.tree})
     if validVersionDate:
         gismo_mainComponent = sc.sticky["gismo_mainComponent"]()
         gismo_preparation = sc.sticky["gismo_Preparation"]()
@@ -1062,17 +1048,17 @@ if sc.sticky.has_key("gismoGismo_released"):
         locationName, locationLatitudeD, locationLongitudeD, timeZone, elevation, validLocationData, printMsg = gismo_preparation.checkLocationData(_location)
         if validLocationData:
             fileNameIncomplete = locationName + "_" + str(locationLatitudeD) + "_" + str(locationLongitudeD)  # incomplete due to missing "_radius=100KM" part
-            radiusM, northRad, northDeg, originPt, shapeType, shapeTypeLabel, requiredKeys, osm_id_Only, osm_way_id_Only, osm_id_Remove, osm_way_id_Remove, iteropMapWinGIS_dll_folderPath, unitConversionFactor, validInputData, printMsg = checkInputData(radius_, north_, origin_, shapeType_, requiredKeys_, onlyRemove_Ids_)
+            radiusM, northRad, northDeg, originPt, shapeType, shapeTypeLabel, requiredKeys, requiredTag, osm_id_Only, osm_way_id_Only, osm_id_Remove, osm_way_id_Remove, iteropMapWinGIS_dll_folderPath, unitConversionFactor, validInputData, printMsg = checkInputData(radius_, north_, origin_, shapeType_, requiredKeys_, requiredTag_, onlyRemove_Ids_)
             if validInputData:
                 if _runIt:
-                    shapeFile_filePath, fullName_keys, valid_osm_or_shp_files, printMsg = checkOsmShpFiles(locationLatitudeD, locationLongitudeD, fileNameIncomplete, radiusM, requiredKeys, shapeType)
+                    shapeFile_filePath, fullName_keys, valid_osm_or_shp_files, printMsg = checkOsmShpFiles(locationLatitudeD, locationLongitudeD, fileNameIncomplete, radiusM, requiredKeys, requiredTag, shapeType)
                     if valid_osm_or_shp_files:
-                        shortenedName_keys, values, shapes, validShapes, printMsg = createShapesKeysValues(locationName, locationLatitudeD, locationLongitudeD, shapeFile_filePath, northRad, originPt, shapeType, osm_id_Only, osm_way_id_Only, osm_id_Remove, osm_way_id_Remove, unitConversionFactor)
+                        shortenedName_keys, values, shapes, validShapes, printMsg = createShapesKeysValues(locationName, locationLatitudeD, locationLongitudeD, shapeFile_filePath, fullName_keys, northRad, originPt, shapeType, osm_id_Only, osm_way_id_Only, osm_id_Remove, osm_way_id_Remove, unitConversionFactor)
                         #keys = shortenedName_keys
                         keys = fullName_keys
                         if validShapes:
                             title, titleOriginPt = titleAndBaking(locationName, locationLatitudeD, locationLongitudeD, radiusM, northDeg, originPt, shapeType, shapeTypeLabel, shapes)
-                            printOutput(locationName, locationLatitudeD, locationLongitudeD, radiusM, northDeg, originPt, requiredKeys, shapeType, osm_id_Only, osm_way_id_Only, osm_id_Remove, osm_way_id_Remove)
+                            printOutput(locationName, locationLatitudeD, locationLongitudeD, radiusM, northDeg, originPt, requiredKeys, requiredTag, shapeType, osm_id_Only, osm_way_id_Only, osm_id_Remove, osm_way_id_Remove)
                             gc.collect()
                         else:
                             print printMsg
@@ -44,6 +44,8 @@ Provided by Gismo 0.0.1
         readMe!: ...
         requiredTag: A tag represents a combination between a key and value(s).
                      It is prerequisite for finding particular object in "OSM search" component:  so use this output as "_requiredTag" input for "OSM search" component.
+                     -
+                     It can also be used as "requiredTag_" input for "OSM shapes" component, to download only the shapes with this tag.
 """
 
 ghenv.Component.Name = "Gismo_OSM Tag"
@@ -958,7 +958,7 @@ def bakingGrouping(analysisType, analysisTypeLabel, terrainMesh_withWithoutStand
 
 def printOutput(analysisType, analysisTypeLabel, originPt, originPtElevation, northD, sunVector, hypsometricStrength, refine, unitSystem):
     if bakeIt_ == True:
-        bakedOrNot = "and baked "
+        bakedOrNot = "and baked %s " % gismo_preparation.bakeSummary()
     elif bakeIt_ == False:
         bakedOrNot = ""
     resultsCompletedMsg = "Terrain analysis component results successfully completed %s!" % bakedOrNot
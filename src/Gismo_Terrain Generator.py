@@ -1196,7 +1196,7 @@ def bakingGrouping(locationName, locationLatitudeD, locationLongitudeD, maxVisib
 
 def printOutput(northDeg, latitude, longitude, locationName, maxVisibilityRadiusM, gridSize, source, sourceLabel, _type, typeLabel, origin, workingSubFolderPath, standThickness, numOfContours):
     if bakeIt_ == True:
-        bakedOrNot = "and baked "
+        bakedOrNot = "and baked %s " % gismo_preparation.bakeSummary()
     elif bakeIt_ == False:
         bakedOrNot = ""
     resultsCompletedMsg = "Terrain generator component results successfully completed %s!" % bakedOrNot
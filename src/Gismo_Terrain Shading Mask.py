@@ -1186,7 +1186,7 @@ def printOutput(north, latitude, longitude, locationName, heightM, minVisibility
     elif maskStyle == 1:
         maskStyleLabel2 = "extruded"
     if bakeIt_ == True:
-        bakedOrNot = "and baked "
+        bakedOrNot = "and baked %s " % gismo_preparation.bakeSummary()
     elif bakeIt_ == False:
         bakedOrNot = ""
     resultsCompletedMsg = "Terrain shading mask component results successfully completed %s!" % bakedOrNot
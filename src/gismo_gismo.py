@@ -43,11 +43,16 @@ except: pass
 import rhinoscriptsyntax as rs
 import scriptcontext as sc
 import Grasshopper
+import collections
 import datetime
 import System
+import threading
+import urlparse
+import hashlib
 import shutil
 import urllib
 import Rhino
+import re
 import time
 import math
 import sys
@@ -170,6 +175,44 @@ class Check(object):
                     del component
                     del componentsCodeString
                     return validVersionDate, printMsg
+    
+    
+    def componentParams(self, component, inputNames, outputNames, inputsAccess={}):
+        """
+        check if the component has all of the inputNames and outputNames. A component placed from an older user object may miss the recently added ones.
+        Missing inputs and outputs are added after the current solution, and the component is then recomputed. Inputs have item access, unless set otherwise in inputsAccess (inputName: Grasshopper.Kernel.GH_ParamAccess)
+        """
+        missingInputNames = [name  for name in inputNames  if name not in [param.NickName  for param in component.Params.Input]]
+        missingOutputNames = [name  for name in outputNames  if name not in [param.NickName  for param in component.Params.Output]]
+        if (len(missingInputNames) == 0) and (len(missingOutputNames) == 0):
+            validParams = True
+            printMsg = "ok"
+            return validParams, printMsg
+        
+        def addMissingParams(document):
+            # component's parameters can not be changed while it is being solved
+            for side, names, params in [(Grasshopper.Kernel.GH_ParameterSide.Input, missingInputNames, component.Params.Input), (Grasshopper.Kernel.GH_ParameterSide.Output, missingOutputNames, component.Params.Output)]:
+                for name in names:
+                    param = component.CreateParameter(side, params.Count)
+                    param.Name = name
+                    param.NickName = name
+                    if side == Grasshopper.Kernel.GH_ParameterSide.Input:
+                        param.Optional = True
+                        param.Access = inputsAccess.get(name, Grasshopper.Kernel.GH_ParamAccess.item)
+                        component.Params.RegisterInputParam(param)
+                    else:
+                        component.Params.RegisterOutputParam(param)
+            component.VariableParameterMaintenance()
+            component.Params.OnParametersChanged()
+            component.ExpireSolution(False)
+        
+        component.OnPingDocument().ScheduleSolution(1, Grasshopper.Kernel.GH_Document.GH_ScheduleDelegate(addMissingParams))
+        
+        validParams = False
+        printMsg = "This component has been placed from an older version of its user object.\n" + \
+                   "The following missing inputs and outputs are being added to it: %s.\n" % ", ".join(missingInputNames + missingOutputNames) + \
+                   "The component will be recomputed afterwards. Download the newest user object from: https://github.com/stgeorges/gismo/tree/master/userObjects"
+        return validParams, printMsg
 
 
 class mainComponent(object):
@@ -318,10 +361,322 @@ class mainComponent(object):
             return iteropMapWinGIS_dll_folderPath, gdalDataPath_folderPath, validInputData, printMsg
 
 
+class DownloadManager(object):
+    """
+    download files with timeout, retry/backoff, partial file resume, integrity check and atomic rename on completion.
+    Several files can be downloaded concurrently, with a limited number of connections per each host
+    """
+    # shared between all DownloadManager instances, so that the connection limit per host applies to all components
+    hostSemaphores = {}
+    hostSemaphores_lock = threading.Lock()
+    # ETag or Last-Modified value of the server's file, per each ".part" file. A ".part" file is resumed only if its validator is known
+    partFileValidators = {}
+    
+    def __init__(self, maxConnectionsPerHost=2, timeout=100, numberOfRetries=3, backoffFactor=2, progressCallback=None):
+        self.maxConnectionsPerHost = maxConnectionsPerHost
+        self.timeout = timeout  # in seconds
+        self.numberOfRetries = numberOfRetries
+        self.backoffFactor = backoffFactor  # waiting time before n-th retry: backoffFactor**n seconds
+        self.progressCallback = progressCallback  # optional function(downloadedBytes, totalBytes, elapsedTime) called from download threads
+        
+        self.progress_lock = threading.Lock()
+        self.downloadedBytes = 0
+        self.totalBytes = 0
+        self.startTime = None
+        self.downloadStatistics = []  # [downloadLink, downloadedBytes, elapsedTime, success] per each file
+    
+    
+    def hostSemaphore(self, downloadLink):
+        """
+        semaphore which limits the number of concurrent connections to a downloadLink's host
+        """
+        host = urlparse.urlparse(downloadLink).netloc.lower()
+        DownloadManager.hostSemaphores_lock.acquire()
+        try:
+            if not DownloadManager.hostSemaphores.has_key(host):
+                DownloadManager.hostSemaphores[host] = threading.BoundedSemaphore(self.maxConnectionsPerHost)
+            semaphore = DownloadManager.hostSemaphores[host]
+        finally:
+            DownloadManager.hostSemaphores_lock.release()
+        return semaphore
+    
+    
+    def updateProgress(self, downloadedBytes, totalBytes=0):
+        """
+        add downloaded bytes (and expected bytes) to the overall progress
+        """
+        self.progress_lock.acquire()
+        try:
+            self.downloadedBytes += downloadedBytes
+            self.totalBytes += totalBytes
+            if self.startTime == None:
+                self.startTime = time.time()
+            if self.progressCallback:
+                self.progressCallback(self.downloadedBytes, self.totalBytes, time.time() - self.startTime)
+        finally:
+            self.progress_lock.release()
+    
+    
+    def removePartFile(self, partFilePath):
+        """
+        remove the ".part" file and its validator, so that the next transfer starts from the beginning
+        """
+        DownloadManager.partFileValidators.pop(partFilePath, None)
+        if os.path.isfile(partFilePath):
+            os.remove(partFilePath)
+    
+    
+    def transferFile(self, downloadLink, partFilePath):
+        """
+        download the downloadLink to partFilePath. If partFilePath already exists, the download will be resumed from its end.
+        Resume is requested with "If-Range", so the server sends the whole file if it changed in the meantime. A failed resume restarts the download from the beginning.
+        Returns the number of bytes expected to be in the partFilePath (-1 if server did not send the Content-Length)
+        """
+        alreadyDownloadedBytes = 0
+        validator = DownloadManager.partFileValidators.get(partFilePath)
+        if os.path.isfile(partFilePath):
+            if validator:
+                alreadyDownloadedBytes = os.path.getsize(partFilePath)
+            else:
+                # unknown server file version (".part" file left by a previous session, or downloaded without ETag/Last-Modified). Do not resume it
+                self.removePartFile(partFilePath)
+        
+        request = System.Net.WebRequest.Create(downloadLink)
+        request.Timeout = int(self.timeout * 1000)
+        request.ReadWriteTimeout = int(self.timeout * 1000)
+        if not isinstance(request, System.Net.HttpWebRequest):
+            alreadyDownloadedBytes = 0
+        if alreadyDownloadedBytes > 0:
+            request.AddRange(alreadyDownloadedBytes)
+            request.Headers.Set("If-Range", validator)
+        
+        try:
+            response = request.GetResponse()
+        except System.Net.WebException, e:
+            if alreadyDownloadedBytes > 0:
+                # failed resume (for example "416 Requested Range Not Satisfiable" for an already complete ".part" file). Restart the download from the beginning
+                if e.Response != None:
+                    e.Response.Close()
+                self.removePartFile(partFilePath)
+                return self.transferFile(downloadLink, partFilePath)
+            raise
+        
+        try:
+            if (alreadyDownloadedBytes > 0) and ((response.StatusCode != System.Net.HttpStatusCode.PartialContent) or (not response.Headers["Content-Range"]) or (not response.Headers["Content-Range"].startswith("bytes %s-" % alreadyDownloadedBytes))):
+                # server ignored the range request, or the file changed on the server. Start the download from the beginning
+                alreadyDownloadedBytes = 0
+            
+            if isinstance(response, System.Net.HttpWebResponse):
+                validator = response.Headers["ETag"] or response.Headers["Last-Modified"]
+                if validator and (not validator.startswith("W/")):  # weak ETags can not be used for range requests
+                    DownloadManager.partFileValidators[partFilePath] = validator
+                else:
+                    DownloadManager.partFileValidators.pop(partFilePath, None)
+            fileMode = System.IO.FileMode.Append  if (alreadyDownloadedBytes > 0)  else  System.IO.FileMode.Create
+            
+            if response.ContentLength >= 0:
+                expectedBytes = alreadyDownloadedBytes + response.ContentLength
+                self.updateProgress(0, response.ContentLength)
+            else:
+                expectedBytes = -1
+            
+            responseStream = response.GetResponseStream()
+            fileStream = System.IO.FileStream(partFilePath, fileMode, System.IO.FileAccess.Write)
+            try:
+                buffer = System.Array.CreateInstance(System.Byte, 65536)
+                while True:
+                    readBytes = responseStream.Read(buffer, 0, buffer.Length)
+                    if readBytes == 0:
+                        break
+                    fileStream.Write(buffer, 0, readBytes)
+                    self.updateProgress(readBytes)
+            finally:
+                fileStream.Close()
+                responseStream.Close()
+        finally:
+            response.Close()
+        
+        return expectedBytes
+    
+    
+    def checkIntegrity(self, partFilePath, expectedBytes, md5Checksum=None):
+        """
+        check if the downloaded file has the expected size and (optionally) md5 checksum
+        """
+        if not os.path.isfile(partFilePath):
+            return False
+        if (expectedBytes >= 0) and (os.path.getsize(partFilePath) != expectedBytes):
+            return False
+        if md5Checksum:
+            md5 = hashlib.md5()
+            with open(partFilePath, "rb") as partFile:
+                for chunk in iter(lambda: partFile.read(65536), ""):
+                    md5.update(chunk)
+            if md5.hexdigest().lower() != md5Checksum.lower():
+                return False
+        return True
+    
+    
+    def downloadFile(self, downloadLink, downloadedFilePath, md5Checksum=None):
+        """
+        download a single file with retries. Data is downloaded to a ".part" file which is renamed to downloadedFilePath only when the download is completed.
+        Returns "True" is file is successfully downloaded and "False" if download fails
+        """
+        partFilePath = downloadedFilePath + ".part"
+        fileStartTime = time.time()
+        if self.startTime == None:
+            # downloadFile called directly, not through downloadFiles
+            self.startTime = fileStartTime
+        fileStartBytes = self.downloadedBytes
+        fileDownloaded_success = False
+        
+        semaphore = self.hostSemaphore(downloadLink)
+        semaphore.acquire()
+        try:
+            for retry in xrange(self.numberOfRetries + 1):
+                if retry > 0:
+                    # exponential backoff before the next try
+                    time.sleep(self.backoffFactor ** retry)
+                try:
+                    # try "secure http" download
+                    expectedBytes = self.transferFile(downloadLink, partFilePath)
+                except Exception, e:
+                    print "downloadFile_e1: ", e
+                    if os.path.isfile(partFilePath) and DownloadManager.partFileValidators.has_key(partFilePath):
+                        # part of the file has been downloaded. Resume it with the next try
+                        continue
+                    try:
+                        # "secure http" failed, try "http" download. Resume is not supported in this case
+                        self.removePartFile(partFilePath)
+                        filePathDummy, infoHeader = urllib.urlretrieve(downloadLink, partFilePath)
+                        expectedBytes = -1
+                        if infoHeader.getheader("Content-Length"):
+                            expectedBytes = int(infoHeader.getheader("Content-Length"))
+                    except Exception, e:
+                        print "downloadFile_e2: ", e
+                        continue
+                
+                if self.checkIntegrity(partFilePath, expectedBytes, md5Checksum):
+                    # atomic rename of the completed ".part" file
+                    DownloadManager.partFileValidators.pop(partFilePath, None)
+                    if os.path.isfile(downloadedFilePath):
+                        System.IO.File.Replace(partFilePath, downloadedFilePath, None)
+                    else:
+                        System.IO.File.Move(partFilePath, downloadedFilePath)
+                    fileDownloaded_success = True
+                    break
+                elif os.path.isfile(partFilePath) and ((md5Checksum and (expectedBytes < 0)) or (os.path.getsize(partFilePath) >= expectedBytes >= 0)):
+                    # complete, but corrupted (or oversized) file. Remove it, so that the next try does not resume it
+                    self.removePartFile(partFilePath)
+        finally:
+            semaphore.release()
+        
+        self.progress_lock.acquire()
+        self.downloadStatistics.append([downloadLink, self.downloadedBytes - fileStartBytes, time.time() - fileStartTime, fileDownloaded_success])
+        self.progress_lock.release()
+        
+        return fileDownloaded_success
+    
+    
+    def downloadFiles(self, downloadLinks, downloadedFilePaths, md5Checksums=None):
+        """
+        download several files concurrently.
+        Returns a list of "True"/"False" values (for each downloadLink) depending on whether the file has been successfully downloaded or not
+        """
+        if md5Checksums == None:
+            md5Checksums = [None] * len(downloadLinks)
+        
+        self.startTime = time.time()
+        filesDownloaded_success = [False] * len(downloadLinks)
+        
+        def downloadFile_thread(index):
+            filesDownloaded_success[index] = self.downloadFile(downloadLinks[index], downloadedFilePaths[index], md5Checksums[index])
+        
+        if len(downloadLinks) == 1:
+            downloadFile_thread(0)
+        else:
+            threads = [threading.Thread(target=downloadFile_thread, args=(i,))  for i in xrange(len(downloadLinks))]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        
+        elapsedTime = time.time() - self.startTime
+        if elapsedTime > 0:
+            throughput = self.downloadedBytes / 1024.0 / elapsedTime  # in KB/s
+        else:
+            throughput = 0
+        print "Downloaded %s of %s file(s): %0.1f KB in %0.1f seconds (%0.1f KB/s)" % (filesDownloaded_success.count(True), len(downloadLinks), self.downloadedBytes/1024.0, elapsedTime, throughput)
+        
+        return filesDownloaded_success
+
+
+class GeometryCache(object):
+    """
+    least recently used cache of geometry (text meshes, legends...) created at the origin.
+    Cached geometry is never returned directly: "get" returns a duplicate translated to the wanted location
+    """
+    def __init__(self, maxCount):
+        self.maxCount = maxCount
+        self.items = collections.OrderedDict()
+        self.lock = threading.Lock()
+    
+    def get(self, key, translationVector):
+        """
+        duplicate of the geometry cached with "key", translated by "translationVector". None if there is no such geometry
+        """
+        with self.lock:
+            geometry = self.items.pop(key, None)
+            if geometry == None:
+                return None
+            self.items[key] = geometry  # most recently used item goes at the end
+        geometryDuplicate = geometry.Duplicate()
+        geometryDuplicate.Translate(translationVector)
+        return geometryDuplicate
+    
+    def set(self, key, geometry, translationVector):
+        """
+        cache a duplicate of "geometry" translated by "translationVector", so that it is located at the origin
+        """
+        geometryDuplicate = geometry.Duplicate()
+        geometryDuplicate.Translate(translationVector)
+        with self.lock:
+            self.items.pop(key, None)
+            self.items[key] = geometryDuplicate
+            while len(self.items) > self.maxCount:
+                self.items.popitem(last=False)  # remove the least recently used item
+    
+    def clear(self):
+        with self.lock:
+            self.items.clear()
+
+
+class ShiftedPathsTree(object):
+    """
+    read-only view of a data tree with its paths shifted by -1, without copying the branches contents.
+    It has the "Paths", "Branches", "BranchCount" and "Branch" members of a data tree. Branches whose shifted paths are the same are merged (only these are copied)
+    """
+    def __init__(self, paths, branches):
+        self.Paths = paths
+        self.Branches = branches
+        self.BranchCount = len(branches)
+    
+    def Branch(self, index):
+        return self.Branches[index]
+
+
 class Preparation(object):
     """
     methods used to prepare components before performing analysis/running results
     """
+    # shared between all Preparation instances, so that identical text labels are reused across solutions and components
+    textGeometryCache = GeometryCache(2000)
+    # parent/sublayer full path: layer index. Shared between all Preparation instances, so that these layers are resolved once
+    layerIndices = {}
+    # number of objects baked with this Preparation instance and the duration of their baking, reported once by the component (see "bakeSummary" method)
+    bakedObjectsCount = 0
+    bakeDuration = 0
+    
     def cleanString(self, string):
         """
         for a given string, replace "/" and "\" with "-". replace " " with "_"
@@ -390,25 +745,19 @@ class Preparation(object):
         downloading a file for the given link and filepath location.
         Returns "True" is file is successfully downloaded and "False" if download fails
         """
-        try:
-            # try "secure http" download
-            client = System.Net.WebClient()
-            client.DownloadFile(downloadLink, downloadedFilePath)
-        except Exception, e:
-            print "downloadFile_e1: ", e
-            try:
-                # "secure http" failed, try "http" download:
-                filePathDummy, infoHeader = urllib.urlretrieve(downloadLink, downloadedFilePath)
-            except Exception, e:
-                print "downloadFile_e2: ", e
-                # downloading of file failed
-                fileDownloaded_success = False
-                return fileDownloaded_success
-        
-        fileDownloaded_success = True
+        fileDownloaded_success = DownloadManager().downloadFile(downloadLink, downloadedFilePath)
         return fileDownloaded_success
     
     
+    def downloadFiles(self, downloadLinks, downloadedFilePaths, timeout=100):
+        """
+        downloading several files concurrently for the given links and filepath locations.
+        Returns a list of "True"/"False" values depending on whether each file is successfully downloaded or not
+        """
+        filesDownloaded_success = DownloadManager(timeout=timeout).downloadFiles(downloadLinks, downloadedFilePaths)
+        return filesDownloaded_success
+    
+    
     def constructLocation(self, locationName, latitude, longitude, timeZone = 0, elevation = 0):
         """
         construct .epw file location
@@ -556,6 +905,37 @@ class Preparation(object):
         return shiftedPathsTree
     
     
+    def datatree_shiftPathsView(self, dataTree):
+        """
+        shifting data tree paths by -1, without copying the branches (see "ShiftedPathsTree" class).
+        Returns the same result as "datatree_shiftPaths" method for data trees with sorted paths, otherwise falls back to it
+        """
+        branches = dataTree.Branches
+        paths = dataTree.Paths
+        
+        newPaths = []
+        newBranches = []
+        lastBranchMerged = False
+        for i in xrange(dataTree.BranchCount):
+            newPath = paths[i].CullElement()
+            pathsComparison = newPaths[-1].CompareTo(newPath) if (len(newPaths) > 0) else -1
+            if (pathsComparison == 0):
+                # merge branches with the same shifted path, like DataTree.AddRange does. The merged branch is a new list
+                if not lastBranchMerged:
+                    newBranches[-1] = list(newBranches[-1])
+                    lastBranchMerged = True
+                newBranches[-1].extend(branches[i])
+            elif (pathsComparison > 0):
+                # paths are not sorted: a data tree would reorder and merge its branches
+                return self.datatree_shiftPaths(dataTree)
+            else:
+                newPaths.append(newPath)
+                newBranches.append(branches[i])
+                lastBranchMerged = False
+        
+        return ShiftedPathsTree(newPaths, newBranches)
+    
+    
     def boundingBox_properties(self, geometryL, accurate=True):
         """
         getting volume, centroid, corner pts and dimensions of a bounding box created around a "geometry"
@@ -622,8 +1002,14 @@ class Preparation(object):
     def text2srfOrMesh(self, returnSrfOrMesh, textL, textStartPt, textSize, fontName="Verdana", bold=True, italic=False, justificationIndex=0):
         """
         convert text to surface or mesh
-        this method is based on "text2srf" method from Ladybug plugin
+        this method is based on "text2srf" method from Ladybug plugin.
+        Text geometry is cached by its text, size, font, style and justification, and reused for identical labels
         """
+        textGeometryKey = (returnSrfOrMesh, tuple([unicode(text) for text in textL]), textSize, fontName, bold, italic, int(justificationIndex))
+        joinedTextGeometry = Preparation.textGeometryCache.get(textGeometryKey, Rhino.Geometry.Vector3d(textStartPt))
+        if joinedTextGeometry != None:
+            return joinedTextGeometry
+        
         textObjectIdsL = []
         textSrfsL = []
         textMeshesL = []
@@ -661,6 +1047,9 @@ class Preparation(object):
         for textObjectId in textObjectIdsL:
             Rhino.RhinoDoc.ActiveDoc.Objects.Delete(textObjectId, quiet)
         
+        if joinedTextGeometry != None:
+            Preparation.textGeometryCache.set(textGeometryKey, joinedTextGeometry, -Rhino.Geometry.Vector3d(textStartPt))
+        
         return joinedTextGeometry
     
     
@@ -754,78 +1143,76 @@ class Preparation(object):
         return joinedTitleTextGeometry, textStartPt, textSize
     
     
+    colorRamps = collections.OrderedDict()  # least recently used cache of (customColors ARGB values, number of steps): lookup table of colors. Shared by all "Preparation" instances, so that the same ramp is not recomputed across solutions and components
+    colorRampsLock = threading.Lock()
+    
+    def colorRamp(self, customColors, numberOfSteps=1024):
+        """
+        lookup table of "numberOfSteps"+1 colors, interpolated between "customColors" at evenly spaced normalized values from 0 to 1
+        """
+        colorRampKey = (tuple([color.ToArgb() for color in customColors]), numberOfSteps)
+        with Preparation.colorRampsLock:
+            colorRamp = Preparation.colorRamps.pop(colorRampKey, None)
+            if colorRamp != None:
+                Preparation.colorRamps[colorRampKey] = colorRamp  # most recently used ramp goes at the end
+                return colorRamp
+        
+        if len(customColors) == 1:
+            colorRamp = [customColors[0]] * (numberOfSteps + 1)
+        else:
+            numberOfSegments = len(customColors) - 1
+            colorRamp = []
+            for step in xrange(numberOfSteps + 1):
+                segmentValue = step * numberOfSegments / float(numberOfSteps)
+                segmentIndex = min(int(segmentValue), numberOfSegments - 1)
+                normalizedValue2 = segmentValue - segmentIndex  # normalized for a range between two "customColors" items
+                color1 = customColors[segmentIndex]
+                color2 = customColors[segmentIndex + 1]
+                
+                # based on: http://stackoverflow.com/a/22649247/3137724
+                resultRed = int(color1.R + normalizedValue2 * (color2.R - color1.R))
+                resultGreen = int(color1.G + normalizedValue2 * (color2.G - color1.G))
+                resultBlue = int(color1.B + normalizedValue2 * (color2.B - color1.B))
+                colorRamp.append(System.Drawing.Color.FromArgb(resultRed, resultGreen, resultBlue))
+        
+        with Preparation.colorRampsLock:
+            Preparation.colorRamps[colorRampKey] = colorRamp
+            while len(Preparation.colorRamps) > 64:
+                Preparation.colorRamps.popitem(last=False)  # remove the least recently used ramp
+        return colorRamp
+    
+    
     def numberToColor(self, values, customColors, minB=None, maxB=None):
         """
-        interpolate numbers to a gradient between a list of colors
+        interpolate numbers to a gradient between a list of colors.
+        Each value is binned to the closest color of a precomputed lookup table (see "colorRamp" method)
         """
         if (len(customColors) == 0):
             customColors = self.defaultCustomColors()
         
-        if sum(values) == (len(values)*values[0]):
-            # all items in "values" are the same. Return the bottom most color
-            return [customColors[0]] * len(values)
+        if len(values) == 0:
+            return []
         
         # checking for "minB" and "maxB"
         minValue = min(values)
         maxValue = max(values)
+        if minValue == maxValue:
+            # all items in "values" are the same. Return the bottom most color
+            return [customColors[0]] * len(values)
         if minB != None:
             minValue = minB
         if maxB != None:
             maxValue = maxB
+        if maxValue <= minValue:
+            return [customColors[0]] * len(values)
         
-        # edit all "values" so that they are not smaller than "minValue", and larger than "maxValue"
-        valuesChangedFor_minB_maxB = []
-        for value in values:
-            if value < minValue:
-                valuesChangedFor_minB_maxB.append(minValue)
-            elif value > maxValue:
-                valuesChangedFor_minB_maxB.append(maxValue)
-            else:
-                valuesChangedFor_minB_maxB.append(value)
-        
-        # normalize the "values" to range(0,1)
-        normalizedValues = [(valueChanged - minValue) / (maxValue - minValue)  for valueChanged in valuesChangedFor_minB_maxB]
-        
-        # divide range(0,1) according to the number of customColors items
-        stepValueLimit = 1/(len(customColors)-1)
-        valueLimit = 0
-        valuesLimits_perEachCustomColor = []
-        for i in range(len(customColors)-1):
-            valuesLimits_perEachCustomColor.append(valueLimit)
-            valueLimit += stepValueLimit
-        valuesLimits_perEachCustomColor.append(1.0)  # this is done to avoid bugs with last value in "valuesLimits_perEachCustomColor" sometimes being 0.999..
-        
-        # generate legendColors
-        legendColors = []
-        for i in range(len(normalizedValues)):
-            color = None  # initial value
-            normalizedValue = normalizedValues[i]
-            
-            for index, valueLimit in enumerate(valuesLimits_perEachCustomColor):
-                if valueLimit >= normalizedValue:
-                    if index == 0:
-                        # if value is between 0 and next valueLimit
-                        color1 = customColors[index]
-                        color2 = customColors[index+1]
-                        minValue = valuesLimits_perEachCustomColor[index]
-                        maxValue = valuesLimits_perEachCustomColor[index+1]
-                    else:
-                        color1 = customColors[index-1]
-                        color2 = customColors[index]
-                        minValue = valuesLimits_perEachCustomColor[index-1]
-                        maxValue = valuesLimits_perEachCustomColor[index]
-                    
-                    normalizedValue2 = (normalizedValue - minValue) / (maxValue - minValue)  # normalized for a range between two "valuesLimits_perEachCustomColor" numbers
-                    
-                    # based on: http://stackoverflow.com/a/22649247/3137724
-                    resultRed = color1.R + normalizedValue2 * (color2.R - color1.R)
-                    resultGreen = color1.G + normalizedValue2 * (color2.G - color1.G)
-                    resultBlue = color1.B + normalizedValue2 * (color2.B - color1.B)
-                    
-                    color = System.Drawing.Color.FromArgb(resultRed, resultGreen, resultBlue)
-                    
-                    legendColors.append(color)
-                    break
+        numberOfSteps = 1024
+        colorRamp = self.colorRamp(customColors, numberOfSteps)
+        
+        # "values" smaller than "minValue" and larger than "maxValue" get the first and last colors of the ramp
+        scale = numberOfSteps / float(maxValue - minValue)
+        offset = 0.5 - minValue * scale  # rounding to the closest ramp step
+        legendColors = [colorRamp[min(max(int(value * scale + offset), 0), numberOfSteps)] for value in values]
         
         return legendColors
     
@@ -884,20 +1271,23 @@ class Preparation(object):
         layParent.Color = System.Drawing.Color.FromArgb(29,42,85)
         laySub.Color = laySubName_color
         
-        # adding parent/sublayers
-        layParentIndex = layerT.Find(layParentName, True)
-        if layParentIndex >= 0:
-            parent = layerT[layParentIndex]
-            laySub.ParentLayerId = parent.Id
-            index = layerT.Add(laySub)
-        else:
-            layerT.Add(layParent)
-        laySubIndex = Rhino.DocObjects.Tables.LayerTable.FindByFullPath(layerT, laySubPath, True)
-        if laySubIndex < 0:
+        # adding parent/sublayers, unless they have already been resolved
+        laySubIndex = Preparation.layerIndices.get(laySubPath, -1)
+        if (laySubIndex < 0) or (laySubIndex >= layerT.Count) or layerT[laySubIndex].IsDeleted or (layerT[laySubIndex].FullPath != laySubPath):
             layParentIndex = layerT.Find(layParentName, True)
-            parent = layerT[layParentIndex]
-            laySub.ParentLayerId = parent.Id
-            index = layerT.Add(laySub)
+            if layParentIndex >= 0:
+                parent = layerT[layParentIndex]
+                laySub.ParentLayerId = parent.Id
+                index = layerT.Add(laySub)
+            else:
+                layerT.Add(layParent)
+            laySubIndex = Rhino.DocObjects.Tables.LayerTable.FindByFullPath(layerT, laySubPath, True)
+            if laySubIndex < 0:
+                layParentIndex = layerT.Find(layParentName, True)
+                parent = layerT[layParentIndex]
+                laySub.ParentLayerId = parent.Id
+                laySubIndex = layerT.Add(laySub)
+            Preparation.layerIndices[laySubPath] = laySubIndex
         
         # check projectName
         if projectName:
@@ -909,8 +1299,7 @@ class Preparation(object):
             return None, None
         
         # setting up and adding projectname_n layers
-        layerPCAIndex = layerT.Find(laySubName, True)
-        layerPCA = layerT[layerPCAIndex]
+        layerPCA = layerT[laySubIndex]
         project_n = Rhino.DocObjects.Layer.GetDefaultLayerProperties()
         project_n.IsVisible = False
         project_n.ParentLayerId = layerPCA.Id
@@ -969,9 +1358,23 @@ class Preparation(object):
         return categoryIndex, categoryL.Name
     
     
+    # geometry type: name of the "Rhino.RhinoDoc.ActiveDoc.Objects" method which adds it to the Rhino scene
+    bakeMethodNames = {
+    Rhino.Geometry.Circle: "AddCircle",
+    Rhino.Geometry.Extrusion: "AddExtrusion",
+    Rhino.Geometry.Line: "AddLine",
+    Rhino.Geometry.Point3d: "AddPoint",
+    Rhino.Geometry.Polyline: "AddPolyline",
+    Rhino.Geometry.Sphere: "AddSphere",
+    Rhino.Geometry.TextEntity: "AddText"}
+    for geometryBaseType in [Rhino.Geometry.AnnotationBase, Rhino.Geometry.Brep, Rhino.Geometry.BrepLoop, Rhino.Geometry.Curve, Rhino.Geometry.PolyCurve, Rhino.Geometry.NurbsCurve, Rhino.Geometry.DetailView, Rhino.Geometry.Hatch, Rhino.Geometry.Light, Rhino.Geometry.Mesh, Rhino.Geometry.Point, Rhino.Geometry.Point3dGrid, Rhino.Geometry.PointCloud, Rhino.Geometry.Surface, Rhino.Geometry.NurbsSurface, Rhino.Geometry.TextDot]:
+        bakeMethodNames[geometryBaseType] = "Add"
+    del geometryBaseType
+    
     def bakeGeometry(self, geometryToBakeL, layerIndex):
         """
-        add the geometry to the Rhino scene
+        add the geometry to the Rhino scene.
+        Objects are grouped by their type and added with the viewport redraw disabled, as a single undo record. Returns the ids in "geometryToBakeL" order
         """
         # attributes
         attr = Rhino.DocObjects.ObjectAttributes()
@@ -979,39 +1382,79 @@ class Preparation(object):
         attr.ColorSource = Rhino.DocObjects.ObjectColorSource.ColorFromObject
         attr.PlotColorSource = Rhino.DocObjects.ObjectPlotColorSource.PlotColorFromObject
         
-        # bake
-        geometryBaseTypes = [Rhino.Geometry.AnnotationBase, Rhino.Geometry.Brep, Rhino.Geometry.BrepLoop, Rhino.Geometry.Curve, Rhino.Geometry.PolyCurve, Rhino.Geometry.NurbsCurve, Rhino.Geometry.DetailView, Rhino.Geometry.Hatch, Rhino.Geometry.Light, Rhino.Geometry.Mesh, Rhino.Geometry.Point, Rhino.Geometry.Point3dGrid, Rhino.Geometry.PointCloud, Rhino.Geometry.Surface, Rhino.Geometry.NurbsSurface, Rhino.Geometry.TextDot]
-        geometryIds = []
-        for obj in geometryToBakeL:
-            if type(obj) in geometryBaseTypes:
-                id = Rhino.RhinoDoc.ActiveDoc.Objects.Add(obj, attr)
-            elif type(obj) == Rhino.Geometry.Circle:
-                id = Rhino.RhinoDoc.ActiveDoc.Objects.AddCircle(obj, attr)
-            elif type(obj) == Rhino.Geometry.Extrusion:
-                id = Rhino.RhinoDoc.ActiveDoc.Objects.AddExtrusion(obj, attr)
-            elif type(obj) == Rhino.Geometry.Line:
-                id = Rhino.RhinoDoc.ActiveDoc.Objects.AddLine(obj, attr)
-            elif type(obj) == Rhino.Geometry.Plane:
-                id = Rhino.RhinoDoc.ActiveDoc.Objects.AddPoint(obj.Origin, attr)
-            elif type(obj) == Rhino.Geometry.Point3d:
-                id = Rhino.RhinoDoc.ActiveDoc.Objects.AddPoint(obj, attr)
-            elif type(obj) == Rhino.Geometry.Polyline:
-                id = Rhino.RhinoDoc.ActiveDoc.Objects.AddPolyline(obj, attr)
-            elif type(obj) == Rhino.Geometry.Sphere:
-                id = Rhino.RhinoDoc.ActiveDoc.Objects.AddSphere(obj, attr)
-            elif type(obj) == Rhino.Geometry.TextEntity:
-                id = Rhino.RhinoDoc.ActiveDoc.Objects.AddText(obj, attr)
+        # group the objects by their type. Nothing is baked if any of the types is not valid
+        objectsIndices_perType = {}
+        for objIndex, obj in enumerate(geometryToBakeL):
+            objType = type(obj)
+            if objType in objectsIndices_perType:
+                objectsIndices_perType[objType].append(objIndex)
+            elif (objType in Preparation.bakeMethodNames) or (objType == Rhino.Geometry.Plane):
+                objectsIndices_perType[objType] = [objIndex]
             else:
                 #del geometryToBakeL
                 print "######## no valid type has been found for particular item in \"geometryToBakeL\""
-                print "type(obj): ", type(obj)
+                print "type(obj): ", objType
                 return None  # no valid type has been found for particular item in "geometryToBakeL"
-            geometryIds.append(id)
+        
+        # bake
+        startTime = time.time()
+        objectTable = Rhino.RhinoDoc.ActiveDoc.Objects
+        views = Rhino.RhinoDoc.ActiveDoc.Views
+        redrawEnabled = views.RedrawEnabled
+        views.RedrawEnabled = False
+        undoRecordSerialNumber = Rhino.RhinoDoc.ActiveDoc.BeginUndoRecord("Gismo bake")
+        geometryIds = [None] * len(geometryToBakeL)
+        try:
+            for objType, objectsIndices in objectsIndices_perType.items():
+                if objType == Rhino.Geometry.Plane:
+                    for objIndex in objectsIndices:
+                        geometryIds[objIndex] = objectTable.AddPoint(geometryToBakeL[objIndex].Origin, attr)
+                else:
+                    addMethod = getattr(objectTable, Preparation.bakeMethodNames[objType])
+                    for objIndex in objectsIndices:
+                        geometryIds[objIndex] = addMethod(geometryToBakeL[objIndex], attr)
+        finally:
+            Rhino.RhinoDoc.ActiveDoc.EndUndoRecord(undoRecordSerialNumber)
+            views.RedrawEnabled = redrawEnabled
+        
+        self.bakedObjectsCount += len(geometryIds)
+        self.bakeDuration += time.time() - startTime
         
         del geometryToBakeL
         return geometryIds
     
     
+    def bakeSummary(self):
+        """
+        number of objects baked with "bakeGeometry" method of this Preparation instance, their baking duration and rate, for the component's results message
+        """
+        return "(%s objects in %0.2f seconds, %0.0f objects/s)" % (self.bakedObjectsCount, self.bakeDuration, self.bakedObjectsCount / max(self.bakeDuration, 0.001))
+    
+    
+    def bakeInstances(self, prototypesL, transformsLL, layerIndex, blockName):
+        """
+        add each of the prototype geometries to the Rhino scene as a block definition, and its transforms as the instances of that block
+        """
+        # attributes
+        attr = Rhino.DocObjects.ObjectAttributes()
+        attr.LayerIndex = layerIndex
+        attr.ColorSource = Rhino.DocObjects.ObjectColorSource.ColorFromObject
+        attr.PlotColorSource = Rhino.DocObjects.ObjectPlotColorSource.PlotColorFromObject
+        
+        # bake
+        instanceIds = []
+        for prototypeIndex, prototype in enumerate(prototypesL):
+            blockDefinitionName = blockName + "_" + str(prototypeIndex) + "_" + str(time.time())
+            blockDefinitionIndex = Rhino.RhinoDoc.ActiveDoc.InstanceDefinitions.Add(blockDefinitionName, "", Rhino.Geometry.Point3d(0,0,0), [prototype], [attr])
+            for transform in transformsLL[prototypeIndex]:
+                id = Rhino.RhinoDoc.ActiveDoc.Objects.AddInstanceObject(blockDefinitionIndex, transform, attr)
+                instanceIds.append(id)
+        
+        del prototypesL
+        del transformsLL
+        return instanceIds
+    
+    
     def groupGeometry(self, groupName, geometryIds):
         """
         group the rhino geometry based on rhino ids
@@ -1026,6 +1469,9 @@ class CreateGeometry():
     """
     methods which create some sort of geometry
     """
+    # shared between all CreateGeometry instances, so that identical legends are reused across solutions and components
+    legendGeometryCache = GeometryCache(100)
+    
     def calculateMeshFaceAreas(self, mesh):
         """
         calculate each mesh face area
@@ -1096,7 +1542,8 @@ class CreateGeometry():
     
     def createLegend(self, geometryL, values, legendBakePar, legendUnit=None):
         """
-        create a legend for the given "values"
+        create a legend for the given "values".
+        The legend mesh is cached by its cells, colors, sizes and texts, and reused for identical legends
         """
         # read the "legendBakePar_"
         myGismo_preparation = Preparation()
@@ -1112,7 +1559,7 @@ class CreateGeometry():
             # something inputted into "legendUnit_" input of "Legend Bake Parameter" component
             legendUnit = customLegendUnit
         
-        if sum(values) == (len(values)*values[0]):
+        if min(values) == max(values):
             # # all items in "values" are the same: meaning all colors will be the same. Set the "numLegendCells" to 1
             numLegendCells = 1
         
@@ -1148,6 +1595,18 @@ class CreateGeometry():
         legendStartPt = Rhino.Geometry.Point3d(bb_bottomRightCorner)
         legendStartPlane = Rhino.Geometry.Plane(legendStartPt, Rhino.Geometry.Vector3d(0,0,1))
         
+        # the legend geometry relative to "legendStartPt" depends only on these
+        legendGeometryKey = (legendStyle, numLegendCells, tuple(cellNumbers), tuple([color.ToArgb() for color in cellColors]), bb_depth * 0.1, legendCellWidth, legendCellHeight, cellNumber_textSize, fontName, numDecimals, unicode(legendUnit))
+        legend_allMeshes_joined = CreateGeometry.legendGeometryCache.get(legendGeometryKey, Rhino.Geometry.Vector3d(legendStartPt))
+        if legend_allMeshes_joined != None:
+            # orient the whole legend in case "legendPlane_" has been defined
+            if (legendPlane != None):
+                transformMatrix = Rhino.Geometry.Transform.PlaneToPlane(legendStartPlane, legendPlane)
+                transformSuccess = legend_allMeshes_joined.Transform(transformMatrix)
+                return legend_allMeshes_joined, legendPlane
+            else:
+                return legend_allMeshes_joined, legendStartPlane
+        
         bottomCellStartPt = Rhino.Geometry.Point3d(legendStartPt.X + (bb_depth * 0.1), legendStartPt.Y, legendStartPt.Z)
         bottomCellStartPlane = Rhino.Geometry.Plane(bottomCellStartPt, Rhino.Geometry.Vector3d(0,0,1))
         
@@ -1234,6 +1693,7 @@ class CreateGeometry():
         legend_allMeshes_joined.Append(legendCells_joinedMesh)
         legend_allMeshes_joined.Append(cellNumber_joinedMesh)
         legend_allMeshes_joined.Append(legendUnits_mesh)
+        CreateGeometry.legendGeometryCache.set(legendGeometryKey, legend_allMeshes_joined, -Rhino.Geometry.Vector3d(legendStartPt))
         
         
         # orient the whole legend in case "legendPlane_" has been defined
@@ -1326,16 +1786,332 @@ class CreateGeometry():
         return divisionPts, compassCrvs, textLabels
     
     
-    def liftingOSMshapes_from_groundTerrain(self, shapesL, groundBrep_singleBrepFace, height, minHeight=None, bottomCrvControlPt_highestZcoord=None):
+    def shapesCentroidsIndex(self, centroids, areas):
+        """
+        index the centroids (and their shapes areas) of closed curves in an R-tree.
+        Used for "containedShapesArea" queries
+        """
+        rtree = Rhino.Geometry.RTree()
+        for shapeIndex, centroid in enumerate(centroids):
+            if centroid != None:  # open or invalid curve
+                rtree.Insert(centroid, shapeIndex)
+        
+        return [rtree, centroids, areas]
+    
+    
+    def containedShapesArea(self, shapesCentroidsIndex, outerShape, plane, tolerance):
+        """
+        sum of areas of the shapes (indexed with "shapesCentroidsIndex" method) whose centroids are inside of the outerShape closed curve
+        """
+        rtree, centroids, areas = shapesCentroidsIndex
+        
+        # only the centroids inside of the outerShape bounding box are checked
+        outerShapeBoundingBox = outerShape.GetBoundingBox(True)
+        toleranceVector = Rhino.Geometry.Vector3d(tolerance, tolerance, tolerance)
+        searchBoundingBox = Rhino.Geometry.BoundingBox(outerShapeBoundingBox.Min - toleranceVector, outerShapeBoundingBox.Max + toleranceVector)
+        candidateShapeIndices = []
+        def searchCallback(sender, e):
+            candidateShapeIndices.append(e.Id)
+        rtree.Search(searchBoundingBox, searchCallback)
+        
+        innerShapesTotalArea = 0
+        for shapeIndex in sorted(candidateShapeIndices):
+            pointContainment = outerShape.Contains(centroids[shapeIndex], plane, tolerance)
+            if (pointContainment == Rhino.Geometry.PointContainment.Inside):
+                innerShapesTotalArea += areas[shapeIndex]
+        
+        return innerShapesTotalArea
+    
+    
+    def pointInPolygon(self, pt, polygonPts):
+        """
+        check if the pt (x,y tuple) is inside of the polygon (list of x,y tuples), with the even-odd rule
+        """
+        x, y = pt
+        inside = False
+        x1, y1 = polygonPts[-1]
+        for x2, y2 in polygonPts:
+            if ((y1 > y) != (y2 > y)) and (x < x1 + (y - y1) * (x2 - x1) / (y2 - y1)):
+                inside = not inside
+            x1, y1 = x2, y2
+        
+        return inside
+    
+    
+    def polygonSignedArea(self, xs, ys, polygonIndices):
+        """
+        signed area of the polygon. Positive for counter clockwise polygons
+        """
+        doubleSignedArea = 0
+        for k in xrange(len(polygonIndices)):
+            a = polygonIndices[k-1]
+            b = polygonIndices[k]
+            doubleSignedArea += xs[a] * ys[b] - xs[b] * ys[a]
+        
+        return doubleSignedArea / 2
+    
+    
+    def segmentsIntersect(self, x1, y1, x2, y2, x3, y3, x4, y4):
+        """
+        check if the segments (x1,y1)-(x2,y2) and (x3,y3)-(x4,y4) cross each other. Touching at the end points is not considered as crossing
+        """
+        d1 = (x4 - x3) * (y1 - y3) - (y4 - y3) * (x1 - x3)
+        d2 = (x4 - x3) * (y2 - y3) - (y4 - y3) * (x2 - x3)
+        d3 = (x2 - x1) * (y3 - y1) - (y2 - y1) * (x3 - x1)
+        d4 = (x2 - x1) * (y4 - y1) - (y2 - y1) * (x4 - x1)
+        
+        return (((d1 > 0) and (d2 < 0)) or ((d1 < 0) and (d2 > 0))) and (((d3 > 0) and (d4 < 0)) or ((d3 < 0) and (d4 > 0)))
+    
+    
+    def outlineIndex(self, outlinePts):
+        """
+        index of an outline polygon (list of x,y tuples) for fast classification of other polygons against it (see "classifyPolygonAgainstOutline" method).
+        Outline segments are bucketed into horizontal bands, so that only the segments near the tested polygon are checked for crossing
+        """
+        xs = [x  for x, y in outlinePts]
+        ys = [y  for x, y in outlinePts]
+        minX = min(xs); maxX = max(xs); minY = min(ys); maxY = max(ys)
+        numberOfBands = max(len(outlinePts) // 4, 1)
+        bandHeight = max((maxY - minY) / float(numberOfBands), 1e-9)
+        
+        bands = [[]  for bandIndex in xrange(numberOfBands)]
+        for k in xrange(len(outlinePts)):
+            x1, y1 = outlinePts[k-1]
+            x2, y2 = outlinePts[k]
+            firstBandIndex = min(int((min(y1, y2) - minY) / bandHeight), numberOfBands - 1)
+            lastBandIndex = min(int((max(y1, y2) - minY) / bandHeight), numberOfBands - 1)
+            for bandIndex in xrange(firstBandIndex, lastBandIndex + 1):
+                bands[bandIndex].append((x1, y1, x2, y2))
+        
+        return outlinePts, (minX, minY, maxX, maxY), bandHeight, bands
+    
+    
+    def classifyPolygonAgainstOutline(self, polygonsPtsL, outlineIndex):
+        """
+        classify the polygons (outer polygon and its holes, each one a list of x,y tuples) against the outline created with "outlineIndex" method.
+        Returns 1 if the polygons are inside the outline, -1 if they are outside of it, and 0 if they cross the outline (or if that can not be determined)
+        """
+        outlinePts, (minX, minY, maxX, maxY), bandHeight, bands = outlineIndex
+        
+        polygonsMinX = min([x  for polygonPts in polygonsPtsL  for x, y in polygonPts])
+        polygonsMaxX = max([x  for polygonPts in polygonsPtsL  for x, y in polygonPts])
+        polygonsMinY = min([y  for polygonPts in polygonsPtsL  for x, y in polygonPts])
+        polygonsMaxY = max([y  for polygonPts in polygonsPtsL  for x, y in polygonPts])
+        if (polygonsMaxX < minX) or (polygonsMinX > maxX) or (polygonsMaxY < minY) or (polygonsMinY > maxY):
+            # bounding boxes do not overlap
+            return -1
+        
+        # crossing of the polygons and outline segments
+        numberOfBands = len(bands)
+        for polygonPts in polygonsPtsL:
+            for k in xrange(len(polygonPts)):
+                x1, y1 = polygonPts[k-1]
+                x2, y2 = polygonPts[k]
+                if (max(y1, y2) < minY) or (min(y1, y2) > maxY):
+                    continue
+                firstBandIndex = max(min(int((min(y1, y2) - minY) / bandHeight), numberOfBands - 1), 0)
+                lastBandIndex = max(min(int((max(y1, y2) - minY) / bandHeight), numberOfBands - 1), 0)
+                for bandIndex in xrange(firstBandIndex, lastBandIndex + 1):
+                    for x3, y3, x4, y4 in bands[bandIndex]:
+                        if self.segmentsIntersect(x1, y1, x2, y2, x3, y3, x4, y4):
+                            return 0
+        
+        # no crossing: the polygons are either completely inside or completely outside the outline, or the outline is inside of them
+        verticesInside = [self.pointInPolygon(pt, outlinePts)  for polygonPts in polygonsPtsL  for pt in polygonPts]
+        if all(verticesInside):
+            return 1
+        elif any(verticesInside):
+            # a vertex lies on the outline
+            return 0
+        elif self.pointInPolygon(outlinePts[0], polygonsPtsL[0]):
+            # the outline is inside of the polygons
+            return 0
+        else:
+            return -1
+    
+    
+    def bridgePolygonHoles(self, xs, ys, outerIndices, holesIndicesL):
+        """
+        connect each hole to the outer polygon with a bridge (two coincident edges), so that the polygon with holes becomes a single polygon which can be triangulated with ear clipping.
+        The outer polygon needs to be counter clockwise, and the holes clockwise. Returns None if a hole can not be bridged (invalid polygon).
+        Based on: Eberly D., "Triangulation by Ear Clipping" (2008)
+        """
+        def cross(x1, y1, x2, y2, x3, y3):
+            return (x2 - x1) * (y3 - y1) - (y2 - y1) * (x3 - x1)
+        
+        polygonIndices = list(outerIndices)
+        
+        # holes are bridged from right to left, each one from its rightmost vertex
+        holesIndicesL = sorted(holesIndicesL, key=lambda holeIndices: -max([xs[i]  for i in holeIndices]))
+        for holeIndices in holesIndicesL:
+            rightmostPosition = max(xrange(len(holeIndices)), key=lambda position: xs[holeIndices[position]])
+            m = holeIndices[rightmostPosition]
+            mx = xs[m];  my = ys[m]
+            n = len(polygonIndices)
+            
+            # the closest polygon edge hit by the ray from m towards +X. Its end with larger X is the first bridge candidate.
+            # Positions (not vertex indices) are used, as the vertices of the already bridged holes appear twice in the polygonIndices
+            hitX = None
+            bridgePosition = None
+            for position in xrange(n):
+                a = polygonIndices[position];  b = polygonIndices[(position + 1) % n]
+                if (ys[a] <= my <= ys[b]) and (ys[a] != ys[b]):  # only the edges going up can be hit from the inside of a counter clockwise polygon
+                    x = xs[a] + (my - ys[a]) * (xs[b] - xs[a]) / (ys[b] - ys[a])
+                    if (x >= mx) and ((hitX == None) or (x < hitX)):
+                        hitX = x
+                        bridgePosition = position  if (xs[a] > xs[b])  else  (position + 1) % n
+            if hitX == None:
+                return None
+            
+            # reflex vertices inside of the triangle (m, hit point, first bridge candidate) would block the bridge. Use the one with the smallest angle to the ray instead.
+            # Of the several copies of a vertex, only the one whose wedge (the angle between its polygon edges) contains the bridge direction can be used
+            p = polygonIndices[bridgePosition]
+            px = xs[p];  py = ys[p]
+            bestAngleAndDistance = None
+            for position in xrange(n):
+                v = polygonIndices[position]
+                vx = xs[v];  vy = ys[v]
+                if (vx <= mx) or (vx > max(px, hitX)):
+                    continue
+                d1 = cross(mx, my, hitX, my, vx, vy);  d2 = cross(hitX, my, px, py, vx, vy);  d3 = cross(px, py, mx, my, vx, vy)
+                if ((d1 < 0) or (d2 < 0) or (d3 < 0)) and ((d1 > 0) or (d2 > 0) or (d3 > 0)):
+                    continue  # outside of the triangle
+                
+                previousV = polygonIndices[position - 1];  nextV = polygonIndices[(position + 1) % n]
+                toPrevious = cross(xs[previousV], ys[previousV], vx, vy, mx, my) >= 0
+                toNext = cross(vx, vy, xs[nextV], ys[nextV], mx, my) >= 0
+                if cross(xs[previousV], ys[previousV], vx, vy, xs[nextV], ys[nextV]) >= 0:
+                    bridgeInsideWedge = toPrevious and toNext  # convex vertex
+                else:
+                    bridgeInsideWedge = toPrevious or toNext  # reflex vertex
+                if not bridgeInsideWedge:
+                    continue
+                
+                angleAndDistance = (abs(vy - my) / (vx - mx), vx - mx)
+                if (bestAngleAndDistance == None) or (angleAndDistance < bestAngleAndDistance):
+                    bestAngleAndDistance = angleAndDistance
+                    bridgePosition = position
+            
+            holeFromRightmost = holeIndices[rightmostPosition:] + holeIndices[:rightmostPosition]
+            polygonIndices = polygonIndices[:bridgePosition+1] + holeFromRightmost + [m, polygonIndices[bridgePosition]] + polygonIndices[bridgePosition+1:]
+        
+        return polygonIndices
+    
+    
+    def earClippingTriangulation(self, xs, ys, polygonIndices):
+        """
+        triangulate a counter clockwise polygon with ear clipping. Returns a list of (a,b,c) vertex indices of the triangles, or None if no ear can be found (self intersecting polygon)
+        """
+        def cross(a, b, c):
+            return (xs[b] - xs[a]) * (ys[c] - ys[a]) - (ys[b] - ys[a]) * (xs[c] - xs[a])
+        
+        remaining = list(polygonIndices)
+        triangles = []
+        k = 0
+        numberOfChecksWithoutEar = 0
+        while len(remaining) > 3:
+            n = len(remaining)
+            k = k % n
+            a, b, c = remaining[k-1], remaining[k], remaining[(k+1) % n]
+            isEar = cross(a, b, c) > 0  # convex vertex
+            if isEar:
+                # no other polygon vertex can be inside of the ear or on its diagonal (bridged holes have collinear and duplicated vertices)
+                for m in remaining:
+                    if (m == a) or (m == b) or (m == c):
+                        continue
+                    if ((xs[m], ys[m]) == (xs[a], ys[a])) or ((xs[m], ys[m]) == (xs[b], ys[b])) or ((xs[m], ys[m]) == (xs[c], ys[c])):
+                        continue
+                    if (cross(a, b, m) >= 0) and (cross(b, c, m) >= 0) and (cross(c, a, m) >= 0):
+                        isEar = False
+                        break
+            
+            if isEar:
+                triangles.append((a, b, c))
+                del remaining[k]
+                numberOfChecksWithoutEar = 0
+            elif numberOfChecksWithoutEar > n:
+                # no ear has been found after checking all vertices
+                return None
+            else:
+                k += 1
+                numberOfChecksWithoutEar += 1
+        
+        triangles.append(tuple(remaining))
+        
+        return triangles
+    
+    
+    def extrudedPolygonMesh(self, outerPts, holesPtsL, bottomZ, topZ):
+        """
+        mesh of the polygon (with holes) extruded from bottomZ to topZ. Polygons are lists of (x,y) tuples.
+        Top and bottom faces are triangulated with ear clipping. Top, bottom and side faces do not share vertices (the mesh is not welded), so that each of them has its own normals.
+        Returns None if the polygon can not be triangulated
+        """
+        xs = []
+        ys = []
+        ringsIndices = []
+        for ringIndex, ringPts in enumerate([outerPts] + holesPtsL):
+            ringIndices = range(len(xs), len(xs) + len(ringPts))
+            for x, y in ringPts:
+                xs.append(x)
+                ys.append(y)
+            # the outer polygon needs to be counter clockwise, and the holes clockwise
+            signedArea = self.polygonSignedArea(xs, ys, ringIndices)
+            if ((ringIndex == 0) and (signedArea < 0)) or ((ringIndex != 0) and (signedArea > 0)):
+                ringIndices.reverse()
+            ringsIndices.append(ringIndices)
+        
+        polygonIndices = self.bridgePolygonHoles(xs, ys, ringsIndices[0], ringsIndices[1:])
+        if polygonIndices == None:
+            return None
+        triangles = self.earClippingTriangulation(xs, ys, polygonIndices)
+        if triangles == None:
+            return None
+        
+        mesh = Rhino.Geometry.Mesh()
+        numberOfPts = len(xs)
+        # top and bottom faces
+        for x, y in zip(xs, ys):
+            mesh.Vertices.Add(x, y, topZ)
+        for x, y in zip(xs, ys):
+            mesh.Vertices.Add(x, y, bottomZ)
+        for a, b, c in triangles:
+            mesh.Faces.AddFace(a, b, c)
+            mesh.Faces.AddFace(numberOfPts + c, numberOfPts + b, numberOfPts + a)
+        
+        # side faces
+        for ringIndices in ringsIndices:
+            for k in xrange(len(ringIndices)):
+                a = ringIndices[k-1]
+                b = ringIndices[k]
+                firstVertexIndex = mesh.Vertices.Count
+                mesh.Vertices.Add(xs[a], ys[a], bottomZ)
+                mesh.Vertices.Add(xs[b], ys[b], bottomZ)
+                mesh.Vertices.Add(xs[b], ys[b], topZ)
+                mesh.Vertices.Add(xs[a], ys[a], topZ)
+                mesh.Faces.AddFace(firstVertexIndex, firstVertexIndex + 1, firstVertexIndex + 2, firstVertexIndex + 3)
+        
+        mesh.Normals.ComputeNormals()
+        mesh.Compact()
+        
+        return mesh
+    
+    
+    def liftingOSMshapes_from_groundTerrain(self, shapesL, groundBrep_singleBrepFace, height, minHeight=None, bottomCrvControlPt_highestZcoord=None, terrainSampler=None):
         """
-        projecting OSM shapes to groundTerrain_ and then lifting them to a plane for height or minHeight above the highest shape point
+        projecting OSM shapes to groundTerrain_ and then lifting them to a plane for height or minHeight above the highest shape point.
+        If terrainSampler (created for the groundBrep_singleBrepFace) is supplied, all shapes are draped onto the terrain with a single heights lookup, instead of being projected to the groundBrep_singleBrepFace one by one
         """
         topCrvs = []
         tol = Rhino.RhinoDoc.ActiveDoc.ModelAbsoluteTolerance
+        if (groundBrep_singleBrepFace != None) and (terrainSampler != None):
+            drapedShapesCrvsL = terrainSampler.drapeCurves(shapesL)
         for shapeIndex, shape in enumerate(shapesL):
             if (groundBrep_singleBrepFace == None):
                 projectionPlane = Rhino.Geometry.Plane(Rhino.Geometry.Point3d(0,0,shape.PointAtStart.Z), Rhino.Geometry.Vector3d(0,0,1))  # it always be constant because each shapesL has a constant height (coming from "OSM shapes" component)
                 projectedShapeCrvs = [Rhino.Geometry.Curve.ProjectToPlane(shape, projectionPlane)]
+            elif (terrainSampler != None):
+                projectedShapeCrvs = drapedShapesCrvsL[shapeIndex]
             elif (groundBrep_singleBrepFace != None):
                 projectionDirection = Rhino.Geometry.Vector3d(0,0,1)  # it can be projectionDirection = Rhino.Geometry.Vector3d(0,0,-1) as well, does not matter
                 projectedShapeCrvs = Rhino.Geometry.Curve.ProjectToBrep(shape, groundBrep_singleBrepFace, projectionDirection, tol)
@@ -1393,69 +2169,174 @@ class CreateGeometry():
         return topCrvs, bottomCrvControlPt_highestZcoord
     
     
-    def createRenderMesh(self, mesh, u):
+    def mergeMeshesByColor(self, meshesL, colorsL):
+        """
+        merge the meshes into a single mesh. Meshes of the same color are merged together first, and then each of these batches is colored at once, instead of adding the vertex colors one by one.
+        colorsL items can be None for meshes which have already been colored
+        """
+        colorBatches = {}  # color ARGB: [color, batchMesh]
+        colorBatchesOrder = []
+        coloredMeshes = []
+        for mesh, color in zip(meshesL, colorsL):
+            if (color == None):
+                coloredMeshes.append(mesh)
+                continue
+            argb = color.ToArgb()
+            if not colorBatches.has_key(argb):
+                colorBatches[argb] = [color, Rhino.Geometry.Mesh()]
+                colorBatchesOrder.append(argb)
+            colorBatches[argb][1].Append(mesh)
+        
+        joinedMesh = Rhino.Geometry.Mesh()
+        for argb in colorBatchesOrder:
+            color, batchMesh = colorBatches[argb]
+            batchMesh.VertexColors.CreateMonotoneMesh(color)
+            joinedMesh.Append(batchMesh)
+        for mesh in coloredMeshes:
+            joinedMesh.Append(mesh)
+        
+        del meshesL
+        del colorBatches
+        return joinedMesh
+    
+    
+    def saveTextureImage(self, pixels, imageWidth, imageHeight, u):
+        """
+        write the pixels (Int32 ARGB values, row by row from the top of the image) to a png texture image at once
+        """
+        bmb = System.Drawing.Bitmap(imageWidth, imageHeight, System.Drawing.Imaging.PixelFormat.Format32bppArgb)
+        bitmapData = bmb.LockBits(System.Drawing.Rectangle(0, 0, imageWidth, imageHeight), System.Drawing.Imaging.ImageLockMode.WriteOnly, System.Drawing.Imaging.PixelFormat.Format32bppArgb)
+        System.Runtime.InteropServices.Marshal.Copy(pixels, 0, bitmapData.Scan0, imageWidth * imageHeight)  # one Int32 ARGB value per pixel has the same memory layout as Format32bppArgb bitmap
+        bmb.UnlockBits(bitmapData)
+        
+        # png encoding is streamed to the file
+        fileStream = System.IO.FileStream(u, System.IO.FileMode.Create, System.IO.FileAccess.Write, System.IO.FileShare.None, 65536)
+        try:
+            bmb.Save(fileStream, System.Drawing.Imaging.ImageFormat.Png)
+        finally:
+            fileStream.Close()
+            bmb.Dispose()
+    
+    
+    def createPaletteRenderMesh(self, mesh, verticesARGB, u):
+        """
+        create render mesh with a palette texture image: each distinct vertex color gets a block of 4x4 pixels, and all vertices with that color are mapped to its center.
+        Valid only for meshes whose faces have a single color each (vertices colors are not interpolated across faces)
+        """
+        # palette of distinct colors
+        paletteIndices = {}  # color: palette index
+        verticesPaletteIndices = []
+        for color in verticesARGB:
+            paletteIndex = paletteIndices.get(color)
+            if paletteIndex == None:
+                paletteIndex = len(paletteIndices)
+                paletteIndices[color] = paletteIndex
+            verticesPaletteIndices.append(paletteIndex)
+        numberOfColors = max(len(paletteIndices), 1)
+        
+        # colors are in a single row strip, wrapped into more rows only for large palettes
+        columns = min(numberOfColors, 256)
+        rows = int(math.ceil(numberOfColors / float(columns)))
+        imageWidth = columns * 4
+        imageHeight = rows * 4
+        
+        paletteTextureCoordinates = [None] * numberOfColors
+        pixels = System.Array.CreateInstance(System.Int32, imageWidth * imageHeight)
+        for color, paletteIndex in paletteIndices.items():
+            row, column = divmod(paletteIndex, columns)
+            paletteTextureCoordinates[paletteIndex] = Rhino.Geometry.Point2f((column * 4 + 2.0) / imageWidth, (imageHeight - row * 4 - 2.0) / imageHeight)  # texture coordinates go from the bottom of the image
+            opaqueColor = (color & 0xFFFFFF) | -16777216
+            for pixelRow in xrange(row * 4, row * 4 + 4):
+                pixelIndex = pixelRow * imageWidth + column * 4
+                pixels[pixelIndex] = pixels[pixelIndex + 1] = pixels[pixelIndex + 2] = pixels[pixelIndex + 3] = opaqueColor
+        
+        textureCoordinates = System.Array.CreateInstance(Rhino.Geometry.Point2f, mesh.Vertices.Count)
+        for vertexIndex, paletteIndex in enumerate(verticesPaletteIndices):
+            textureCoordinates[vertexIndex] = paletteTextureCoordinates[paletteIndex]
+        mesh.TextureCoordinates.Clear()
+        mesh.TextureCoordinates.SetTextureCoordinates(textureCoordinates)
+        
+        self.saveTextureImage(pixels, imageWidth, imageHeight, u)
+        del pixels
+        del verticesPaletteIndices
+        
+        return mesh
+    
+    
+    def createRenderMesh(self, mesh, u, paletteTexture=True):
         """
         create render mesh and its texture image (material diffuse map file).
-        the code of this method is entirely based on VB.NET components by Vicente Soler:
+        the code of this method is based on VB.NET components by Vicente Soler:
         http://www.grasshopper3d.com/xn/detail/2985220:Comment:663243
+        Each mesh face gets a cell of 2x2 texels with its vertices colors. Faces with the same vertices colors share the same cell, and the texture image is written at once from a pixels buffer.
+        If paletteTexture is True and each face has a single color, a compact palette texture image is created instead (see "createPaletteRenderMesh" method)
         """
+        verticesARGB = mesh.VertexColors.ToARGBArray()
+        c = mesh.Faces.Count
+        
+        if paletteTexture:
+            singleColorFaces = True
+            for i in xrange(c):
+                f = mesh.Faces[i]
+                colorA = verticesARGB[f.A]
+                if (verticesARGB[f.B] != colorA) or (verticesARGB[f.C] != colorA) or (verticesARGB[f.D] != colorA):
+                    singleColorFaces = False
+                    break
+            if singleColorFaces:
+                return self.createPaletteRenderMesh(mesh, verticesARGB, u)
+        
         mesh.Unweld(0, False)
+        verticesARGB = mesh.VertexColors.ToARGBArray()
         
-        dt = []
-        c = mesh.Faces.Count
-        for i in range(c - 1+1):
-            sub_dt = []
+        # faces with the same vertices colors share the same cell
+        cellIndices = {}  # (colorA, colorB, colorC, colorD): cell index
+        cellsColors = []
+        facesCells = []
+        for i in xrange(c):
             f = mesh.Faces[i]
-            color1 = mesh.VertexColors[f.A]
-            color2 = mesh.VertexColors[f.B]
-            color3 = mesh.VertexColors[f.C]
-            color4 = mesh.VertexColors[f.D]
-            sub_dt.append(System.Drawing.Color.FromArgb(color1.R, color1.G, color1.B))
-            sub_dt.append(System.Drawing.Color.FromArgb(color2.R, color2.G, color2.B))
-            sub_dt.append(System.Drawing.Color.FromArgb(color3.R, color3.G, color3.B))
-            sub_dt.append(System.Drawing.Color.FromArgb(color4.R, color4.G, color4.B))
-            dt.append(sub_dt)
-        
+            cellColors = (verticesARGB[f.A], verticesARGB[f.B], verticesARGB[f.C], verticesARGB[f.D])
+            cellIndex = cellIndices.get(cellColors)
+            if cellIndex == None:
+                cellIndex = len(cellsColors)
+                cellIndices[cellColors] = cellIndex
+                cellsColors.append(cellColors)
+            facesCells.append(cellIndex)
+        
+        size = max(int(math.ceil(math.sqrt(len(cellsColors)))), 1)  # number of cells in each row and column of the texture image
+        sb = size * 2
+        
+        # texture coordinates of each of the cell's texels
+        cellsTextureCoordinates = []
+        for cellIndex in xrange(len(cellsColors)):
+            x, y = divmod(cellIndex, size)
+            cellsTextureCoordinates.append([Rhino.Geometry.Point2f((x * 2 + 0.5) / sb, (y * 2 + 0.5) / sb), Rhino.Geometry.Point2f((x * 2 + 1.5) / sb, (y * 2 + 0.5) / sb), Rhino.Geometry.Point2f((x * 2 + 1.5) / sb, (y * 2 + 1.5) / sb), Rhino.Geometry.Point2f((x * 2 + 0.5) / sb, (y * 2 + 1.5) / sb)])
+        
+        textureCoordinates = System.Array.CreateInstance(Rhino.Geometry.Point2f, mesh.Vertices.Count)
+        for i in xrange(c):
+            f = mesh.Faces[i]
+            cellTextureCoordinates = cellsTextureCoordinates[facesCells[i]]
+            textureCoordinates[f.A] = cellTextureCoordinates[0]
+            textureCoordinates[f.B] = cellTextureCoordinates[1]
+            textureCoordinates[f.C] = cellTextureCoordinates[2]
+            textureCoordinates[f.D] = cellTextureCoordinates[3]
         mesh.TextureCoordinates.Clear()
-        for i in range(mesh.Vertices.Count):
-            mesh.TextureCoordinates.Add(0,0)
-        
-        size = math.ceil(math.sqrt(c))
-        count = -1
-        
-        for x in xrange(size - 1+1):
-            for y in xrange(size - 1+1):
-                count += 1
-                if count < c - 1+1:
-                    f = mesh.Faces[count]
-                    sb = size * 2
-                    mesh.TextureCoordinates[f.A] = Rhino.Geometry.Point2f((x * 2 + 0.5) / sb, (y * 2 + 0.5) / sb)
-                    mesh.TextureCoordinates[f.B] = Rhino.Geometry.Point2f((x * 2 + 1.5) / sb, (y * 2 + 0.5) / sb)
-                    mesh.TextureCoordinates[f.C] = Rhino.Geometry.Point2f((x * 2 + 1.5) / sb, (y * 2 + 1.5) / sb)
-                    mesh.TextureCoordinates[f.D] = Rhino.Geometry.Point2f((x * 2 + 0.5) / sb, (y * 2 + 1.5) / sb)
-        
-        
-        dt_length = len(dt)
-        size = math.ceil(math.sqrt(dt_length))
-        sb = size * 2 - 1
-        bm = System.Drawing.Bitmap(size * 2, size * 2)
-        bmb = System.Drawing.Bitmap(size * 4, size * 4)
-        count = -1
-        
-        for x in xrange(size - 1+1):
-            for y in xrange(size - 1+1):
-                count += 1
-                if count < dt_length - 1+1:
-                    bm.SetPixel(x * 2 + 0, sb - (y * 2 + 0), dt[count][0])
-                    bm.SetPixel(x * 2 + 1, sb - (y * 2 + 0), dt[count][1])
-                    bm.SetPixel(x * 2 + 1, sb - (y * 2 + 1), dt[count][2])
-                    bm.SetPixel(x * 2 + 0, sb - (y * 2 + 1), dt[count][3])
-        
-        g = System.Drawing.Graphics.FromImage(bmb)
-        g.InterpolationMode = System.Drawing.Drawing2D.InterpolationMode.NearestNeighbor
-        g.DrawImage(bm, 0, 0, size * 4 + 1, size * 4 + 1)
-        bmb.Save(u)
-        del dt
+        mesh.TextureCoordinates.SetTextureCoordinates(textureCoordinates)
+        
+        # texture image: each vertex color is written to 2x2 pixels
+        imageSize = size * 4
+        pixels = System.Array.CreateInstance(System.Int32, imageSize * imageSize)
+        for cellIndex, cellColors in enumerate(cellsColors):
+            x, y = divmod(cellIndex, size)
+            colorA, colorB, colorC, colorD = [(color & 0xFFFFFF) | -16777216  for color in cellColors]  # opaque colors
+            bottomRow = imageSize - 1 - y * 4  # image rows go from top to bottom
+            for row, leftColor, rightColor in [(bottomRow, colorA, colorB), (bottomRow - 1, colorA, colorB), (bottomRow - 2, colorD, colorC), (bottomRow - 3, colorD, colorC)]:
+                pixelIndex = row * imageSize + x * 4
+                pixels[pixelIndex] = pixels[pixelIndex + 1] = leftColor
+                pixels[pixelIndex + 2] = pixels[pixelIndex + 3] = rightColor
+        
+        self.saveTextureImage(pixels, imageSize, imageSize, u)
+        del pixels
+        del facesCells
         
         return mesh
 
@@ -1570,6 +2451,10 @@ class OSM():
     """
     methods for manipulation of OSM data
     """
+    # shared between all OSM instances, so that CRS objects and their transformations are created only once per each Gismo Gismo component run
+    CRS_pool = {}  # EPSGcode: CRS
+    CRS_transformers_pool = {}  # (inputCRS_EPSG, outputCRS_EPSG): inputCRS with started transformation to outputCRS
+    
     def calculateCRS_UTMzone(self, locationLatitudeD, locationLongitudeD):
         # calculate CRS data: CRS_UTMzone, northOrsouth
         # by http://stackoverflow.com/a/9188972/3137724 (link given by Even Rouault)
@@ -1598,86 +2483,241 @@ class OSM():
     
     def CRS_from_EPSGcode(self, EPSGcode):
         """
-        create CRS from EPSG code
+        create CRS from EPSG code. Already created CRSs are reused
         """
-        CRS = MapWinGIS.GeoProjectionClass()
-        CRS.ImportFromEPSG(EPSGcode)
+        EPSGcode = int(EPSGcode)
+        if not OSM.CRS_pool.has_key(EPSGcode):
+            CRS = MapWinGIS.GeoProjectionClass()
+            CRS.ImportFromEPSG(EPSGcode)
+            OSM.CRS_pool[EPSGcode] = CRS
         
-        return CRS
+        return OSM.CRS_pool[EPSGcode]
     
     
-    def convertBetweenTwoCRS(self, inputCRS, outputCRS, firstCoordinate, secondCoordinate):
-        
+    def CRS_transformer(self, inputCRS_EPSG, outputCRS_EPSG):
         """
-        shapefile = MapWinGIS.ShapefileClass()
-        openShapefileSuccess = MapWinGIS.ShapefileClass.Open(shapefile, shapeFile_filePath, None)
-        if openShapefileSuccess:
-            pass
+        CRS with started transformation from inputCRS_EPSG to outputCRS_EPSG.
+        The transformation is started only once per each (inputCRS_EPSG, outputCRS_EPSG) pair and then reused
         """
-        #print "__inputCRS_EPSG: ", inputCRS_EPSG
-        # set the input CRS
-        #inputCRS = MapWinGIS.GeoProjectionClass()
-        #MapWinGIS.GeoProjectionClass.ImportFromEPSG(inputCRS, inputCRS_EPSG)
-        #inputCRS.ImportFromEPSG(inputCRS_EPSG)
+        transformerKey = (int(inputCRS_EPSG), int(outputCRS_EPSG))
+        if not OSM.CRS_transformers_pool.has_key(transformerKey):
+            # a separate inputCRS (not the one from CRS_pool) as a CRS can have only one started transformation
+            inputCRS = MapWinGIS.GeoProjectionClass()
+            inputCRS.ImportFromEPSG(transformerKey[0])
+            successStartTransform = inputCRS.StartTransform(self.CRS_from_EPSGcode(transformerKey[1]))
+            if not successStartTransform:
+                return None
+            OSM.CRS_transformers_pool[transformerKey] = inputCRS
         
-        # set the output CRS
-        #outputCRS = MapWinGIS.GeoProjectionClass()
-        #outputCRS.ImportFromEPSG(outputCRS_EPSG)
+        return OSM.CRS_transformers_pool[transformerKey]
+    
+    
+    def transformPoints(self, inputCRS_EPSG, outputCRS_EPSG, firstCoordinates, secondCoordinates):
+        """
+        convert lists of coordinates (longitudes/x, latitudes/y) from inputCRS_EPSG to outputCRS_EPSG, by using a single transformation for all of them.
+        Coordinates of the points which failed to transform are None. Returns None, None if the transformation could not be started
+        """
+        # WGS84 to/from WGS84 UTM zones (EPSG 32601-32660 north, 32701-32760 south) does not require MapWinGIS
+        if (int(inputCRS_EPSG) == 4326) and ((32601 <= int(outputCRS_EPSG) <= 32660) or (32701 <= int(outputCRS_EPSG) <= 32760)):
+            UTMzone = int(outputCRS_EPSG) % 100
+            northOrsouth = "north"  if (int(outputCRS_EPSG) < 32700)  else  "south"
+            eastings, northings = self.UTMprojection(secondCoordinates, firstCoordinates, UTMzone, northOrsouth)
+            return eastings, northings
+        elif (int(outputCRS_EPSG) == 4326) and ((32601 <= int(inputCRS_EPSG) <= 32660) or (32701 <= int(inputCRS_EPSG) <= 32760)):
+            UTMzone = int(inputCRS_EPSG) % 100
+            northOrsouth = "north"  if (int(inputCRS_EPSG) < 32700)  else  "south"
+            latitudesD, longitudesD = self.UTMinverseProjection(firstCoordinates, secondCoordinates, UTMzone, northOrsouth)
+            return longitudesD, latitudesD
         
-        successStartTransform = inputCRS.StartTransform(outputCRS)
+        inputCRS = self.CRS_transformer(inputCRS_EPSG, outputCRS_EPSG)
+        if inputCRS == None:
+            return None, None
         
-        secondCoordinate_ref = clr.StrongBox[System.Double](secondCoordinate)
-        firstCoordinate_ref = clr.StrongBox[System.Double](firstCoordinate)
-        successTransform = MapWinGIS.GeoProjectionClass.Transform(inputCRS, firstCoordinate_ref, secondCoordinate_ref)
+        firstCoordinates_transformed = []
+        secondCoordinates_transformed = []
+        firstCoordinate_ref = clr.StrongBox[System.Double]()
+        secondCoordinate_ref = clr.StrongBox[System.Double]()
+        for firstCoordinate, secondCoordinate in zip(firstCoordinates, secondCoordinates):
+            firstCoordinate_ref.Value = firstCoordinate
+            secondCoordinate_ref.Value = secondCoordinate
+            successTransform = MapWinGIS.GeoProjectionClass.Transform(inputCRS, firstCoordinate_ref, secondCoordinate_ref)
+            if successTransform:
+                firstCoordinates_transformed.append(firstCoordinate_ref.Value)
+                secondCoordinates_transformed.append(secondCoordinate_ref.Value)
+            else:
+                firstCoordinates_transformed.append(None)
+                secondCoordinates_transformed.append(None)
         
-        inputCRS.StopTransform()
+        return firstCoordinates_transformed, secondCoordinates_transformed
+    
+    
+    def convertBetweenTwoCRS(self, inputCRS_EPSG, outputCRS_EPSG, firstCoordinate, secondCoordinate):
+        """
+        convert a single point (longitude/x, latitude/y) from inputCRS_EPSG to outputCRS_EPSG, with the pooled transformation.
+        Returns None if the transformation failed
+        """
+        firstCoordinates_transformed, secondCoordinates_transformed = self.transformPoints(inputCRS_EPSG, outputCRS_EPSG, [firstCoordinate], [secondCoordinate])
+        if (firstCoordinates_transformed == None) or (firstCoordinates_transformed[0] == None):
+            return None
         
-        originPtProjected = Rhino.Geometry.Point3d(firstCoordinate_ref.Value, secondCoordinate_ref.Value, 0)
+        originPtProjected = Rhino.Geometry.Point3d(firstCoordinates_transformed[0], secondCoordinates_transformed[0], 0)
         
         return originPtProjected
     
     
-    def projectedLocationCoordinates(self, locationLatitudeD, locationLongitudeD):
+    def transformCoordinates(self, xs, ys, zs, unitConversionFactor, moveVector, rotationAngleR, rotationCenterPt):
         """
-        convert latitude,longitude coordinates to x,y projected coordinates
+        scale (by 1/unitConversionFactor), move (by moveVector) and rotate (by rotationAngleR around the Z axis at rotationCenterPt) flat lists of coordinates, all in a single step.
+        Equal to point3d/unitConversionFactor + moveVector, followed by point3d.Transform(Rhino.Geometry.Transform.Rotation(rotationAngleR, Rhino.Geometry.Vector3d(0,0,1), rotationCenterPt)), for each point.
+        Returns a list of Point3d
         """
-        # by http://stackoverflow.com/a/9188972/3137724 (link given by Even Rouault)
-        outputCRS_UTMzone = (math.floor((locationLongitudeD + 180)/6) % 60) + 1
-        if locationLatitudeD >= 0:
-            # for northern hemisphere
-            outputCRS_EPSG = 32600 + outputCRS_UTMzone
-        elif locationLatitudeD < 0:
-            # for southern hemisphere
-            outputCRS_EPSG = 32700 + outputCRS_UTMzone
+        scale = 1.0 / unitConversionFactor
+        cosAngle = math.cos(rotationAngleR)
+        sinAngle = math.sin(rotationAngleR)
+        centerX = rotationCenterPt.X
+        centerY = rotationCenterPt.Y
+        offsetX = moveVector.X - centerX
+        offsetY = moveVector.Y - centerY
+        offsetZ = moveVector.Z
         
-        # set the CRS to WGS 84
-        inputCRS = MapWinGIS.GeoProjectionClass()
-        inputCRS_EPSG = 4326  # WGS 84
-        inputCRS.ImportFromEPSG(inputCRS_EPSG)
+        Point3d = Rhino.Geometry.Point3d
+        pts = []
+        for x, y, z in zip(xs, ys, zs):
+            dx = x * scale + offsetX
+            dy = y * scale + offsetY
+            pts.append(Point3d(cosAngle * dx - sinAngle * dy + centerX,  sinAngle * dx + cosAngle * dy + centerY,  z * scale + offsetZ))
         
-        # set the output CRS
-        outputCRS = MapWinGIS.GeoProjectionClass()
-        outputCRS.ImportFromEPSG(outputCRS_EPSG)
+        return pts
+    
+    
+    def transverseMercator_coefficients(self):
+        """
+        Krueger series coefficients (up to 6th order in n) for WGS84 ellipsoid. Based on: Karney C.F.F., "Transverse Mercator with an accuracy of a few nanometers", J. Geodesy 85(8), 475-485 (2011)
+        """
+        a = 6378137  # equatorial radius, meters
+        f = 1/298.257223563  # flattening
+        e = math.sqrt(f*(2-f))  # eccentricity
+        n = f/(2-f)  # third flattening
+        n2 = n*n;  n3 = n2*n;  n4 = n3*n;  n5 = n4*n;  n6 = n5*n
         
-        successStartTransform = inputCRS.StartTransform(outputCRS)
+        A = a/(1+n) * (1 + n2/4 + n4/64 + n6/256)  # 2*pi*A is the circumference of a meridian
+        alpha = [None,  # alpha[0] is not used
+                 n/2 - 2/3.*n2 + 5/16.*n3 + 41/180.*n4 - 127/288.*n5 + 7891/37800.*n6,
+                 13/48.*n2 - 3/5.*n3 + 557/1440.*n4 + 281/630.*n5 - 1983433/1935360.*n6,
+                 61/240.*n3 - 103/140.*n4 + 15061/26880.*n5 + 167603/181440.*n6,
+                 49561/161280.*n4 - 179/168.*n5 + 6601661/7257600.*n6,
+                 34729/80640.*n5 - 3418889/1995840.*n6,
+                 212378941/319334400.*n6]
+        beta = [None,  # beta[0] is not used
+                n/2 - 2/3.*n2 + 37/96.*n3 - 1/360.*n4 - 81/512.*n5 + 96199/604800.*n6,
+                1/48.*n2 + 1/15.*n3 - 437/1440.*n4 + 46/105.*n5 - 1118711/3870720.*n6,
+                17/480.*n3 - 37/840.*n4 - 209/4480.*n5 + 5569/90720.*n6,
+                4397/161280.*n4 - 11/504.*n5 - 830251/7257600.*n6,
+                4583/161280.*n5 - 108847/3991680.*n6,
+                20648693/638668800.*n6]
         
-        locationLatitudeD_ref = clr.StrongBox[System.Double](locationLatitudeD)
-        locationLongitudeD_ref = clr.StrongBox[System.Double](locationLongitudeD)
-        successTransform = MapWinGIS.GeoProjectionClass.Transform(inputCRS, locationLongitudeD_ref, locationLatitudeD_ref)
+        return e, A, alpha, beta
+    
+    
+    def transverseMercatorProjection(self, latitudesD, longitudesD, centralMeridianD, scaleFactor=0.9996, falseEasting=500000, falseNorthing=0):
+        """
+        convert lists of WGS84 latitudes,longitudes (in degrees) to transverse mercator eastings,northings (in meters)
+        """
+        e, A, alpha, beta = self.transverseMercator_coefficients()
+        centralMeridianR = math.radians(centralMeridianD)
+        
+        eastings = []
+        northings = []
+        for latitudeD, longitudeD in zip(latitudesD, longitudesD):
+            latitudeR = math.radians(latitudeD)
+            longitudeR = math.radians(longitudeD) - centralMeridianR
+            cosLongitude = math.cos(longitudeR)
+            
+            # conformal latitude
+            tau = math.tan(latitudeR)
+            sigma = math.sinh(e * math.atanh(e * tau / math.sqrt(1 + tau*tau)))
+            tau_ = tau * math.sqrt(1 + sigma*sigma) - sigma * math.sqrt(1 + tau*tau)
+            
+            # spherical transverse mercator
+            xi_ = math.atan2(tau_, cosLongitude)
+            eta_ = math.asinh(math.sin(longitudeR) / math.sqrt(tau_*tau_ + cosLongitude*cosLongitude))
+            
+            # ellipsoidal transverse mercator
+            xi = xi_
+            eta = eta_
+            for j in xrange(1,7):
+                xi += alpha[j] * math.sin(2*j*xi_) * math.cosh(2*j*eta_)
+                eta += alpha[j] * math.cos(2*j*xi_) * math.sinh(2*j*eta_)
+            
+            eastings.append(scaleFactor * A * eta + falseEasting)
+            northings.append(scaleFactor * A * xi + falseNorthing)
+        
+        return eastings, northings
+    
+    
+    def transverseMercatorInverseProjection(self, eastings, northings, centralMeridianD, scaleFactor=0.9996, falseEasting=500000, falseNorthing=0):
+        """
+        convert lists of transverse mercator eastings,northings (in meters) to WGS84 latitudes,longitudes (in degrees)
+        """
+        e, A, alpha, beta = self.transverseMercator_coefficients()
         
-        inputCRS.StopTransform()
+        latitudesD = []
+        longitudesD = []
+        for easting, northing in zip(eastings, northings):
+            xi = (northing - falseNorthing) / (scaleFactor * A)
+            eta = (easting - falseEasting) / (scaleFactor * A)
+            
+            # spherical transverse mercator
+            xi_ = xi
+            eta_ = eta
+            for j in xrange(1,7):
+                xi_ -= beta[j] * math.sin(2*j*xi) * math.cosh(2*j*eta)
+                eta_ -= beta[j] * math.cos(2*j*xi) * math.sinh(2*j*eta)
+            sinhEta_ = math.sinh(eta_)
+            sinXi_ = math.sin(xi_)
+            cosXi_ = math.cos(xi_)
+            
+            # conformal latitude to latitude, by Newton-Raphson iteration
+            tau_ = sinXi_ / math.sqrt(sinhEta_*sinhEta_ + cosXi_*cosXi_)
+            tau = tau_
+            for iteration in xrange(10):
+                sigma = math.sinh(e * math.atanh(e * tau / math.sqrt(1 + tau*tau)))
+                tau_i = tau * math.sqrt(1 + sigma*sigma) - sigma * math.sqrt(1 + tau*tau)
+                deltaTau = (tau_ - tau_i) / math.sqrt(1 + tau_i*tau_i) * (1 + (1 - e*e)*tau*tau) / ((1 - e*e) * math.sqrt(1 + tau*tau))
+                tau += deltaTau
+                if abs(deltaTau) < 1e-12:
+                    break
+            
+            latitudesD.append(math.degrees(math.atan(tau)))
+            longitudesD.append(math.degrees(math.atan2(sinhEta_, cosXi_)) + centralMeridianD)
         
-        originPtProjected = Rhino.Geometry.Point3d(locationLongitudeD_ref.Value, locationLatitudeD_ref.Value, 0)
+        return latitudesD, longitudesD
+    
+    
+    def UTMprojection(self, latitudesD, longitudesD, UTMzone, northOrsouth):
+        """
+        convert lists of WGS84 latitudes,longitudes (in degrees) to UTM eastings,northings (in meters) without MapWinGIS
+        """
+        centralMeridianD = (UTMzone - 1) * 6 - 180 + 3
+        falseNorthing = 0  if (northOrsouth == "north")  else  10000000
         
-        return originPtProjected
+        return self.transverseMercatorProjection(latitudesD, longitudesD, centralMeridianD, 0.9996, 500000, falseNorthing)
     
     
-    def projectedLocationCoordinates2(locationLatitudeD, locationLongitudeD, unitConversionFactor):
+    def UTMinverseProjection(self, eastings, northings, UTMzone, northOrsouth):
         """
-        convert latitude,longitude coordinates to x,y projected coordinates2
-        this method should be replaced with upper "projectedLocationCoordinates" but only for 4.9.4? > versions of MapWinGIS
+        convert lists of UTM eastings,northings (in meters) to WGS84 latitudes,longitudes (in degrees) without MapWinGIS
         """
+        centralMeridianD = (UTMzone - 1) * 6 - 180 + 3
+        falseNorthing = 0  if (northOrsouth == "north")  else  10000000
         
+        return self.transverseMercatorInverseProjection(eastings, northings, centralMeridianD, 0.9996, 500000, falseNorthing)
+    
+    
+    def projectedLocationCoordinates(self, locationLatitudeD, locationLongitudeD):
+        """
+        convert latitude,longitude coordinates to x,y projected coordinates
+        """
         # by http://stackoverflow.com/a/9188972/3137724 (link given by Even Rouault)
         outputCRS_UTMzone = (math.floor((locationLongitudeD + 180)/6) % 60) + 1
         if locationLatitudeD >= 0:
@@ -1687,99 +2727,254 @@ class OSM():
             # for southern hemisphere
             outputCRS_EPSG = 32700 + outputCRS_UTMzone
         
-        # create a dummy point with locationLatitudeD, locationLongitudeD coordinates
-        dummyShape = MapWinGIS.ShapeClass()
-        dummyShape.ShapeType = MapWinGIS.ShpfileType.SHP_POINT
-        dummyShape.AddPoint(locationLongitudeD, locationLatitudeD)
-        
-        # insert a dummy point to the dummyShapefile
-        dummyShapefile = MapWinGIS.ShapefileClass()
-        openShapefileSuccess2 = MapWinGIS.ShapefileClass.CreateNew(dummyShapefile, "", MapWinGIS.ShpfileType.SHP_POINT)
-        shapeIndex2 = clr.StrongBox[System.Int32]()
-        success = dummyShapefile.EditInsertShape(dummyShape, shapeIndex2)
-        
-        # a single field needs to be defined due to inserting of "dummyShape"
-        fieldName = "5"  # dummy name
-        fieldType = MapWinGIS.FieldType.INTEGER_FIELD
-        fieldPrecision = 1
-        fieldWidth = 1
-        success2 = dummyShapefile.EditAddField(fieldName, fieldType, fieldPrecision, fieldWidth)
-        
-        # set the CRS of dummyShapefile to WGS 84
-        inputCRS = MapWinGIS.GeoProjectionClass()
         inputCRS_EPSG = 4326  # WGS 84
-        inputCRS.ImportFromEPSG(inputCRS_EPSG)
-        dummyShapefile.GeoProjection = inputCRS
-        
-        shapeFileFolderPath = "C:\\gismo\\shapefile_example2"
-        if not os.path.exists(shapeFileFolderPath):
-            os.makedirs(shapeFileFolderPath)
-        shapefileFilePath = shapeFileFolderPath + "\\dummyShapefile_%s.shp" % str(time.time())
-        success = MapWinGIS.ShapefileClass.SaveAs(dummyShapefile, shapefileFilePath, None)
-        dummyShapefile.Close()
-        
-        # dummyShapefile2 = dummyShapefile
-        dummyShapefile2 = MapWinGIS.ShapefileClass()
-        openShapefileSuccess = MapWinGIS.ShapefileClass.Open(dummyShapefile2, shapefileFilePath, None)
-        
-        # reproject the dummyShapefile2
-        outputCRS2 = MapWinGIS.GeoProjectionClass()
-        outputCRS2.ImportFromEPSG(outputCRS_EPSG)
-        numOfsuccessfullyReprojectedShapes = clr.StrongBox[System.Int32]()
-        reprojectedShapefile = MapWinGIS.ShapefileClass.Reproject(dummyShapefile2, outputCRS2, numOfsuccessfullyReprojectedShapes)
-        if reprojectedShapefile == None:
-            reprojectErrorMsg2 = dummyShapefile2.ErrorMsg(dummyShapefile2.LastErrorCode)
-            print "reprojectErrorMsg2: ", reprojectErrorMsg2
-        dummyShapefile2.Close()
-        
-        # delete the dummyShapefile_timetime().shp files and whole its folder
-        try:
-            shutil.rmtree(shapeFileFolderPath)
-        except:
-            pass
+        longitudesProjected, latitudesProjected = self.transformPoints(inputCRS_EPSG, outputCRS_EPSG, [locationLongitudeD], [locationLatitudeD])
+        
+        originPtProjected = Rhino.Geometry.Point3d(longitudesProjected[0], latitudesProjected[0], 0)
         
-        for i in range(reprojectedShapefile.NumShapes):
-            shape = reprojectedShapefile.Shape[i]
-            for k in range(shape.numPoints):
-                pt = shape.Point[k]
-                longitudeProjectedMeters = pt.x
-                latitudeProjectedMeters = pt.y
-                originPtProjected = Rhino.Geometry.Point3d(longitudeProjectedMeters/unitConversionFactor, latitudeProjectedMeters/unitConversionFactor, 0)  # in Rhino document units
-         
         return originPtProjected
     
     
-    def filterShapes(self, shortenedName_keys, subValuesL, shapesL, osm_id_Only, osm_way_id_Only, osm_id_Remove, osm_way_id_Remove):
+    def projectedLocationCoordinates2(self, locationLatitudeD, locationLongitudeD, unitConversionFactor):
         """
-        filter values and shapes for the four inputs from "OSM ids" component
+        convert latitude,longitude coordinates to x,y projected coordinates2 (in Rhino document units)
         """
-        value__osm_id = "^#-@"  # dummy value, in case for some unknown reason there is no "osm_id" key
-        value__osm_way_id = "^#-@"  # dummy value, in case there is no "osm_way_id" key (shapeType = 1,2)
-        for shortenedName_keysIndex, key in enumerate(shortenedName_keys):
+        UTMzone, northOrsouth = self.calculateCRS_UTMzone(locationLatitudeD, locationLongitudeD)
+        eastings, northings = self.UTMprojection([locationLatitudeD], [locationLongitudeD], UTMzone, northOrsouth)
+        
+        originPtProjected = Rhino.Geometry.Point3d(eastings[0]/unitConversionFactor, northings[0]/unitConversionFactor, 0)  # in Rhino document units
+        
+        return originPtProjected
+    
+    
+    def shapesGeometryProperties(self, shapesDataTree):
+        """
+        geometry properties of the shapesDataTree. The ones created by "OSM shapes" component are reused if the shapesDataTree is its "shapes" output
+        """
+        if sc.sticky.has_key("gismo_OSMshapesComp_geometryProperties"):
+            geometryProperties = sc.sticky["gismo_OSMshapesComp_geometryProperties"]
+            if geometryProperties.matchesDataTree(shapesDataTree):
+                return geometryProperties
+        
+        return GeometryProperties(shapesDataTree)
+    
+    
+    def shapesSpatialIndex(self, geometryProperties):
+        """
+        spatial index of the shapes from geometryProperties. The one created by "OSM shapes" component is reused if the geometryProperties are the ones it has published (see "shapesGeometryProperties" method)
+        """
+        if sc.sticky.has_key("gismo_OSMshapesComp_spatialIndex"):
+            spatialIndex = sc.sticky["gismo_OSMshapesComp_spatialIndex"]
+            if spatialIndex.geometryProperties is geometryProperties:
+                return spatialIndex
+        
+        return SpatialIndex(geometryProperties)
+    
+    
+    def shapesTagIndex(self, keys, valuesDataTree, valuesInputParam=None):
+        """
+        inverted tag index of the valuesDataTree. The one created by "OSM shapes" component is reused if the keys and valuesDataTree are its "keys" and "values" outputs (valuesInputParam is the component's input which receives the valuesDataTree)
+        """
+        if sc.sticky.has_key("gismo_OSMshapesComp_tagIndex"):
+            tagIndex = sc.sticky["gismo_OSMshapesComp_tagIndex"]
+            if tagIndex.matchesDataTree(keys, valuesDataTree, valuesInputParam):
+                return tagIndex
+        
+        return TagIndex(keys, valuesDataTree)
+    
+    
+    def shapesIdFilter(self, keys, osm_id_Only, osm_way_id_Only, osm_id_Remove, osm_way_id_Remove):
+        """
+        prepare the four inputs from "OSM ids" component for filtering of many shapes: find the "osm_id" and "osm_way_id" keys positions only once, and convert the ids lists to sets
+        """
+        osm_id_keyIndex = None  # in case for some unknown reason there is no "osm_id" key
+        osm_way_id_keyIndex = None  # in case there is no "osm_way_id" key (shapeType = 1,2)
+        for keyIndex, key in enumerate(keys):
             if key == "osm_id":
-                value__osm_id = subValuesL[shortenedName_keysIndex]  # it will always be a string, not float, because shapefile keeps its values as strings
+                osm_id_keyIndex = keyIndex
             if key == "osm_way_id":
-                value__osm_way_id = subValuesL[shortenedName_keysIndex]  # it will always be a string, not float, because shapefile keeps its values as strings
+                osm_way_id_keyIndex = keyIndex
         
+        idFilter = [osm_id_keyIndex, osm_way_id_keyIndex, set(osm_id_Only), set(osm_way_id_Only), set(osm_id_Remove), set(osm_way_id_Remove)]
+        
+        return idFilter
+    
+    
+    def shapeAllowed(self, idFilter, value__osm_id, value__osm_way_id):
+        """
+        check if a shape with given "osm_id" and "osm_way_id" values passes the idFilter (created with "shapesIdFilter" method)
+        """
+        osm_id_keyIndex, osm_way_id_keyIndex, osm_id_OnlyS, osm_way_id_OnlyS, osm_id_RemoveS, osm_way_id_RemoveS = idFilter
         
         # removing shapes
-        if value__osm_id in osm_id_Remove:
-            return [], []
-        elif value__osm_way_id in osm_way_id_Remove:
-            return [], []
+        if (value__osm_id in osm_id_RemoveS) or (value__osm_way_id in osm_way_id_RemoveS):
+            return False
         
         # allowing this shapes
-        if value__osm_id in osm_id_Only:
-            return subValuesL, shapesL
-        elif value__osm_way_id in osm_way_id_Only:
+        if (value__osm_id in osm_id_OnlyS) or (value__osm_way_id in osm_way_id_OnlyS):
+            return True
+        elif (len(osm_id_OnlyS) == 0) and (len(osm_way_id_OnlyS) == 0):
+            # "osm_id_Only" and "osm_way_id_Only" are empty. Use ALL shapes except ones whos "osm_id" and "osm_way_id" are defined in either "osm_id_Remove" and "osm_way_id_Remove"
+            return True
+        else:
+            # either "osm_id_Only" and "osm_way_id_Only" are NOT empty. Use ONLY those shapes whos "osm_id" and "osm_way_id" are defined in either "osm_id_Only" and "osm_way_id_Only"
+            return False
+    
+    
+    def filterShapes(self, shortenedName_keys, subValuesL, shapesL, osm_id_Only, osm_way_id_Only, osm_id_Remove, osm_way_id_Remove, idFilter=None):
+        """
+        filter values and shapes for the four inputs from "OSM ids" component.
+        When filtering many shapes, create the idFilter with "shapesIdFilter" method only once and supply it to this method
+        """
+        if idFilter == None:
+            idFilter = self.shapesIdFilter(shortenedName_keys, osm_id_Only, osm_way_id_Only, osm_id_Remove, osm_way_id_Remove)
+        osm_id_keyIndex, osm_way_id_keyIndex = idFilter[:2]
+        
+        value__osm_id = "^#-@"  # dummy value, in case for some unknown reason there is no "osm_id" key
+        value__osm_way_id = "^#-@"  # dummy value, in case there is no "osm_way_id" key (shapeType = 1,2)
+        if osm_id_keyIndex != None:
+            value__osm_id = subValuesL[osm_id_keyIndex]  # it will always be a string, not float, because shapefile keeps its values as strings
+        if osm_way_id_keyIndex != None:
+            value__osm_way_id = subValuesL[osm_way_id_keyIndex]  # it will always be a string, not float, because shapefile keeps its values as strings
+        
+        if self.shapeAllowed(idFilter, value__osm_id, value__osm_way_id):
             return subValuesL, shapesL
         else:
-            if (len(osm_id_Only) == 0) and (len(osm_way_id_Only) == 0):
-                # "osm_id_Only" and "osm_way_id_Only" are empty. Use ALL shapes except ones whos "osm_id" and "osm_way_id" are defined in either "osm_id_Remove" and "osm_way_id_Remove"
-                return subValuesL, shapesL
+            return [], []
+    
+    
+    def filterAttributeTable(self, attributeTable, osm_id_Only, osm_way_id_Only, osm_id_Remove, osm_way_id_Remove):
+        """
+        filter all rows of an attributeTable for the four inputs from "OSM ids" component at once.
+        Returns a list of "True"/"False" values for each row
+        """
+        idFilter = self.shapesIdFilter(attributeTable.keys, osm_id_Only, osm_way_id_Only, osm_id_Remove, osm_way_id_Remove)
+        osm_id_keyIndex, osm_way_id_keyIndex = idFilter[:2]
+        
+        if (len(idFilter[2]) == 0) and (len(idFilter[3]) == 0) and (len(idFilter[4]) == 0) and (len(idFilter[5]) == 0):
+            # nothing to isolate and nothing to remove
+            return [True] * attributeTable.numberOfRows
+        
+        dummyColumn = ["^#-@"] * attributeTable.numberOfRows  # dummy values, in case there is no "osm_id" or "osm_way_id" key
+        osm_id_column = dummyColumn  if (osm_id_keyIndex == None)  else  attributeTable.column("osm_id")
+        osm_way_id_column = dummyColumn  if (osm_way_id_keyIndex == None)  else  attributeTable.column("osm_way_id")
+        
+        shapeAllowed = self.shapeAllowed
+        rowsAllowed = [shapeAllowed(idFilter, value__osm_id, value__osm_way_id)  for value__osm_id, value__osm_way_id in zip(osm_id_column, osm_way_id_column)]
+        
+        return rowsAllowed
+    
+    
+    def overpassQuery(self, shapeType, latitudeBottomD, longitudeLeftD, latitudeTopD, longitudeRightD, requiredTag=None):
+        """
+        create an Overpass QL query which downloads only the OSM elements needed for the shapeType (and optional requiredTag = [requiredKey, requiredValues]) instead of the whole map data.
+        Returns the query and its signature (used for caching of the downloaded .osm file)
+        """
+        bbox = "(%s,%s,%s,%s)" % (latitudeBottomD, longitudeLeftD, latitudeTopD, longitudeRightD)
+        
+        if requiredTag == None:
+            tagFilter = ""
+        else:
+            requiredKey, requiredValues = requiredTag
+            requiredValues = [value  for value in requiredValues  if (value != "^")]  # "^" means there is no specific value for this key
+            if len(requiredValues) == 0:
+                tagFilter = "[%s]" % self.overpassString(requiredKey)
             else:
-                # either "osm_id_Only" and "osm_way_id_Only" are NOT empty. Use ONLY those shapes whos "osm_id" and "osm_way_id" are defined in either "osm_id_Only" and "osm_way_id_Only"
-                return [], []
+                # escape the regular expression special characters of the values, and then the Overpass QL string special characters of the whole expression
+                regularExpression = "^(%s)$" % "|".join([re.sub(r"([\\.\[\]{}()*+?^$|])", r"\\\1", value)  for value in requiredValues])
+                tagFilter = "[%s~%s]" % (self.overpassString(requiredKey), self.overpassString(regularExpression))
+        
+        if shapeType == 0:
+            # polygons: closed ways and multipolygon relations, with all their nodes
+            query = "[out:xml][timeout:180];(way%s%s;relation%s[\"type\"=\"multipolygon\"]%s;);(._;>;);out;" % (tagFilter, bbox, tagFilter, bbox)
+        elif (shapeType == 1) or (shapeType == 3):
+            # polylines: ways and route/multilinestring relations, with all their nodes
+            query = "[out:xml][timeout:180];(way%s%s;relation%s[\"type\"~\"^(route|multilinestring)$\"]%s;);(._;>;);out;" % (tagFilter, bbox, tagFilter, bbox)
+        elif shapeType == 2:
+            # points: only tagged nodes. Untagged nodes are ways' vertices
+            if tagFilter == "":
+                tagFilter = "[~\".\"~\".\"]"
+            query = "[out:xml][timeout:180];node%s%s;out;" % (tagFilter, bbox)
+        
+        querySignature = hashlib.md5(query.encode("utf-8")).hexdigest()[:10]
+        
+        return query, querySignature
+    
+    
+    def overpassString(self, text):
+        """
+        Overpass QL string literal of the text: backslashes and double quotes are escaped
+        """
+        return "\"%s\"" % text.replace("\\", "\\\\").replace("\"", "\\\"")
+    
+    
+    def tileBoundingBox(self, latitudeBottomD, longitudeLeftD, latitudeTopD, longitudeRightD, maxTileSizeD=0.1):
+        """
+        split a latitude-longitude bounding box into equal tiles, none of them larger than maxTileSizeD x maxTileSizeD degrees.
+        Returns a list of (latitudeBottomD, longitudeLeftD, latitudeTopD, longitudeRightD) tiles
+        """
+        numberOfRows = int(math.ceil((latitudeTopD - latitudeBottomD) / maxTileSizeD))
+        numberOfColumns = int(math.ceil((longitudeRightD - longitudeLeftD) / maxTileSizeD))
+        numberOfRows = max(numberOfRows, 1)
+        numberOfColumns = max(numberOfColumns, 1)
+        latitudeStepD = (latitudeTopD - latitudeBottomD) / numberOfRows
+        longitudeStepD = (longitudeRightD - longitudeLeftD) / numberOfColumns
+        
+        tiles = []
+        for rowIndex in xrange(numberOfRows):
+            for columnIndex in xrange(numberOfColumns):
+                tileBottomD = latitudeBottomD + rowIndex * latitudeStepD
+                tileLeftD = longitudeLeftD + columnIndex * longitudeStepD
+                tiles.append((tileBottomD, tileLeftD, tileBottomD + latitudeStepD, tileLeftD + longitudeStepD))
+        
+        return tiles
+    
+    
+    def mergeOsmFiles(self, osmFilePathL, mergedOsmFile_filePath, latitudeBottomD, longitudeLeftD, latitudeTopD, longitudeRightD):
+        """
+        merge several .osm files (for example downloaded tiles) into a single one.
+        Nodes, ways and relations which appear in more than one file (ways crossing the tiles edges) are written only once. All nodes are written before ways, and ways before relations, as required by the OGR's OSM driver
+        """
+        clr.AddReference("System.Xml")
+        writerSettings = System.Xml.XmlWriterSettings()
+        writerSettings.Indent = True
+        writer = System.Xml.XmlWriter.Create(mergedOsmFile_filePath, writerSettings)
+        try:
+            writer.WriteStartDocument()
+            writer.WriteStartElement("osm")
+            writer.WriteAttributeString("version", "0.6")
+            writer.WriteAttributeString("generator", "Gismo")
+            writer.WriteStartElement("bounds")
+            writer.WriteAttributeString("minlat", str(latitudeBottomD))
+            writer.WriteAttributeString("minlon", str(longitudeLeftD))
+            writer.WriteAttributeString("maxlat", str(latitudeTopD))
+            writer.WriteAttributeString("maxlon", str(longitudeRightD))
+            writer.WriteEndElement()
+            
+            for elementName in ["node", "way", "relation"]:
+                writtenIds = set()
+                for osmFile_filePath in osmFilePathL:
+                    reader = System.Xml.XmlReader.Create(osmFile_filePath)
+                    try:
+                        reader.Read()
+                        while not reader.EOF:
+                            if (reader.NodeType == System.Xml.XmlNodeType.Element) and (reader.Depth == 1):
+                                if reader.Name == elementName:
+                                    elementId = reader.GetAttribute("id")
+                                    if elementId not in writtenIds:
+                                        writtenIds.add(elementId)
+                                        writer.WriteNode(reader, True)  # moves the reader to the next element
+                                        continue
+                                reader.Skip()
+                            else:
+                                reader.Read()
+                    finally:
+                        reader.Close()
+            
+            writer.WriteEndElement()
+            writer.WriteEndDocument()
+        finally:
+            writer.Close()
     
     
     def requiredTag_dictionary(self):
@@ -1854,6 +3049,608 @@ class OSM():
         return requiredKeyRequiredValue_dict
 
 
+class AttributeTable(object):
+    """
+    values of OSM shapes attributes, read from the shapefile with a single "CellValue" call per field of each shape (not per each of its parts), one row per each shape.
+    It is used only while "OSM shapes" component creates its outputs: to filter the shapes with the "OSM ids" component ids, to create the tag index and the rows of the "values" output.
+    Values are kept as they are read (not typed). Empty "" values are skipped, and equal values are read into a single object
+    """
+    def __init__(self, keys, emptyValue=""):
+        self.keys = list(keys)
+        self.keyIndices = dict((key, keyIndex)  for keyIndex, key in enumerate(self.keys))
+        self.emptyValue = emptyValue
+        self.columns = [{}  for key in self.keys]  # per each key: {rowIndex: valueCode}
+        self.dictionary = []  # valueCode: value
+        self.dictionaryCodes = {}  # value: valueCode
+        self.numberOfRows = 0
+    
+    
+    def encode(self, value):
+        """
+        dictionary code of a value
+        """
+        try:
+            return self.dictionaryCodes[value]
+        except KeyError:
+            valueCode = len(self.dictionary)
+            self.dictionary.append(value)
+            self.dictionaryCodes[value] = valueCode
+            return valueCode
+    
+    
+    def addRow(self, valuesL):
+        """
+        add values (ordered as keys) of a single shape. Returns the index of the added row
+        """
+        rowIndex = self.numberOfRows
+        for keyIndex, value in enumerate(valuesL):
+            if value != self.emptyValue:
+                self.columns[keyIndex][rowIndex] = self.encode(value)
+        self.numberOfRows += 1
+        return rowIndex
+    
+    
+    def value(self, rowIndex, key):
+        """
+        value of a key for a particular row
+        """
+        valueCode = self.columns[self.keyIndices[key]].get(rowIndex)
+        if valueCode == None:
+            return self.emptyValue
+        return self.dictionary[valueCode]
+    
+    
+    def row(self, rowIndex):
+        """
+        all values (ordered as keys) of a particular row
+        """
+        dictionary = self.dictionary
+        emptyValue = self.emptyValue
+        rowValuesL = []
+        for column in self.columns:
+            valueCode = column.get(rowIndex)
+            rowValuesL.append(emptyValue  if (valueCode == None)  else  dictionary[valueCode])
+        return rowValuesL
+    
+    
+    def column(self, key):
+        """
+        values of a key for all rows
+        """
+        dictionary = self.dictionary
+        columnValuesL = [self.emptyValue] * self.numberOfRows
+        for rowIndex, valueCode in self.columns[self.keyIndices[key]].iteritems():
+            columnValuesL[rowIndex] = dictionary[valueCode]
+        return columnValuesL
+
+
+class TagIndex(object):
+    """
+    inverted index of OSM shapes tags: key -> value -> indices of shapes having that tag.
+    A shape index is the first index of the "values" data tree paths (the row index of the attributeTable).
+    The index published by "OSM shapes" component keeps the InstanceGuid of its "values" output, so that the components connected directly to that output can reuse it
+    """
+    def __init__(self, keys, valuesDataTree, attributeTable=None, valuesOutputParam=None):
+        self.keys = list(keys)
+        self.branchCount = valuesDataTree.BranchCount
+        self.dataCount = valuesDataTree.DataCount
+        self.valuesOutputId = valuesOutputParam.InstanceGuid  if (valuesOutputParam != None)  else  None
+        self.index = {}  # key: {value: set of shapes indices}
+        
+        keyIndices = {}  # only the first position of each key is used, the same as when searching through the keys list
+        for keyIndex, key in enumerate(self.keys):
+            if not keyIndices.has_key(key):
+                keyIndices[key] = keyIndex
+                self.index[key] = {}
+        
+        if attributeTable != None:
+            # the attributeTable columns already keep only the non-empty values
+            dictionary = attributeTable.dictionary
+            for key, keyIndex in keyIndices.items():
+                valuesIndex = self.index[key]
+                for rowIndex, valueCode in attributeTable.columns[keyIndex].iteritems():
+                    value = dictionary[valueCode]
+                    if valuesIndex.has_key(value):
+                        valuesIndex[value].add(rowIndex)
+                    else:
+                        valuesIndex[value] = set([rowIndex])
+        else:
+            for path, valuesL in zip(valuesDataTree.Paths, valuesDataTree.Branches):
+                if len(valuesL) == 0:
+                    continue
+                shapeIndex = path[0]
+                for key, keyIndex in keyIndices.items():
+                    value = valuesL[keyIndex]
+                    if value == "":
+                        continue
+                    valuesIndex = self.index[key]
+                    if valuesIndex.has_key(value):
+                        valuesIndex[value].add(shapeIndex)
+                    else:
+                        valuesIndex[value] = set([shapeIndex])
+    
+    
+    def matchesDataTree(self, keys, valuesDataTree, valuesInputParam):
+        """
+        check if the keys and valuesDataTree inputted into some other component (through its valuesInputParam) are the ones this tag index has been created for.
+        Grasshopper passes copies of the data trees to each component, so instead of comparing their contents, the valuesInputParam needs to be connected only to the "values" output of "OSM shapes" component, and without any flattening, grafting, simplifying or reversing of its data
+        """
+        if (self.valuesOutputId == None) or (valuesInputParam == None) or (valuesInputParam.SourceCount != 1):
+            return False
+        if (valuesInputParam.Sources[0].InstanceGuid != self.valuesOutputId):
+            return False
+        if (valuesInputParam.DataMapping != getattr(Grasshopper.Kernel.GH_DataMapping, "None")) or valuesInputParam.Simplify or valuesInputParam.Reverse:
+            return False
+        return (list(keys) == self.keys) and (valuesDataTree.BranchCount == self.branchCount) and (valuesDataTree.DataCount == self.dataCount)
+    
+    
+    def shapesIndices(self, requiredKey, requiredValues):
+        """
+        set of indices of shapes whose "requiredKey" value is one of the "requiredValues". Or whose "requiredKey" has any value, if requiredValues == ["^"]
+        """
+        valuesIndex = self.index.get(requiredKey)
+        if valuesIndex == None:
+            return set()
+        
+        foundShapesIndices = set()
+        if (requiredValues == ["^"]):
+            for shapesIndices in valuesIndex.itervalues():
+                foundShapesIndices.update(shapesIndices)
+        else:
+            for requiredValue in requiredValues:
+                shapesIndices = valuesIndex.get(requiredValue)
+                if shapesIndices != None:
+                    foundShapesIndices.update(shapesIndices)
+        return foundShapesIndices
+
+
+class GeometryProperties(object):
+    """
+    lazily calculated and memoized area, centroid, bounding box and closedness of the shapes from a "shapes" data tree (for example "shapes" output of "OSM shapes" component).
+    Shapes are keyed by their ids: all indices of the data tree path (of a branch with a single shape), or all indices of the path and the shape's index in the branch.
+    The latter also applies if the paths have been shifted (with "datatree_shiftPaths" method): the shape's index in the branch replaces the removed last index of the path
+    """
+    def __init__(self, shapesDataTree):
+        self.shapes = {}  # shapeId: shape
+        self.signature = self.shapesSignature(shapesDataTree)
+        for path, shapesL in zip(shapesDataTree.Paths, shapesDataTree.Branches):
+            if len(shapesL) == 1:
+                if shapesL[0] != None:
+                    self.shapes[self.shapeId(path)] = shapesL[0]
+            else:
+                for itemIndex, shape in enumerate(shapesL):
+                    if shape != None:
+                        self.shapes[self.shapeId(path, itemIndex)] = shape
+        
+        self.vertices = {}
+        self.closed = {}
+        self.areas = {}
+        self.centroids = {}
+        self.boundingBoxes = {}
+    
+    
+    def shapeId(self, path, itemIndex=None):
+        """
+        id of the shape from the data tree path. itemIndex is needed only for branches with several shapes, or if the paths have been shifted
+        """
+        if itemIndex == None:
+            return tuple(path.Indices)
+        else:
+            return tuple(path.Indices) + (itemIndex,)
+    
+    
+    def shapesSignature(self, shapesDataTree):
+        """
+        hash of the paths and the shapes' positions (the first and the middle vertex of polylines) of a shapesDataTree.
+        Grasshopper passes copies of the shapes to each component, so shapes can not be compared by identity
+        """
+        signature = hash((shapesDataTree.BranchCount, shapesDataTree.DataCount))
+        for path, shapesL in zip(shapesDataTree.Paths, shapesDataTree.Branches):
+            signature = hash((signature, tuple(path.Indices)))
+            for shape in shapesL:
+                if isinstance(shape, Rhino.Geometry.Point3d):
+                    pts = [shape]
+                elif isinstance(shape, Rhino.Geometry.Polyline):
+                    pts = [shape[0], shape[shape.Count // 2]]
+                elif isinstance(shape, Rhino.Geometry.PolylineCurve):
+                    pts = [shape.Point(0), shape.Point(shape.PointCount // 2)]  # Polyline shapes become PolylineCurves when passed to other components
+                elif isinstance(shape, Rhino.Geometry.Curve):
+                    pts = [shape.PointAtStart, shape.PointAtEnd]
+                else:
+                    pts = []
+                signature = hash((signature, tuple((pt.X, pt.Y, pt.Z)  for pt in pts)))
+        return signature
+    
+    
+    def matchesDataTree(self, shapesDataTree):
+        """
+        check if the shapesDataTree (for example inputted into some other component) is the one these geometry properties have been created for
+        """
+        return self.shapesSignature(shapesDataTree) == self.signature
+    
+    
+    def shapeVertices(self, shapeId):
+        """
+        shape's vertices as a list of (x,y,z) tuples. None if the shape is not a polyline
+        """
+        if not self.vertices.has_key(shapeId):
+            shape = self.shapes[shapeId]
+            if isinstance(shape, Rhino.Geometry.Polyline):
+                polyline = shape
+            elif isinstance(shape, Rhino.Geometry.Curve):
+                success, polyline = shape.TryGetPolyline()
+                if not success:
+                    polyline = None
+            else:
+                polyline = None
+            
+            if polyline == None:
+                self.vertices[shapeId] = None
+            else:
+                self.vertices[shapeId] = [(pt.X, pt.Y, pt.Z)  for pt in polyline]
+        
+        return self.vertices[shapeId]
+    
+    
+    def isClosed(self, shapeId):
+        """
+        check if the shape is a closed curve
+        """
+        if not self.closed.has_key(shapeId):
+            vertices = self.shapeVertices(shapeId)
+            if vertices == None:
+                shape = self.shapes[shapeId]
+                self.closed[shapeId] = isinstance(shape, Rhino.Geometry.Curve) and shape.IsClosed
+            else:
+                tol = Rhino.RhinoDoc.ActiveDoc.ModelAbsoluteTolerance
+                (x1, y1, z1), (x2, y2, z2) = vertices[0], vertices[-1]
+                self.closed[shapeId] = (len(vertices) >= 4) and (abs(x1-x2) <= tol) and (abs(y1-y2) <= tol) and (abs(z1-z2) <= tol)
+        
+        return self.closed[shapeId]
+    
+    
+    def areaAndCentroid(self, shapeId):
+        """
+        calculate the area and centroid of a closed shape with the shoelace formula. Area and centroid are None for open shapes
+        """
+        if not self.isClosed(shapeId):
+            self.areas[shapeId] = self.centroids[shapeId] = None
+            return
+        
+        vertices = self.shapeVertices(shapeId)
+        if vertices == None:
+            # closed curve which is not a polyline
+            areaMassProperties = Rhino.Geometry.AreaMassProperties.Compute(self.shapes[shapeId])
+            if areaMassProperties == None:
+                self.areas[shapeId] = self.centroids[shapeId] = None
+            else:
+                self.areas[shapeId] = areaMassProperties.Area
+                self.centroids[shapeId] = areaMassProperties.Centroid
+            return
+        
+        # coordinates relative to the first vertex, for numerical accuracy
+        x0, y0, z0 = vertices[0]
+        doubleSignedArea = 0
+        centroidX = 0
+        centroidY = 0
+        for k in xrange(len(vertices)-1):
+            xa = vertices[k][0] - x0;  ya = vertices[k][1] - y0
+            xb = vertices[k+1][0] - x0;  yb = vertices[k+1][1] - y0
+            cross = xa * yb - xb * ya
+            doubleSignedArea += cross
+            centroidX += (xa + xb) * cross
+            centroidY += (ya + yb) * cross
+        
+        if doubleSignedArea == 0:
+            # degenerate shape
+            self.areas[shapeId] = 0
+            self.centroids[shapeId] = Rhino.Geometry.Point3d(x0, y0, z0)
+        else:
+            self.areas[shapeId] = abs(doubleSignedArea) / 2
+            self.centroids[shapeId] = Rhino.Geometry.Point3d(x0 + centroidX / (3 * doubleSignedArea), y0 + centroidY / (3 * doubleSignedArea), z0)  # OSM shapes are horizontal: all vertices have the same Z coordinate
+    
+    
+    def area(self, shapeId):
+        """
+        area of a closed shape (None for open shapes)
+        """
+        if not self.areas.has_key(shapeId):
+            self.areaAndCentroid(shapeId)
+        return self.areas[shapeId]
+    
+    
+    def centroid(self, shapeId):
+        """
+        area centroid of a closed shape (None for open shapes)
+        """
+        if not self.centroids.has_key(shapeId):
+            self.areaAndCentroid(shapeId)
+        return self.centroids[shapeId]
+    
+    
+    def boundingBox(self, shapeId):
+        """
+        bounding box of a shape
+        """
+        if not self.boundingBoxes.has_key(shapeId):
+            vertices = self.shapeVertices(shapeId)
+            if vertices == None:
+                shape = self.shapes[shapeId]
+                if isinstance(shape, Rhino.Geometry.Point3d):
+                    self.boundingBoxes[shapeId] = Rhino.Geometry.BoundingBox(shape, shape)
+                else:
+                    self.boundingBoxes[shapeId] = shape.GetBoundingBox(True)
+            else:
+                xs, ys, zs = zip(*vertices)
+                self.boundingBoxes[shapeId] = Rhino.Geometry.BoundingBox(min(xs), min(ys), min(zs), max(xs), max(ys), max(zs))
+        
+        return self.boundingBoxes[shapeId]
+
+
+class SpatialIndex(object):
+    """
+    R-tree over the bounding boxes of the shapes from "GeometryProperties" class, for region, point and nearest shape queries.
+    Found shapes are identified with the same shape ids as in "GeometryProperties" class, so they are valid for the data trees with shifted paths too
+    """
+    def __init__(self, geometryProperties):
+        self.geometryProperties = geometryProperties
+        self.rtree = Rhino.Geometry.RTree()
+        self.shapeIds = sorted(geometryProperties.shapes.keys())  # R-tree element ids are positions in this list (the order of the data tree paths)
+        self.wholeBoundingBox = Rhino.Geometry.BoundingBox.Empty
+        
+        for position, shapeId in enumerate(self.shapeIds):
+            boundingBox = geometryProperties.boundingBox(shapeId)
+            if boundingBox.IsValid:
+                self.rtree.Insert(boundingBox, position)
+                self.wholeBoundingBox = Rhino.Geometry.BoundingBox.Union(self.wholeBoundingBox, boundingBox)
+    
+    
+    def searchRegion(self, boundingBox):
+        """
+        ids of all shapes whose bounding boxes intersect the boundingBox, in the order of the data tree paths
+        """
+        foundPositions = []
+        def searchCallback(sender, e):
+            foundPositions.append(e.Id)
+        self.rtree.Search(boundingBox, searchCallback)
+        foundPositions.sort()
+        
+        return [self.shapeIds[position]  for position in foundPositions]
+    
+    
+    def searchPoint(self, point, tolerance=0):
+        """
+        ids of all shapes whose bounding boxes contain the point
+        """
+        toleranceVector = Rhino.Geometry.Vector3d(tolerance, tolerance, tolerance)
+        boundingBox = Rhino.Geometry.BoundingBox(point - toleranceVector, point + toleranceVector)
+        return self.searchRegion(boundingBox)
+    
+    
+    def shapeDistance(self, shapeId, point):
+        """
+        the shortest distance between the point and the shape
+        """
+        shape = self.geometryProperties.shapes[shapeId]
+        if isinstance(shape, Rhino.Geometry.Point3d):
+            return shape.DistanceTo(point)
+        elif isinstance(shape, Rhino.Geometry.Polyline):
+            return shape.ClosestPoint(point).DistanceTo(point)
+        elif isinstance(shape, Rhino.Geometry.Curve):
+            success, t = shape.ClosestPoint(point)
+            if success:
+                return shape.PointAt(t).DistanceTo(point)
+        return self.geometryProperties.boundingBox(shapeId).ClosestPoint(point).DistanceTo(point)
+    
+    
+    def nearest(self, point, maxDistance=None):
+        """
+        id of the shape nearest to the point. Returns None if there are no shapes (within the maxDistance)
+        """
+        if not self.wholeBoundingBox.IsValid:
+            return None
+        if maxDistance == None:
+            maxDistance = self.wholeBoundingBox.ClosestPoint(point).DistanceTo(point) + self.wholeBoundingBox.Diagonal.Length
+        
+        # search radius starts with the average size of a shape, and doubles until a shape is found
+        searchRadius = max(self.wholeBoundingBox.Diagonal.Length / max(len(self.shapeIds), 1), 1e-6)
+        while True:
+            searchRadius = min(searchRadius, maxDistance)
+            nearestShapeId = None
+            nearestDistance = None
+            for shapeId in self.searchPoint(point, searchRadius):
+                distance = self.shapeDistance(shapeId, point)
+                if (nearestDistance == None) or (distance < nearestDistance):
+                    nearestShapeId = shapeId
+                    nearestDistance = distance
+            # shapes outside of the searchRadius can not be nearer than the searchRadius
+            if (nearestDistance != None) and (nearestDistance <= searchRadius):
+                return nearestShapeId
+            if searchRadius >= maxDistance:
+                return None
+            searchRadius *= 2
+
+
+class TerrainSampler(object):
+    """
+    terrain heights on a regular XY grid, for bilinear lookup of the terrain height at any number of points (for example all vertices of the OSM shapes), instead of projecting each shape to the terrain brep.
+    The grid resolution is based on the number of control points of the terrain surface (created from a regular DEM grid by "Terrain Generator" component).
+    Grid nodes are sampled (with a vertical ray to the terrain mesh) only when a point in one of their cells is looked up, and only once
+    """
+    def __init__(self, terrainBrep, gridResolution=None):
+        self.terrainBrep = terrainBrep
+        self.tol = Rhino.RhinoDoc.ActiveDoc.ModelAbsoluteTolerance
+        
+        if gridResolution == None:
+            terrainSurface = terrainBrep.Faces[0].UnderlyingSurface()
+            if isinstance(terrainSurface, Rhino.Geometry.NurbsSurface):
+                gridResolution = 2 * max(terrainSurface.Points.CountU, terrainSurface.Points.CountV)  # twice the DEM resolution, as the terrain surface is not bilinear
+            else:
+                gridResolution = 200  # default
+            gridResolution = min(max(gridResolution, 50), 300)
+        
+        terrainBB = terrainBrep.GetBoundingBox(True)
+        self.minX = terrainBB.Min.X
+        self.minY = terrainBB.Min.Y
+        self.numberOfCellsX = self.numberOfCellsY = gridResolution
+        self.cellSizeX = max(terrainBB.Max.X - terrainBB.Min.X, self.tol) / self.numberOfCellsX
+        self.cellSizeY = max(terrainBB.Max.Y - terrainBB.Min.Y, self.tol) / self.numberOfCellsY
+        self.cellSize = min(self.cellSizeX, self.cellSizeY)
+        
+        # terrain mesh is used for shooting vertical rays from the grid nodes
+        self.terrainMesh = Rhino.Geometry.Mesh()
+        for mesh in Rhino.Geometry.Mesh.CreateFromBrep(terrainBrep, Rhino.Geometry.MeshingParameters.Smooth):
+            self.terrainMesh.Append(mesh)
+        self.rayStartZ = terrainBB.Max.Z + 1
+        
+        self.nodesHeights = {}  # node index (row-major): height, None for grid nodes outside of the terrain (for example outside of trimmed terrain)
+    
+    
+    def nodeHeight(self, i, j):
+        """
+        terrain height at the grid node (i, j). Sampled at the first lookup
+        """
+        nodeIndex = j * (self.numberOfCellsX + 1) + i
+        try:
+            return self.nodesHeights[nodeIndex]
+        except KeyError:
+            ray = Rhino.Geometry.Ray3d(Rhino.Geometry.Point3d(self.minX + i * self.cellSizeX, self.minY + j * self.cellSizeY, self.rayStartZ), Rhino.Geometry.Vector3d(0,0,-1))
+            t = Rhino.Geometry.Intersect.Intersection.MeshRay(self.terrainMesh, ray)
+            if t >= 0:
+                height = ray.PointAt(t).Z
+            else:
+                height = None
+            self.nodesHeights[nodeIndex] = height
+            return height
+    
+    
+    def heights(self, xs, ys):
+        """
+        bilinearly interpolated terrain heights at (xs, ys) points. None for points outside of the terrain
+        """
+        nodeHeight = self.nodeHeight
+        numberOfCellsX = self.numberOfCellsX
+        numberOfCellsY = self.numberOfCellsY
+        
+        zs = []
+        for x, y in zip(xs, ys):
+            u = (x - self.minX) / self.cellSizeX
+            v = (y - self.minY) / self.cellSizeY
+            i = int(math.floor(u))
+            j = int(math.floor(v))
+            # points on the last grid line belong to the last cell
+            if u == numberOfCellsX: i -= 1
+            if v == numberOfCellsY: j -= 1
+            if (i < 0) or (j < 0) or (i >= numberOfCellsX) or (j >= numberOfCellsY):
+                zs.append(None)
+                continue
+            
+            z00 = nodeHeight(i, j)
+            z10 = nodeHeight(i + 1, j)
+            z01 = nodeHeight(i, j + 1)
+            z11 = nodeHeight(i + 1, j + 1)
+            if (z00 == None) or (z10 == None) or (z01 == None) or (z11 == None):
+                zs.append(None)
+                continue
+            
+            fu = u - i
+            fv = v - j
+            zs.append((z00 * (1 - fu) + z10 * fu) * (1 - fv) + (z01 * (1 - fu) + z11 * fu) * fv)
+        
+        return zs
+    
+    
+    def drapeCurves(self, shapes, divideEdges=False):
+        """
+        drape polyline shapes onto the terrain, with a single heights lookup for all of their vertices. Only the shapes vertices are draped, unless divideEdges is True: then shape edges are divided at the grid cell size, so that the draped curves follow the terrain between the vertices too.
+        Returns a list of draped curves for each shape (an empty list if the shape is outside of the terrain), the same as Curve.ProjectToBrep would
+        """
+        shapesPtsXY = []
+        xs = []
+        ys = []
+        for shape in shapes:
+            success, polyline = shape.TryGetPolyline()
+            if not success:
+                shapesPtsXY.append(None)  # not a polyline. It will be projected to the terrain brep
+                continue
+            
+            shapePtsXY = []
+            for k in xrange(polyline.Count - 1):
+                x1, y1 = polyline[k].X, polyline[k].Y
+                x2, y2 = polyline[k+1].X, polyline[k+1].Y
+                if divideEdges:
+                    numberOfDivisions = max(int(math.ceil(math.sqrt((x2-x1)**2 + (y2-y1)**2) / self.cellSize)), 1)
+                else:
+                    numberOfDivisions = 1
+                for n in xrange(numberOfDivisions):
+                    shapePtsXY.append((x1 + (x2-x1) * n / numberOfDivisions, y1 + (y2-y1) * n / numberOfDivisions))
+            shapePtsXY.append((polyline[polyline.Count-1].X, polyline[polyline.Count-1].Y))
+            shapesPtsXY.append(shapePtsXY)
+            for x, y in shapePtsXY:
+                xs.append(x)
+                ys.append(y)
+        
+        zs = self.heights(xs, ys)
+        
+        drapedCurvesLL = []
+        ptIndex = 0
+        for shape, shapePtsXY in zip(shapes, shapesPtsXY):
+            if shapePtsXY == None:
+                drapedCurvesLL.append(list(Rhino.Geometry.Curve.ProjectToBrep(shape, self.terrainBrep, Rhino.Geometry.Vector3d(0,0,1), self.tol)))
+                continue
+            
+            # split the shape into parts which are inside of the terrain
+            runs = [[]]
+            for x, y in shapePtsXY:
+                z = zs[ptIndex]
+                ptIndex += 1
+                if z == None:
+                    if len(runs[-1]) != 0:
+                        runs.append([])
+                else:
+                    runs[-1].append(Rhino.Geometry.Point3d(x, y, z))
+            if (len(runs) > 1) and (len(runs[-1]) != 0) and shape.IsClosed and (zs[ptIndex - len(shapePtsXY)] != None):
+                # closed shape which starts and ends inside of the terrain: the first and the last parts are the same part
+                runs[0] = runs.pop()[:-1] + runs[0]
+            runs = [run  for run in runs if len(run) > 1]
+            
+            drapedCurvesLL.append([Rhino.Geometry.Polyline(run).ToNurbsCurve()  for run in runs])
+        
+        return drapedCurvesLL
+    
+    
+    def drapeFootprint(self, shapes):
+        """
+        drape a closed planar footprint (its outer polygon and holes) onto the terrain, as a mesh with edges not longer than the grid cell size. Its vertices are draped with a single heights lookup, instead of splitting the terrain brep with the footprint.
+        Returns None if the footprint can not be meshed, or if a part of it is outside of the terrain
+        """
+        planarBreps = Rhino.Geometry.Brep.CreatePlanarBreps(shapes)
+        if (planarBreps == None) or (len(planarBreps) == 0):
+            return None
+        
+        meshingParameters = Rhino.Geometry.MeshingParameters()
+        meshingParameters.SimplePlanes = False
+        meshingParameters.MaximumEdgeLength = self.cellSize
+        meshes = Rhino.Geometry.Mesh.CreateFromBrep(planarBreps[0], meshingParameters)
+        if (meshes == None) or (len(meshes) == 0):
+            return None
+        footprintMesh = Rhino.Geometry.Mesh()
+        for mesh in meshes:
+            footprintMesh.Append(mesh)
+        
+        vertices = footprintMesh.Vertices
+        zs = self.heights([vertices[k].X  for k in xrange(vertices.Count)], [vertices[k].Y  for k in xrange(vertices.Count)])
+        if None in zs:
+            return None
+        for k, z in enumerate(zs):
+            vertices.SetVertex(k, vertices[k].X, vertices[k].Y, z)
+        footprintMesh.Normals.ComputeNormals()
+        footprintMesh.Compact()
+        
+        del planarBreps; del meshes
+        return footprintMesh
+
+
 def raiseWarning(booleanValue, printMsg):
     if not booleanValue:
         level = Grasshopper.Kernel.GH_RuntimeMessageLevel.Warning
@@ -1864,10 +3661,16 @@ def raiseWarning(booleanValue, printMsg):
 # send classes to sticky
 sc.sticky["gismo_check"] = Check()
 sc.sticky["gismo_mainComponent"] = mainComponent
+sc.sticky["gismo_DownloadManager"] = DownloadManager
 sc.sticky["gismo_Preparation"] = Preparation
 sc.sticky["gismo_CreateGeometry"] = CreateGeometry
 sc.sticky["gismo_EnvironmentalAnalysis"] = EnvironmentalAnalysis
 sc.sticky["gismo_OSM"] = OSM
+sc.sticky["gismo_AttributeTable"] = AttributeTable
+sc.sticky["gismo_TagIndex"] = TagIndex
+sc.sticky["gismo_GeometryProperties"] = GeometryProperties
+sc.sticky["gismo_SpatialIndex"] = SpatialIndex
+sc.sticky["gismo_TerrainSampler"] = TerrainSampler
 sc.sticky["gismo_mapwingisFolder"] = mapFolder_
 
 # check gismoFolder
@@ -0,0 +1,129 @@
+# benchmark of Gismo's CreateGeometry.createRenderMesh method against its former, pixel by pixel, version
+#
+# Gismo is a plugin for GIS Environmental Analysis (GPL) started by Djordje Spasic.
+#
+# This file is part of Gismo.
+#
+# Gismo is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+#
+# The GPL-3.0+ license <http://spdx.org/licenses/GPL-3.0+>
+
+"""
+Run this script from Rhino's Python editor (EditPythonScript), after the Gismo_Gismo component has been run.
+Pick a mesh with vertex colors (for example the one baked by the "OSM Render Mesh" component). The durations of "createRenderMesh" (with and without the palette texture) and of the former "createRenderMesh_setPixel" are printed, in seconds.
+"""
+
+import rhinoscriptsyntax as rs
+import scriptcontext as sc
+import tempfile
+import System
+import Rhino
+import math
+import time
+import os
+
+
+def createRenderMesh_setPixel(mesh, u):
+    """
+    former version of "createRenderMesh" method, with the texture image written pixel by pixel (with Bitmap.SetPixel)
+    """
+    mesh.Unweld(0, False)
+    
+    dt = []
+    c = mesh.Faces.Count
+    for i in range(c - 1+1):
+        sub_dt = []
+        f = mesh.Faces[i]
+        color1 = mesh.VertexColors[f.A]
+        color2 = mesh.VertexColors[f.B]
+        color3 = mesh.VertexColors[f.C]
+        color4 = mesh.VertexColors[f.D]
+        sub_dt.append(System.Drawing.Color.FromArgb(color1.R, color1.G, color1.B))
+        sub_dt.append(System.Drawing.Color.FromArgb(color2.R, color2.G, color2.B))
+        sub_dt.append(System.Drawing.Color.FromArgb(color3.R, color3.G, color3.B))
+        sub_dt.append(System.Drawing.Color.FromArgb(color4.R, color4.G, color4.B))
+        dt.append(sub_dt)
+    
+    mesh.TextureCoordinates.Clear()
+    for i in range(mesh.Vertices.Count):
+        mesh.TextureCoordinates.Add(0,0)
+    
+    size = math.ceil(math.sqrt(c))
+    count = -1
+    
+    for x in xrange(size - 1+1):
+        for y in xrange(size - 1+1):
+            count += 1
+            if count < c - 1+1:
+                f = mesh.Faces[count]
+                sb = size * 2
+                mesh.TextureCoordinates[f.A] = Rhino.Geometry.Point2f((x * 2 + 0.5) / sb, (y * 2 + 0.5) / sb)
+                mesh.TextureCoordinates[f.B] = Rhino.Geometry.Point2f((x * 2 + 1.5) / sb, (y * 2 + 0.5) / sb)
+                mesh.TextureCoordinates[f.C] = Rhino.Geometry.Point2f((x * 2 + 1.5) / sb, (y * 2 + 1.5) / sb)
+                mesh.TextureCoordinates[f.D] = Rhino.Geometry.Point2f((x * 2 + 0.5) / sb, (y * 2 + 1.5) / sb)
+    
+    
+    dt_length = len(dt)
+    size = math.ceil(math.sqrt(dt_length))
+    sb = size * 2 - 1
+    bm = System.Drawing.Bitmap(size * 2, size * 2)
+    bmb = System.Drawing.Bitmap(size * 4, size * 4)
+    count = -1
+    
+    for x in xrange(size - 1+1):
+        for y in xrange(size - 1+1):
+            count += 1
+            if count < dt_length - 1+1:
+                bm.SetPixel(x * 2 + 0, sb - (y * 2 + 0), dt[count][0])
+                bm.SetPixel(x * 2 + 1, sb - (y * 2 + 0), dt[count][1])
+                bm.SetPixel(x * 2 + 1, sb - (y * 2 + 1), dt[count][2])
+                bm.SetPixel(x * 2 + 0, sb - (y * 2 + 1), dt[count][3])
+    
+    g = System.Drawing.Graphics.FromImage(bmb)
+    g.InterpolationMode = System.Drawing.Drawing2D.InterpolationMode.NearestNeighbor
+    g.DrawImage(bm, 0, 0, size * 4 + 1, size * 4 + 1)
+    bmb.Save(u)
+    del dt
+    
+    return mesh
+
+
+def benchmarkRenderMesh(mesh, u):
+    """
+    compare the durations of "createRenderMesh" (with and without the palette texture) and the former "createRenderMesh_setPixel" for the same mesh (durations in seconds). The texture image is saved to the "u" file path
+    """
+    gismo_createGeometry = sc.sticky["gismo_CreateGeometry"]()
+    
+    startTime = time.time()
+    gismo_createGeometry.createRenderMesh(mesh.DuplicateMesh(), u)
+    duration = time.time() - startTime
+    
+    startTime = time.time()
+    gismo_createGeometry.createRenderMesh(mesh.DuplicateMesh(), u, False)
+    duration_noPalette = time.time() - startTime
+    
+    startTime = time.time()
+    createRenderMesh_setPixel(mesh.DuplicateMesh(), u)
+    duration_setPixel = time.time() - startTime
+    
+    print "Texture image of %s mesh faces created in: %0.2f seconds (without palette texture: %0.2f seconds, SetPixel: %0.2f seconds)" % (mesh.Faces.Count, duration, duration_noPalette, duration_setPixel)
+    
+    return duration, duration_noPalette, duration_setPixel
+
+
+def main():
+    if not sc.sticky.has_key("gismoGismo_released"):
+        print "Please run the Gismo_Gismo component first."
+        return
+    
+    meshId = rs.GetObject("Pick a mesh with vertex colors", rs.filter.mesh)
+    if meshId == None:
+        return
+    mesh = rs.coercemesh(meshId)
+    
+    textureImagePath = os.path.join(tempfile.gettempdir(), "gismo_benchmarkRenderMesh.png")
+    benchmarkRenderMesh(mesh, textureImagePath)
+    os.remove(textureImagePath)
+
+
+main()
@@ -0,0 +1,110 @@
+# checks and benchmark of Gismo's pure Python UTM projection against EPSG reference points
+#
+# Gismo is a plugin for GIS Environmental Analysis (GPL) started by Djordje Spasic.
+# 
+# This file is part of Gismo.
+# 
+# Gismo is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+#
+# The GPL-3.0+ license <http://spdx.org/licenses/GPL-3.0+>
+
+"""
+Run this script from Rhino's Python editor (EditPythonScript) after the Gismo_Gismo component has been run, or with any Python 2.7 interpreter outside of Rhino.
+Outside of Rhino, the projection methods of the OSM class are taken from "src/gismo_gismo.py", as they only need the "math" module.
+Reference points have been projected with PROJ 9.5 (WGS84 to WGS84 UTM zone EPSG codes), and rounded to millimeters.
+"""
+
+import random
+import math
+import time
+import ast
+import os
+
+
+# [name, EPSG code, latitude (degrees), longitude (degrees), easting (meters), northing (meters)]
+referencePoints = [
+    ["Belgrade", 32634, 44.8176, 20.4633, 457565.832, 4962828.485],
+    ["New York", 32618, 40.7128, -74.006, 583959.372, 4507350.998],
+    ["Sydney", 32756, -33.8688, 151.2093, 334368.634, 6250948.345],
+    ["Quito", 32717, -0.1807, -78.4678, 781861.457, 9980007.567],
+    ["Reykjavik", 32627, 64.1466, -21.9426, 454138.377, 7113689.869],
+    ["Tokyo", 32654, 35.6762, 139.6503, 377855.776, 3948874.392],
+    ["Cape Town", 32734, -33.9249, 18.4241, 261881.599, 6243182.355],
+    ["Longyearbyen", 32633, 78.2232, 15.6267, 514278.715, 8683355.469],
+    ["zone 1 edge", 32601, 10.0, -179.9, 182044.572, 1106810.657],
+    ["zone 60 edge", 32760, -70.0, 179.9, 610660.465, 2231494.548],
+    ["equator", 32631, 0.0, 3.0, 500000.000, 0.000]
+    ]
+
+projectionMethodNames = ["transverseMercator_coefficients", "transverseMercatorProjection", "transverseMercatorInverseProjection", "UTMprojection", "UTMinverseProjection"]
+
+
+def loadOSM():
+    """
+    OSM class instance from the Gismo_Gismo component, or (outside of Rhino) a class with only its projection methods
+    """
+    try:
+        import scriptcontext as sc
+        return sc.sticky["gismo_OSM"]()
+    except (ImportError, KeyError):
+        pass
+    
+    gismo_gismo_filePath = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "gismo_gismo.py")
+    with open(gismo_gismo_filePath) as gismo_gismoFile:
+        module = ast.parse(gismo_gismoFile.read())
+    OSMclassNode = [node  for node in module.body  if isinstance(node, ast.ClassDef) and (node.name == "OSM")][0]
+    methodNodes = [node  for node in OSMclassNode.body  if isinstance(node, ast.FunctionDef) and (node.name in projectionMethodNames)]
+    classNode = ast.ClassDef("OSM", [ast.Name("object", ast.Load())], methodNodes, [])
+    namespace = {"math": math}
+    exec compile(ast.fix_missing_locations(ast.Module([classNode])), gismo_gismo_filePath, "exec") in namespace
+    return namespace["OSM"]()
+
+
+def UTMzoneFromEPSGcode(EPSGcode):
+    UTMzone = EPSGcode % 100
+    northOrsouth = "north"  if (EPSGcode < 32700)  else  "south"
+    return UTMzone, northOrsouth
+
+
+def checkReferencePoints(gismo_osm):
+    passed = True
+    for name, EPSGcode, latitudeD, longitudeD, easting, northing in referencePoints:
+        UTMzone, northOrsouth = UTMzoneFromEPSGcode(EPSGcode)
+        eastings, northings = gismo_osm.UTMprojection([latitudeD], [longitudeD], UTMzone, northOrsouth)
+        latitudesD, longitudesD = gismo_osm.UTMinverseProjection([easting], [northing], UTMzone, northOrsouth)
+        forwardErrorM = max(abs(eastings[0] - easting), abs(northings[0] - northing))
+        inverseErrorD = max(abs(latitudesD[0] - latitudeD), abs(longitudesD[0] - longitudeD))
+        # reference eastings and northings are rounded to 1 mm, which is about 1e-8 degrees
+        pointPassed = (forwardErrorM < 0.001) and (inverseErrorD < 1e-7)
+        passed = passed and pointPassed
+        print "%-14s EPSG %s: forward error %0.6f m, inverse error %0.2e degrees  %s" % (name, EPSGcode, forwardErrorM, inverseErrorD, "OK"  if pointPassed  else  "FAILED")
+    return passed
+
+
+def benchmark(gismo_osm, numberOfPoints=100000):
+    """
+    time the projection and its inverse of numberOfPoints random points, up to 3.5 degrees off the central meridian of UTM zone 34 north
+    """
+    randomGenerator = random.Random(0)
+    latitudesD = [randomGenerator.uniform(0, 80)  for i in xrange(numberOfPoints)]
+    longitudesD = [randomGenerator.uniform(21 - 3.5, 21 + 3.5)  for i in xrange(numberOfPoints)]
+    
+    startTime = time.time()
+    eastings, northings = gismo_osm.UTMprojection(latitudesD, longitudesD, 34, "north")
+    projectionTime = time.time() - startTime
+    startTime = time.time()
+    latitudesD_inverse, longitudesD_inverse = gismo_osm.UTMinverseProjection(eastings, northings, 34, "north")
+    inverseProjectionTime = time.time() - startTime
+    
+    roundTripErrorD = max(max(abs(latitudeD - latitudeD_inverse), abs(longitudeD - longitudeD_inverse))  for latitudeD, longitudeD, latitudeD_inverse, longitudeD_inverse in zip(latitudesD, longitudesD, latitudesD_inverse, longitudesD_inverse))
+    print "%s points: projection %0.2f s, inverse projection %0.2f s, round trip error %0.2e degrees  %s" % (numberOfPoints, projectionTime, inverseProjectionTime, roundTripErrorD, "OK"  if (roundTripErrorD < 1e-9)  else  "FAILED")
+    return roundTripErrorD < 1e-9
+
+
+def main():
+    gismo_osm = loadOSM()
+    results = [checkReferencePoints(gismo_osm), benchmark(gismo_osm)]
+    print "%s of %s checks passed" % (results.count(True), len(results))
+
+
+main()
@@ -0,0 +1,124 @@
+# tests of Gismo's DownloadManager class against a local HTTP stub server
+#
+# Gismo is a plugin for GIS Environmental Analysis (GPL) started by Djordje Spasic.
+# 
+# This file is part of Gismo.
+# 
+# Gismo is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+#
+# The GPL-3.0+ license <http://spdx.org/licenses/GPL-3.0+>
+
+"""
+Run this script from Rhino's Python editor (EditPythonScript), after the Gismo_Gismo component has been run.
+No internet connection is needed: all files are served by a stub HTTP server on localhost, which supports "Range", "If-Range" and "ETag" headers.
+"""
+
+import scriptcontext as sc
+import BaseHTTPServer
+import threading
+import tempfile
+import shutil
+import os
+
+
+class StubHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """
+    serves StubHandler.payload with StubHandler.etag. Every request's "Range" and "If-Range" headers and the response status are logged to StubHandler.requests
+    """
+    payload = ""
+    etag = '"v1"'
+    requests = []
+    
+    def do_GET(self):
+        rangeHeader = self.headers.getheader("Range")
+        ifRange = self.headers.getheader("If-Range")
+        start = 0
+        if rangeHeader and ((ifRange == None) or (ifRange == StubHandler.etag)):
+            start = int(rangeHeader.split("=")[1].split("-")[0])
+            if start >= len(StubHandler.payload):
+                StubHandler.requests.append([rangeHeader, ifRange, 416])
+                self.send_response(416)
+                self.send_header("Content-Range", "bytes */%s" % len(StubHandler.payload))
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+        
+        body = StubHandler.payload[start:]
+        status = 206  if (start > 0)  else  200
+        StubHandler.requests.append([rangeHeader, ifRange, status])
+        self.send_response(status)
+        self.send_header("ETag", StubHandler.etag)
+        self.send_header("Content-Length", str(len(body)))
+        if status == 206:
+            self.send_header("Content-Range", "bytes %s-%s/%s" % (start, len(StubHandler.payload) - 1, len(StubHandler.payload)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+
+def checkDownload(testName, downloadManager, downloadLink, filePath, expectedRequests):
+    del StubHandler.requests[:]
+    success = downloadManager.downloadFile(downloadLink, filePath)
+    with open(filePath, "rb") as downloadedFile:
+        content = downloadedFile.read()
+    passed = success and (content == StubHandler.payload) and (not os.path.isfile(filePath + ".part")) and ([request[2] for request in StubHandler.requests] == expectedRequests)
+    print "%s: %s  (responses: %s)" % (testName, "OK"  if passed  else  "FAILED", [request[2] for request in StubHandler.requests])
+    return passed
+
+
+def main():
+    DownloadManager = sc.sticky["gismo_DownloadManager"]
+    
+    server = BaseHTTPServer.HTTPServer(("127.0.0.1", 0), StubHandler)
+    serverThread = threading.Thread(target=server.serve_forever)
+    serverThread.daemon = True
+    serverThread.start()
+    downloadLink = "http://127.0.0.1:%s/file.bin" % server.server_address[1]
+    
+    testFolderPath = tempfile.mkdtemp()
+    filePath = os.path.join(testFolderPath, "file.bin")
+    partFilePath = filePath + ".part"
+    StubHandler.payload = "".join(chr(i % 251) for i in xrange(300000))
+    results = []
+    try:
+        # new download, with downloadFile called directly (not through downloadFiles) and a progress callback
+        progress = []
+        downloadManager = DownloadManager(numberOfRetries=0, progressCallback=lambda downloadedBytes, totalBytes, elapsedTime: progress.append(downloadedBytes))
+        results.append(checkDownload("new download", downloadManager, downloadLink, filePath, [200]) and (progress[-1] == len(StubHandler.payload)))
+        
+        # resume of a ".part" file with a known ETag
+        downloadManager = DownloadManager(numberOfRetries=0)
+        with open(partFilePath, "wb") as partFile:
+            partFile.write(StubHandler.payload[:100000])
+        DownloadManager.partFileValidators[partFilePath] = StubHandler.etag
+        results.append(checkDownload("resume", downloadManager, downloadLink, filePath, [206]))
+        
+        # complete ".part" file: the server answers "416 Requested Range Not Satisfiable" and the download restarts
+        with open(partFilePath, "wb") as partFile:
+            partFile.write(StubHandler.payload)
+        DownloadManager.partFileValidators[partFilePath] = StubHandler.etag
+        results.append(checkDownload("complete .part file", downloadManager, downloadLink, filePath, [416, 200]))
+        
+        # file changed on the server since the ".part" file has been downloaded: If-Range does not match and the whole file is sent
+        with open(partFilePath, "wb") as partFile:
+            partFile.write(StubHandler.payload[:100000])
+        DownloadManager.partFileValidators[partFilePath] = StubHandler.etag
+        StubHandler.etag = '"v2"'
+        StubHandler.payload = StubHandler.payload[::-1]
+        results.append(checkDownload("changed file", downloadManager, downloadLink, filePath, [200]))
+        
+        # ".part" file with an unknown ETag (left by a previous session) is not resumed
+        with open(partFilePath, "wb") as partFile:
+            partFile.write("corrupted data")
+        results.append(checkDownload("unknown .part file", downloadManager, downloadLink, filePath, [200]) and (StubHandler.requests[0][0] == None))
+    finally:
+        server.shutdown()
+        server.server_close()
+        shutil.rmtree(testFolderPath, ignore_errors=True)
+    
+    print "%s of %s tests passed" % (results.count(True), len(results))
+
+
+main()
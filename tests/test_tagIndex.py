@@ -0,0 +1,72 @@
+# tests of reusing the tag index published by Gismo's "OSM shapes" component in the "OSM search" component
+#
+# Gismo is a plugin for GIS Environmental Analysis (GPL) started by Djordje Spasic.
+#
+# This file is part of Gismo.
+#
+# Gismo is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+#
+# The GPL-3.0+ license <http://spdx.org/licenses/GPL-3.0+>
+
+"""
+Run this script from Rhino's Python editor (EditPythonScript), after the Gismo_Gismo component has been run.
+The tag index is created the same way as "OSM shapes" component creates it: from the shapefile fields (shortened key names) read into an AttributeTable, and with the full key names of its "keys" output.
+"""
+
+import scriptcontext as sc
+import Grasshopper
+
+
+def main():
+    if not sc.sticky.has_key("gismoGismo_released"):
+        print "Please run the Gismo_Gismo component first."
+        return
+    
+    gismo_osm = sc.sticky["gismo_OSM"]()
+    
+    # shapefile fields: ":" is replaced with "_" and maximal size is 10 characters
+    shortenedName_keys = ["osm_id", "name_en", "addr_stree", "building_l"]
+    fullName_keys = ["osm_id", "name:en", "addr:street", "building:levels"]
+    rows = [["101", "", "Second Avenue", "3"], ["102", "Town hall", "", ""], ["103", "", "Second Avenue", "5"]]
+    
+    attributeTable = sc.sticky["gismo_AttributeTable"](shortenedName_keys)
+    values = Grasshopper.DataTree[object]()
+    for rowIndex, valuesL in enumerate(rows):
+        attributeTable.addRow(valuesL)
+        values.AddRange(attributeTable.row(rowIndex), Grasshopper.Kernel.Data.GH_Path(rowIndex))
+    
+    # "values" output of "OSM shapes" component, connected to the "_values" input of "OSM search" component
+    valuesOutputParam = Grasshopper.Kernel.Parameters.Param_GenericObject()
+    valuesInputParam = Grasshopper.Kernel.Parameters.Param_GenericObject()
+    valuesInputParam.AddSource(valuesOutputParam)
+    otherInputParam = Grasshopper.Kernel.Parameters.Param_GenericObject()
+    
+    publishedTagIndex = sc.sticky["gismo_TagIndex"](fullName_keys, values, attributeTable, valuesOutputParam)
+    previousTagIndex = sc.sticky.get("gismo_OSMshapesComp_tagIndex")
+    sc.sticky["gismo_OSMshapesComp_tagIndex"] = publishedTagIndex
+    
+    results = []
+    try:
+        tagIndex = gismo_osm.shapesTagIndex(fullName_keys, values, valuesInputParam)
+        results.append(["search with full key names reuses the published index", tagIndex is publishedTagIndex])
+        results.append(["\"addr:street\" found", tagIndex.shapesIndices("addr:street", ["Second Avenue"]) == set([0, 2])])
+        results.append(["\"name:en\" with any value found", tagIndex.shapesIndices("name:en", ["^"]) == set([1])])
+        
+        tagIndex = gismo_osm.shapesTagIndex(fullName_keys, values, otherInputParam)
+        results.append(["values not connected to \"OSM shapes\" get their own index", (tagIndex is not publishedTagIndex) and (tagIndex.shapesIndices("addr:street", ["Second Avenue"]) == set([0, 2]))])
+        
+        valuesInputParam.DataMapping = Grasshopper.Kernel.GH_DataMapping.Flatten
+        tagIndex = gismo_osm.shapesTagIndex(fullName_keys, values, valuesInputParam)
+        results.append(["flattened values get their own index", tagIndex is not publishedTagIndex])
+    finally:
+        if previousTagIndex != None:
+            sc.sticky["gismo_OSMshapesComp_tagIndex"] = previousTagIndex
+        else:
+            sc.sticky.pop("gismo_OSMshapesComp_tagIndex", None)
+    
+    for testName, success in results:
+        print "%s: %s" % (testName, "OK"  if success  else  "FAILED")
+    print "%s of %s tests passed" % ([success  for testName, success in results].count(True), len(results))
+
+
+main()